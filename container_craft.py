@@ -4,9 +4,9 @@ import os
 import sys
 import argparse
 
-from container_craft.arguments import parse_build, parse_exec, parse_start, parse_stop, parse_checkout, parse_info,parse_logs, parse_shell, parse_console, parse_menu
+from container_craft.arguments import parse_build, parse_exec, parse_start, parse_stop, parse_checkout, parse_info,parse_logs, parse_shell, parse_console, parse_menu, parse_cache
 
-from container_craft.plugins import build, logs, info, shell, console, menu, runner, checkout
+from container_craft.plugins import build, logs, info, shell, console, menu, runner, checkout, cache
 
 project_root = os.path.abspath(os.path.dirname(__file__))
 if project_root not in sys.path:
@@ -25,6 +25,7 @@ def main():
     parser.add_argument("shell", help="Open a shell in a Docker container", action="store_true")
     parser.add_argument("console", help="Open a running Minecraft console", action="store_true")
     parser.add_argument("menu", help="Run the TUI based on the Kconfig file", action="store_true")
+    parser.add_argument("cache", help="Maintain the build cache (gc)", action="store_true")
     args = parser.parse_args()
 
     if args.command == "build":
@@ -67,6 +68,10 @@ def main():
         parse_menu(parser)
         args = parser.parse_args()
         menu.show(args)
+    elif args.command == "cache":
+        parse_cache(parser)
+        args = parser.parse_args()
+        cache.gc(args)
     else:
         parser.print_help()
         sys.exit(1)
@@ -1,5 +1,5 @@
 import argparse
-from container_craft.plugins import build, logs, info, shell, console, menu, runner, checkout
+from container_craft.plugins import build, logs, info, shell, console, menu, runner, checkout, cache
 import os
 
 def add_ssh_key_argument(parser):
@@ -66,15 +66,38 @@ def parse_build(parser):
     add_ssh_key_argument(parser)
     override_layers_dir_args(parser)
     override_build_dir_args(parser)
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        metavar="N",
+        help="Build up to N independent images at once (default: %(default)s)",
+        default=int(os.getenv("CONTAINER_CRAFTS_BUILD_JOBS", os.cpu_count() or 1))
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Rebuild images even when their build fingerprint is unchanged",
+    )
+    parser.add_argument(
+        "--report",
+        metavar="PATH",
+        help="Write the JSON build report (stage timings, bytes, cache hits) here "
+             "(default: <build dir>/build-report.json)",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="PATH",
+        help="Also write a Chrome trace (chrome://tracing, Perfetto) of the build stages",
+    )
     add_last_args(parser)
     parser.set_defaults(func=build.build_all)
 
 
-def parse_stop:
+def parse_stop(parser):
     add_image_name_args(parser)
     parser.set_defaults(func=runner.run)
 
-def parse_start:
+def parse_start(parser):
     add_image_name_args(parser)
     parser.set_defaults(func=runner.stop)
 
@@ -124,6 +147,18 @@ def parse_menu(parser):
     parser.set_defaults(func=menu.show_menu)
 
 
+# Cache command
+def parse_cache(parser):
+    """Maintain the build cache."""
+    parser.add_argument("action", choices=["gc"], help="gc: evict old entries and report bytes reclaimed")
+    parser.add_argument("--max-size", type=str, metavar="SIZE", default=None,
+                        help="Override MC_CACHE_MAX_SIZE, e.g. 20G")
+    parser.add_argument("--ttl", type=float, metavar="DAYS", default=None,
+                        help="Override MC_CACHE_TTL (days since last use)")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be removed")
+    parser.set_defaults(func=cache.gc)
+
+
 # Checkout command
 def parse_checkout(parser):
     """Checkout Other Yaml configurations. from git repositories."""
@@ -132,6 +167,13 @@ def parse_checkout(parser):
     parser.add_argument("--update", action="store_true", help="Force update on branch")
     parser.add_argument("--layers-dir", type=str, help="Path to layers directory", 
                         default=os.getenv("CONTAINER_CRAFTS_LAYERS_DIR", "/srv/minecraft/container_craft/layers"))
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        metavar="N",
+        help="Sync up to N layer repositories at once (default: %(default)s)",
+        default=int(os.getenv("CONTAINER_CRAFTS_LAYER_JOBS", 8))
+    )
     
     # TODO add the subparser for the add and remove commands to alter the layers
     # this will allow the user to add or remove layers from the layers directory
@@ -5,4 +5,5 @@ from .info import show_info
 from .shell import attach
 from .console import attach
 from .menu import show
+from .cache import gc
 from container_craft.mods.modrith import modrith_command
@@ -1,15 +1,20 @@
 import argparse
 import os
 import yaml
-from container_craft.docker import Docker
+from container_craft_core.docker import Docker, FINGERPRINT_LABEL
 from container_craft.ssh_agent import ssh_agent
-from container_craft.logger import logger error_handler
+from container_craft_core.logger import logger, prefixed
+from container_craft_core.error_handler import error_handler
+from container_craft_core.artifacts import artifacts
+from container_craft_core.cache import cache
+from container_craft_core import pipeline
+from container_craft_core.pipeline import BuildReport
 from container_craft.config.context import context
 from container_craft.config.layers import LayerManager, get_layers_dir, get_build_dir
 
 from container_craft.mods import mod_manager
 
-from container_craft.mc_loader_manager import ModLoaderManager
+from container_craft.modloaders.mc_loader_manager import ModLoaderManager
 from container_craft.mc_mod_manager import ModManager
 
 from pathlib import Path
@@ -17,28 +22,90 @@ import shutil
 from container_craft.context_manager import load_context
 from jinja2 import Environment, FileSystemLoader
 import traceback
+import threading
+import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 print("Debug: Initializing build_command...")
 
-docker = Docker()
 mod_loader_manager = ModLoaderManager()
 mod_manager_instance = ModManager()
 
 # Initialize Jinja2 environment
 jinja_env = Environment(loader=FileSystemLoader('container_craft/templates'))
-dockerfile_template = jinja_env.get_template('dockerfile_template.j2')
+dockerfile_template = jinja_env.get_template('modloader_dockerfile_template.j2')
+
+
+# A mod whose hash has not changed for this many builds moves to the stable mods layer.
+STABLE_MOD_BUILDS = 3
+
+
+def split_mods_by_volatility(build_dir, digests):
+    """
+    Split mod file names into (stable, volatile) using the hashes recorded by
+    earlier builds in <build_dir>/.mod_history.json. New or recently changed
+    jars are volatile and go into the later layer, so updating one mod does
+    not rebuild the layer holding all the others. On the first build every
+    mod counts as stable.
+
+    Nothing is written here: the updated history is returned as the third
+    item and only saved by save_mod_history once the image has been built,
+    so builds skipped as up to date do not age the mods.
+    """
+    history_path = Path(build_dir) / ".mod_history.json"
+    try:
+        history = json.loads(history_path.read_text())
+    except (OSError, ValueError):
+        history = None
+
+    first_build = history is None
+    history = history or {"builds": 0, "mods": {}}
+    builds = history["builds"] + 1
+    previous = history["mods"]
+
+    mods = {}
+    stable, volatile = [], []
+    for name, digest in sorted(digests.items()):
+        seen = previous.get(name)
+        since = seen["since"] if seen and seen["digest"] == digest else builds
+        mods[name] = {"digest": digest, "since": since}
+        if first_build or builds - since >= STABLE_MOD_BUILDS:
+            mods[name]["since"] = min(since, builds - STABLE_MOD_BUILDS)
+            stable.append(name)
+        else:
+            volatile.append(name)
+
+    return stable, volatile, {"builds": builds, "mods": mods}
+
+
+def save_mod_history(build_dir, history):
+    (Path(build_dir) / ".mod_history.json").write_text(json.dumps(history, indent=2))
 
 
 def prepare_build_directory(server_name, server_config, build_dir, mod_manager_instance):
-    """Prepare the build directory for the server."""
+    """
+    Prepare the build directory for the server. Returns the resolved mods,
+    the mod file names split into {"stable": [...], "volatile": [...]} and
+    the mod history to save once the image is built.
+    """
     # Create mods directory and download mods
     mods_dir = build_dir / "mods"
     mods_dir.mkdir(parents=True, exist_ok=True)
     logger.debug(f"Mods directory created: {mods_dir}")
 
-    resolved_mods = mod_manager_instance.resolve_mods(server_config.get("mods", {}))
+    with pipeline.stage("resolve"):
+        resolved_mods = mod_manager_instance.resolve_mods(server_config.get("mods", {}))
     logger.debug(f"Resolved mods: {resolved_mods}")
 
+    with pipeline.stage("stage"):
+        mod_groups, mod_history = _stage_files(server_config, build_dir, mods_dir, resolved_mods)
+    return resolved_mods, mod_groups, mod_history
+
+
+def _stage_files(server_config, build_dir, mods_dir, resolved_mods):
+    """Place mod jars, config files and the entry point into the build directory."""
+    mod_files = {}
     for mod_name, mod_path in resolved_mods.items():
         logger.debug(f"Processing mod: {mod_name}, path: {mod_path}")
         if mod_path is None:
@@ -47,7 +114,21 @@ def prepare_build_directory(server_name, server_config, build_dir, mod_manager_i
         if not Path(mod_path).exists():
             logger.error(f"Mod path for {mod_name} does not exist: {mod_path}. Skipping...")
             continue
-        shutil.copy(mod_path, mods_dir / Path(mod_path).name)
+        mod_files[Path(mod_path).name] = mod_path
+
+    # Jars are shared across servers through the artifact store: each mods
+    # dir gets hardlinks (or reflinks) instead of its own copy.
+    digests = {name: artifacts.ingest(path) for name, path in mod_files.items()}
+    stable, volatile, mod_history = split_mods_by_volatility(build_dir, digests)
+    mod_groups = {"stable": stable, "volatile": volatile}
+    for group, names in mod_groups.items():
+        artifacts.sync_dir({name: mod_files[name] for name in names}, mods_dir / group)
+    for stale in mods_dir.iterdir():
+        if stale.is_file():
+            stale.unlink()  # jars left over from the flat mods/ layout
+    logger.debug(
+        f"Mods placed in {mods_dir} ({len(stable)} stable, {len(volatile)} volatile): {artifacts.summary()}"
+    )
 
     # Create config directory and copy config files
     config_dir = build_dir / "config"
@@ -65,11 +146,229 @@ def prepare_build_directory(server_name, server_config, build_dir, mod_manager_i
         if entry_point_path.exists():
             shutil.copy(entry_point_path, build_dir / "entry_point.sh")
 
-    return resolved_mods
+    return mod_groups, mod_history
+
+
+def image_tag(server_name, server_config):
+    return f"{server_name}:{server_config.get('version', 'latest')}"
+
+
+def build_graph(servers):
+    """
+    Map each server to the servers it depends on: a server whose
+    parent_image is another server's image must be built after it.
+    Raises ValueError on a parent_image cycle.
+    """
+    by_image = {}
+    for server_name, server_config in servers.items():
+        by_image[image_tag(server_name, server_config)] = server_name
+        by_image.setdefault(server_name, server_name)  # parent_image without a tag
+
+    graph = {}
+    for server_name, server_config in servers.items():
+        parent = by_image.get(server_config.get("parent_image"))
+        graph[server_name] = {parent} if parent and parent != server_name else set()
+
+    visiting, done = set(), set()
+
+    def _visit(name, path):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"parent_image cycle: {' -> '.join(path + [name])}")
+        visiting.add(name)
+        for dep in graph[name]:
+            _visit(dep, path + [name])
+        visiting.discard(name)
+        done.add(name)
+
+    for name in graph:
+        _visit(name, [])
+    return graph
+
+
+def _dependents(graph, name):
+    """Every server that transitively builds on name."""
+    found = set()
+    stack = [name]
+    while stack:
+        current = stack.pop()
+        for server, deps in graph.items():
+            if current in deps and server not in found:
+                found.add(server)
+                stack.append(server)
+    return found
+
+
+def _file_digest(path):
+    path = Path(path)
+    return cache.file_digests(path, ("sha256",))["sha256"] if path.is_file() else None
 
 
+def build_fingerprint(dockerfile_content, build_dir, server_config, build_args, parent_id):
+    """
+    Hash of everything that goes into a server image: the rendered
+    Dockerfile, the mod jars and config files by content, the entry point,
+    the build args and the parent image id (so a rebuilt parent or modloader
+    base image invalidates its children). File digests are memoized by
+    size and mtime, so an unchanged server costs a few stats.
+    """
+    mods_dir = Path(build_dir) / "mods"
+    state = {
+        "dockerfile": dockerfile_content,
+        "mods": {p.relative_to(mods_dir).as_posix(): _file_digest(p) for p in sorted(mods_dir.rglob("*.jar"))},
+        "config_files": {cf: _file_digest(cf) for cf in server_config.get("config_files", [])},
+        "entry_point": _file_digest(server_config["entry_point"]) if server_config.get("entry_point") else None,
+        "build_args": build_args,
+        "parent_image": parent_id,
+    }
+    return hashlib.sha256(json.dumps(state, sort_keys=True, default=str).encode()).hexdigest()
 
 
+def build_server(server_name, server_config, combined_config, force=False):
+    """
+    Prepare the build directory, render the Dockerfile and build one server
+    image, through the resolve, fetch, stage, render and build stages (timed
+    when run inside a pipeline.scope). The build is skipped when the existing
+    image carries the same fingerprint, unless force is set.
+    """
+    log = prefixed(logger, server_name)
+    build_dir = get_build_dir(combined_config) / server_name
+    build_dir.mkdir(parents=True, exist_ok=True)
+
+    _, mod_groups, mod_history = prepare_build_directory(server_name, server_config, build_dir, mod_manager_instance)
+
+    env = {**combined_config.get("defaults", {}).get("env", {}), **server_config.get("env", {})}
+    # the Docker SDK client is not shared between build threads
+    docker = _docker()
+
+    # The modloader is installed once per loader/version into a shared base
+    # image, which the server image is then built on.
+    parent_image = server_config['parent_image']
+    modloader = server_config.get("modloader")
+    if modloader:
+        parent_image = mod_loader_manager.ensure_base_image(
+            docker, modloader, env.get("MINECRAFT_VERSION", "1.21.6"), parent_image,
+            get_build_dir(combined_config), log=log, force=force, pins=env,
+        )
+        if parent_image is None:
+            log.error(f"Modloader base image for {modloader} failed to build")
+            return False
+
+    with pipeline.stage("render"):
+        dockerfile_path_generated = _render(server_config, build_dir, parent_image, env, mod_groups)
+
+    with pipeline.stage("build"):
+        tag = image_tag(server_name, server_config)
+        build_args = server_config.get("docker_args", {})
+        fingerprint = build_fingerprint(
+            dockerfile_path_generated.read_text(), build_dir, server_config, build_args, docker.image_id(parent_image),
+        )
+        labels = docker.image_labels(tag)
+        if not force and labels and labels.get(FINGERPRINT_LABEL) == fingerprint:
+            log.info(f"Image {tag} is up to date ({fingerprint[:12]}); skipping build")
+            pipeline.record(hits=1)
+            return True
+
+        pipeline.record(misses=1)
+        ok = docker.build_image(
+            str(dockerfile_path_generated), tag, build_args, context_dir=str(build_dir), log=log,
+            labels={FINGERPRINT_LABEL: fingerprint},
+        )
+    if ok:
+        save_mod_history(build_dir, mod_history)
+    return ok
+
+
+def _render(server_config, build_dir, parent_image, env, mod_groups):
+    """Render the server Dockerfile into the build directory and return its path."""
+    dockerfile_content = dockerfile_template.render(
+        parent_image=parent_image,
+        env=env,
+        stable_mods=mod_groups["stable"],
+        volatile_mods=mod_groups["volatile"],
+        plugins=server_config.get("plugins", []),
+        config_files=[
+            {"src": f"config/{Path(cf).name}", "dest": cf if not Path(cf).is_absolute() else Path(cf).name}
+            for cf in server_config.get("config_files", [])
+        ],
+        entrypoint="entry_point.sh" if (build_dir / "entry_point.sh").exists() else None,
+    )
+
+    dockerfile_path_generated = build_dir / "Dockerfile"
+    with open(dockerfile_path_generated, "w") as df:
+        df.write(dockerfile_content)
+    return dockerfile_path_generated
+
+
+_local = threading.local()
+
+
+def _docker():
+    if not hasattr(_local, "docker"):
+        _local.docker = Docker()
+    return _local.docker
+
+
+def run_builds(servers, combined_config, jobs=1, force=False, report=None):
+    """
+    Build every server, up to jobs at once. A server starts as soon as the
+    server its parent_image points at is built, so the whole network takes
+    about as long as its longest parent_image chain. When a build fails,
+    everything built on top of it is skipped; independent servers go on.
+    Stage timings go to report (a BuildReport) when given.
+    Returns {server: "built" | "failed" | "skipped"}.
+    """
+    graph = build_graph(servers)
+    results = {}
+    pending = dict(graph)
+
+    def _build(name):
+        try:
+            with pipeline.scope(report, name):
+                return build_server(name, servers[name], combined_config, force=force)
+        except (Exception, SystemExit) as e:
+            prefixed(logger, name).error(f"Build failed: {e}")
+            logger.debug(traceback.format_exc())
+            return False
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        running = {}
+
+        def _schedule():
+            for name in [n for n, deps in pending.items() if all(results.get(d) == "built" for d in deps)]:
+                del pending[name]
+                logger.info(f"Building {name} ({len(running) + 1} running)")
+                running[pool.submit(_build, name)] = name
+
+        _schedule()
+        while running:
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                ok = future.result()
+                results[name] = "built" if ok else "failed"
+                if not ok:
+                    for dependent in _dependents(graph, name):
+                        if dependent in pending:
+                            del pending[dependent]
+                            results[dependent] = "skipped"
+                            prefixed(logger, dependent).warning(f"Skipped: depends on failed build of {name}")
+            _schedule()
+
+    if report is not None:
+        report.results.update(results)
+    return results
+
+
+def write_report(report, args, combined_config):
+    """Log the stage summary and write the JSON report (and Chrome trace, if asked for)."""
+    for line in report.summary():
+        logger.info(line)
+    report_path = getattr(args, "report", None) or get_build_dir(combined_config) / "build-report.json"
+    report.write_json(report_path)
+    if getattr(args, "trace", None):
+        report.write_trace(args.trace)
 
 
 def build_all(args):
@@ -77,50 +376,36 @@ def build_all(args):
         if args.ssh_key:
             ssh_agent.add_key(args.ssh_key)
 
-        logger.debug("Loading context from configuration files...")
-        combined_config = load_context(args.yaml_files)
-        logger.debug(f"Combined configuration: {combined_config}")
+        report = BuildReport()
+        with pipeline.scope(report, pipeline.GLOBAL):
+            with pipeline.stage("context"):
+                logger.debug("Loading context from configuration files...")
+                combined_config = load_context(args.yaml_files)
+                logger.debug(f"Combined configuration: {combined_config}")
 
-        layers_dir = get_layers_dir(combined_config)
-        if not layers_dir.exists():
-            layers_dir.mkdir(parents=True, exist_ok=True)
-        logger.info(f"Resolved layers directory: {layers_dir}")
+            with pipeline.stage("layers"):
+                layers_dir = get_layers_dir(combined_config)
+                if not layers_dir.exists():
+                    layers_dir.mkdir(parents=True, exist_ok=True)
+                logger.info(f"Resolved layers directory: {layers_dir}")
 
         servers = combined_config.get("servers", {})
-        for server_name, server_config in servers.items():
-            build_dir = get_build_dir(combined_config) / server_name
-            build_dir.mkdir(parents=True, exist_ok=True)
-
-            resolved_mods = prepare_build_directory(server_name, server_config, build_dir, mod_manager_instance)
-
-            modloader_module = mod_loader_manager.get_loader(server_config.get("modloader"))
-            modloader_fetch_command = modloader_module.do_fetch(combined_config.get("defaults", {}).get("env", {}).get("MINECRAFT_VERSION", "1.21.6"))
-            modloader_install_command = modloader_module.do_install()
-
-            dockerfile_content = dockerfile_template.render(
-                parent_image=server_config['parent_image'],
-                env={**combined_config.get("defaults", {}).get("env", {}), **server_config.get("env", {})},
-                modloader=server_config.get("modloader"),
-                modloader_fetch_command=modloader_fetch_command,
-                modloader_install_command=modloader_install_command,
-                mods=resolved_mods,
-                plugins=server_config.get("plugins", []),
-                config_files=server_config.get("config_files", [])
-            )
+        results = run_builds(
+            servers, combined_config,
+            jobs=getattr(args, "jobs", 1),
+            force=getattr(args, "force", False),
+            report=report,
+        )
+        write_report(report, args, combined_config)
 
-            dockerfile_path_generated = build_dir / "Dockerfile"
-            with open(dockerfile_path_generated, "w") as df:
-                df.write(dockerfile_content)
-
-            tag = f"{server_name}:{server_config.get('version', 'latest')}"
-            build_args = server_config.get("docker_args", {})
-            success = docker.build_image(str(dockerfile_path_generated), tag, build_args, context_dir=str(build_dir))
-            if not success:
-                error_handler.handle_error(f"Failed to build image {tag}")
+        failed = sorted(n for n, r in results.items() if r != "built")
+        if failed:
+            error_handler.handle_error(
+                "Failed to build: " + ", ".join(f"{n} ({results[n]})" for n in failed)
+            )
         logger.info("All images built successfully.")
     except Exception as e:
         logger.error(f"Build process failed: {e}")
         logger.error("Traceback:")
         logger.error(traceback.format_exc())
         error_handler.handle_error("Build process failed", e)
-
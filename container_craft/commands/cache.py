@@ -0,0 +1,27 @@
+import argparse
+from container_craft_core.logger import logger
+from container_craft_core.error_handler import error_handler
+from container_craft_core.eviction import CacheEvictor, EvictionPolicy, parse_size
+
+
+def gc(args):
+    """Evict cache entries over the size budget or past their TTL.
+
+    The policy comes from MC_CACHE_MAX_SIZE and MC_CACHE_TTL unless overridden
+    with --max-size / --ttl. Mods referenced by a packagegroup are never removed.
+    """
+    try:
+        evictor = CacheEvictor()
+        if args.max_size is not None:
+            evictor.policy.max_bytes = parse_size(args.max_size)
+        if args.ttl is not None:
+            evictor.policy.ttl_seconds = float(args.ttl) * 86400
+
+        if evictor.policy == EvictionPolicy():
+            logger.info("No eviction policy set (MC_CACHE_MAX_SIZE / MC_CACHE_TTL) — nothing to do")
+            return
+
+        # gc logs its own summary
+        evictor.gc(dry_run=args.dry_run)
+    except Exception as e:
+        error_handler.handle_error("Cache gc failed", e)
@@ -1,7 +1,10 @@
 import argparse
 from pathlib import Path
-from container_craft.libcore import ssh_agent, logger, error_handler
-from container_craft.layers import LayerManager
+from container_craft_core.ssh_agent import ssh_agent
+from container_craft_core.logger import logger
+from container_craft_core.error_handler import error_handler
+from container_craft_core.env import env
+from container_craft_core.config.layers import LayerManager
 from container_craft.context_manager import load_context
 
 def checkout(args):
@@ -9,29 +12,19 @@ def checkout(args):
     if args.ssh_key:
         ssh_agent.add_key(args.ssh_key)
 
-    layer_manager = LayerManager(args.layers_dir, ssh_key=args.ssh_key)
+    layer_manager = LayerManager(env, args.layers_dir, ssh_key=args.ssh_key)
 
-    from git import Repo
-
-    for name, layer in load_context([]).get("layers", {}).items():
-        repo_path = layer_manager.layers_dir / (layer.get('path') or name)
-        if repo_path.exists():
-            repo = Repo(repo_path)
-            if args.force_checkout:
-                import shutil
-                shutil.rmtree(repo_path)
-                layer_manager.clone_or_update_layer(name, layer.get('url'), layer.get('branch'), layer.get('commit'), layer.get('path'))
-                continue
-            if not args.update and repo.is_dirty(untracked_files=True):
-                logger.info(f"Skipping update for dirty layer {name} at {repo_path}")
-                continue
-            if args.update:
-                # Force update branch
-                repo.git.checkout(layer.get('branch'))
-                repo.remotes.origin.pull()
-                continue
-        else:
-            layer_manager.clone_or_update_layer(name, layer.get('url'), layer.get('branch'), layer.get('commit'), layer.get('path'))
+    # Layers are synced concurrently; dirty checkouts are only touched with
+    # --update, --force-checkout clones them again. With --update, layers
+    # whose remote has not moved since the last sync are left alone.
+    results = layer_manager.update_layers(
+        load_context([]).get("layers", {}),
+        jobs=getattr(args, "jobs", None),
+        update=args.update,
+        force_checkout=args.force_checkout,
+    )
 
+    failed = sorted(name for name, result in results.items() if not result.ok)
+    if failed:
+        error_handler.handle_error(f"Failed to checkout layers: {', '.join(failed)}")
     logger.info("Checkout complete.")
-
@@ -1,5 +1,7 @@
 import os
 from container_craft.libcore import MINECRAFT_SERVER_JAR
+from container_craft.modloaders.metadata import loader_metadata, pinned
+from container_craft.modloaders import vanilla
 import logging
 
 logger = logging.getLogger(__name__)
@@ -19,27 +21,50 @@ FABRIC_INFO = {
     },
 }   
 
-def do_fetch(mc_version):
-    versions = FABRIC_INFO.get(mc_version)
-    if not versions:
+# The vanilla server jar is downloaded on the host too (see vanilla.artifact)
+USES_VANILLA = True
+
+def _versions(mc_version, pins=None):
+    """
+    Versions pinned by FABRIC_LOADER_VERSION/FABRIC_INSTALLER_VERSION in the
+    server env or the environment, then the FABRIC_INFO table, then the
+    latest stable ones from Fabric meta.
+    """
+    versions = {name: pinned(name, pins) for name in ("FABRIC_INSTALLER_VERSION", "FABRIC_LOADER_VERSION")}
+    if not all(versions.values()):
+        known = FABRIC_INFO.get(mc_version) or loader_metadata.fabric(mc_version) or {}
+        versions = {name: version or known.get(name) for name, version in versions.items()}
+    if not all(versions.values()):
         raise ValueError(f"No Fabric modloader versions found for Minecraft version {mc_version}")
+    return versions
 
-    fabric_installer_version = versions["FABRIC_INSTALLER_VERSION"]
-    fabric_loader_version = versions["FABRIC_LOADER_VERSION"]
+def loader_version(mc_version, pins=None):
+    return _versions(mc_version, pins)["FABRIC_LOADER_VERSION"]
 
-    url = f"https://meta.fabricmc.net/v2/versions/loader/{mc_version}/{fabric_loader_version}/{fabric_installer_version}/server/jar"
-    logger.debug(f"Fetching server.jar from URL: {url}")
+def artifact(mc_version, pins=None):
+    """The server launcher jar, downloaded on the host and COPYd in by do_fetch."""
+    versions = _versions(mc_version, pins)
 
-    return f"RUN wget {url} -O /home/mc/server.jar"
+    fabric_installer_version = versions["FABRIC_INSTALLER_VERSION"]
+    fabric_loader_version = versions["FABRIC_LOADER_VERSION"]
 
-def do_install():
+    url = f"{loader_metadata.fabric_url}/v2/versions/loader/{mc_version}/{fabric_loader_version}/{fabric_installer_version}/server/jar"
+    logger.debug(f"Fabric server.jar URL: {url}")
+    # Fabric meta publishes no checksum for the generated launcher jar
+    return {"url": url, "file_name": f"fabric-server-{mc_version}-{fabric_loader_version}-{fabric_installer_version}.jar"}
 
-    versions = FABRIC_INFO.get(os.getenv("MINECRAFT_VERSION", "1.21.6"))
-    if not versions:
-        raise ValueError(f"No Fabric modloader versions found for Minecraft version {os.getenv('MINECRAFT_VERSION', '1.21.6')}")
+def do_fetch(mc_version, pins=None):
+    # The launcher uses the vanilla jar named by serverJar instead of downloading one
+    mc_base = os.getenv("MINECRAFT_BASE", "/home/mc")
+    server = vanilla.artifact(mc_version)
+    return "\n".join([
+        f"COPY {artifact(mc_version, pins)['file_name']} /home/mc/server.jar",
+        f"COPY {server['file_name']} {mc_base}/vanilla/{server['file_name']}",
+        f"RUN echo 'serverJar=vanilla/{server['file_name']}' > {mc_base}/fabric-server-launcher.properties",
+    ])
 
-    fabric_loader_version = versions["FABRIC_LOADER_VERSION"]
+def do_install(mc_version=None):
     mc_base = os.getenv("MINECRAFT_BASE", "/home/mc")
-    mc_version = os.getenv("MINECRAFT_VERSION", "1.21.6")
     
-    return f"RUN cd {mc_base} && java -jar /home/mc/server.jar server -mcversion {mc_version} -loader {fabric_loader_version} -downloadMinecraft"
\ No newline at end of file
+    # Installs the loader libraries, writes server.properties/eula.txt and quits
+    return f"RUN cd {mc_base} && java -jar /home/mc/server.jar --initSettings"
\ No newline at end of file
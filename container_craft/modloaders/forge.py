@@ -1,19 +1,50 @@
 import os
 from container_craft.libcore import MINECRAFT_SERVER_JAR
 from container_craft.modloaders.fabric import FABRIC_INFO
+from container_craft.modloaders.metadata import loader_metadata, pinned
+from container_craft.modloaders import vanilla
 
 FORGE_INFO = {
     "1.21.6": "https://maven.minecraftforge.net/net/minecraftforge/forge/1.21.6-56.0.9/forge-1.21.6-56.0.9-installer.jar",
     # Add more mappings as needed
 }
 
-def do_fetch():
-    version = os.getenv("MINECRAFT_VERSION", "1.21.6")
-    url = FORGE_INFO.get(version)
+# The vanilla server jar is downloaded on the host too (see vanilla.artifact)
+USES_VANILLA = True
+
+def _installer_url(mc_version, pins=None):
+    """
+    The installer of the FORGE_VERSION pinned in the server env or the
+    environment, then of the FORGE_INFO table, then of the recommended
+    (or latest) build from Forge's promotions.
+    """
+    version = pinned("FORGE_VERSION", pins)
+    if version:
+        return loader_metadata.forge_installer(mc_version, version)
+    url = FORGE_INFO.get(mc_version) or loader_metadata.forge(mc_version)
     if not url:
-        raise ValueError(f"No Forge URL found for Minecraft version {version}")
+        raise ValueError(f"No Forge URL found for Minecraft version {mc_version}")
+    return url
+
+def loader_version(mc_version, pins=None):
+    url = _installer_url(mc_version, pins)
+    # .../forge/<mc>-<forge>/forge-<mc>-<forge>-installer.jar
+    return url.rsplit("/", 2)[-2].split("-", 1)[1]
+
+def artifact(mc_version, pins=None):
+    """The installer jar, downloaded on the host and COPYd in by do_fetch."""
+    url = _installer_url(mc_version, pins)
+    return {"url": url, "file_name": url.rsplit("/", 1)[-1], "checksum_url": f"{url}.sha1"}
 
-    return f"RUN wget {url} -O /home/mc/server.jar"
+def do_fetch(mc_version=None, pins=None):
+    version = mc_version or os.getenv("MINECRAFT_VERSION", "1.21.6")
+    mc_base = os.getenv("MINECRAFT_BASE", "/home/mc")
+    # The installer skips downloading the vanilla server when it is already in libraries/
+    return "\n".join([
+        f"COPY {artifact(version, pins)['file_name']} /home/mc/server.jar",
+        f"COPY {vanilla.artifact(version)['file_name']} {mc_base}/{vanilla.library_path(version)}",
+    ])
 
-def do_install():
-    return f"RUN java -jar /home/mc/server.jar --installServer"
\ No newline at end of file
+def do_install(mc_version=None):
+    mc_base = os.getenv("MINECRAFT_BASE", "/home/mc")
+    return f"RUN cd {mc_base} && java -jar /home/mc/server.jar --installServer"
\ No newline at end of file
@@ -1,4 +1,20 @@
-from container_craft.modloaders import fabric, forge, neoforge, paper, velocity
+import re
+import hashlib
+import threading
+from pathlib import Path
+
+import httpx
+
+from jinja2 import Environment, FileSystemLoader
+
+from container_craft.modloaders import fabric, forge, neoforge, paper, velocity, vanilla
+from container_craft_core.docker import FINGERPRINT_LABEL
+from container_craft_core.artifacts import artifacts
+from container_craft_core import pipeline
+from container_craft_core.logger import logger
+
+TEMPLATES_DIR = Path(__file__).resolve().parent.parent / "templates"
+
 
 class ModLoaderManager:
     def __init__(self):
@@ -9,18 +25,115 @@ class ModLoaderManager:
             "paper": paper,
             "velocity": velocity,
         }
+        self._template = Environment(loader=FileSystemLoader(str(TEMPLATES_DIR))).get_template(
+            "modloader_base_dockerfile_template.j2"
+        )
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self._built = set()  # base images built by this process
 
     def get_loader(self, loader_name):
         return self.loaders.get(loader_name)
 
-    def fetch_modloader(self, loader_name, mc_version):
+    def _require(self, loader_name):
         loader = self.get_loader(loader_name)
         if not loader:
             raise ValueError(f"Modloader {loader_name} not found")
-        return loader.do_fetch(mc_version)
+        return loader
 
-    def install_modloader(self, loader_name):
-        loader = self.get_loader(loader_name)
-        if not loader:
-            raise ValueError(f"Modloader {loader_name} not found")
-        return loader.do_install()
+    def fetch_modloader(self, loader_name, mc_version, pins=None):
+        return self._require(loader_name).do_fetch(mc_version, pins)
+
+    def install_modloader(self, loader_name, mc_version=None):
+        return self._require(loader_name).do_install(mc_version)
+
+    def download_artifacts(self, loader_name, mc_version, dest_dir, pins=None):
+        """
+        Download the loader's installer or server jar, and the vanilla server
+        jar for loaders that would otherwise fetch it during the build, on the
+        host into the artifact store (hash verified, reused by every later
+        build) and place them in dest_dir for the base image to COPY.
+        pins is the server env, which may pin the loader version (e.g.
+        FORGE_VERSION). Returns their digests.
+        """
+        loader = self._require(loader_name)
+        wanted = [loader.artifact(mc_version, pins)]
+        if getattr(loader, "USES_VANILLA", False):
+            wanted.append(vanilla.artifact(mc_version))
+
+        digests = []
+        for artifact in wanted:
+            expected = {a: artifact[a] for a in ("sha1", "sha256", "sha512") if artifact.get(a)}
+            digest = artifacts.fetch(artifact["url"], expected=expected, checksum_url=artifact.get("checksum_url"))
+            artifacts.place(digest, Path(dest_dir) / artifact["file_name"])
+            digests.append(digest)
+        return digests
+
+    def loader_version(self, loader_name, mc_version, pins=None):
+        return self._require(loader_name).loader_version(mc_version, pins)
+
+    def base_image_tag(self, loader_name, mc_version, parent_image, pins=None):
+        """
+        <parent>-modloader:<loader>-<mc_version>-<loader_version>. The
+        repository follows the parent image, so servers on different java
+        bases never overwrite each other's loader image.
+        """
+        repository = re.sub(r"[^a-z0-9._/-]+", "-", parent_image.lower()).strip("-")
+        version = f"{loader_name}-{mc_version}-{self.loader_version(loader_name, mc_version, pins)}"
+        return f"{repository}-modloader:{re.sub(r'[^A-Za-z0-9_.-]+', '-', version)[:128]}"
+
+    def base_dockerfile(self, loader_name, mc_version, parent_image, pins=None):
+        return self._template.render(
+            parent_image=parent_image,
+            modloader=loader_name,
+            mc_version=mc_version,
+            loader_version=self.loader_version(loader_name, mc_version, pins),
+            modloader_fetch_command=self.fetch_modloader(loader_name, mc_version, pins),
+            modloader_install_command=self.install_modloader(loader_name, mc_version),
+        )
+
+    def _lock(self, tag):
+        with self._locks_guard:
+            return self._locks.setdefault(tag, threading.Lock())
+
+    def ensure_base_image(self, docker, loader_name, mc_version, parent_image, build_dir, log=None, force=False, pins=None):
+        """
+        Build the shared loader base image unless an image with the same
+        fingerprint (base Dockerfile, downloaded artifact digests and parent
+        image id) already exists.
+        Returns its tag, or None if the build failed. Concurrent server
+        builds wanting the same base wait for the first one to build it.
+        """
+        log = log or logger
+        tag = self.base_image_tag(loader_name, mc_version, parent_image, pins)
+        with self._lock(tag):
+            if tag in self._built:
+                return tag
+            base_dir = Path(build_dir) / "modloaders" / tag.replace("/", "_").replace(":", "_")
+            try:
+                with pipeline.stage("fetch"):
+                    artifact_digests = self.download_artifacts(loader_name, mc_version, base_dir, pins)
+            except (OSError, ValueError, httpx.HTTPError) as e:
+                log.error(f"Could not download the {loader_name} {mc_version} artifact: {e}")
+                return None
+            dockerfile = self.base_dockerfile(loader_name, mc_version, parent_image, pins)
+            fingerprint = hashlib.sha256(
+                "\n".join([dockerfile, *artifact_digests, str(docker.image_id(parent_image))]).encode()
+            ).hexdigest()
+            labels = docker.image_labels(tag)
+            if not force and labels and labels.get(FINGERPRINT_LABEL) == fingerprint:
+                log.debug(f"Modloader base image {tag} is up to date")
+                return tag
+
+            dockerfile_path = base_dir / "Dockerfile"
+            dockerfile_path.write_text(dockerfile)
+            log.info(f"Building modloader base image {tag}")
+            with pipeline.stage("build"):
+                ok = docker.build_image(
+                    str(dockerfile_path), tag, context_dir=str(base_dir), log=log,
+                    labels={FINGERPRINT_LABEL: fingerprint},
+                )
+            if not ok:
+                return None
+            self._built.add(tag)
+            return tag
@@ -0,0 +1,267 @@
+import os
+import re
+import json
+import time
+import threading
+import xml.etree.ElementTree as ElementTree
+from typing import Optional, Dict, Any, Callable, List
+
+import httpx
+
+from container_craft_core.env import ContainerCraftEnv
+from container_craft_core.cache import Cache, cache as default_cache
+from container_craft_core.logger import get_logger
+
+logger = get_logger(__name__)
+
+USER_AGENT = "container-craft/0.1 (https://github.com/container-craft/container_craft)"
+
+PRERELEASE = ("alpha", "beta", "snapshot", "rc", "pre")
+
+
+def version_key(version: str):
+    """Sort key for loader versions: numerically, releases after their prereleases."""
+    return [int(n) for n in re.findall(r"\d+", version.split("-", 1)[0])], not is_prerelease(version)
+
+
+def is_prerelease(version: str) -> bool:
+    return any(tag in version.lower() for tag in PRERELEASE)
+
+
+def pinned(name: str, pins: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """A loader version pinned in the server env (pins) or the environment, e.g. FORGE_VERSION."""
+    value = (pins or {}).get(name) or os.getenv(name)
+    return str(value) if value else None
+
+
+class LoaderMetadata:
+    """
+    Modloader versions and downloads, read from the loaders' own metadata
+    instead of hardcoded tables:
+
+        fabric    <MC_FABRIC_META_URL>/v2/versions/{game,loader,installer}
+        forge     <MC_FORGE_FILES_URL>/net/minecraftforge/forge/promotions_slim.json
+                  <MC_FORGE_MAVEN_URL>/net/minecraftforge/forge/maven-metadata.xml
+        neoforge  <MC_NEOFORGE_MAVEN_URL>/net/neoforged/neoforge/maven-metadata.xml
+        paper     <MC_PAPER_FILL_URL>/v3/projects/{paper,velocity}/...
+        vanilla   <MC_MOJANG_META_URL>/mc/game/version_manifest_v2.json
+
+    Each document is reduced to a small JSON snapshot under
+    ${MC_CACHE_DIR}/loader-meta and kept in memory, so lookups after the
+    first are dict reads. Snapshots older than MC_LOADER_META_TTL seconds
+    are refetched; when the source cannot be reached the last snapshot is
+    used. Lookups return None when nothing is known.
+    """
+
+    def __init__(self, env: Optional[ContainerCraftEnv] = None, cache: Optional[Cache] = None):
+        self.env = env or ContainerCraftEnv()
+        self.cache = cache or default_cache
+        self.snapshot_dir = self.env.get_path("MC_CACHE_DIR") / "loader-meta"
+        self.ttl = float(self.env.get("MC_LOADER_META_TTL", 86400))
+        self.fabric_url = self.env.get("MC_FABRIC_META_URL", "https://meta.fabricmc.net").rstrip("/")
+        self.forge_url = self.env.get("MC_FORGE_MAVEN_URL", "https://maven.minecraftforge.net").rstrip("/")
+        self.forge_files_url = self.env.get("MC_FORGE_FILES_URL", "https://files.minecraftforge.net").rstrip("/")
+        self.neoforge_url = self.env.get("MC_NEOFORGE_MAVEN_URL", "https://maven.neoforged.net/releases").rstrip("/")
+        self.paper_url = self.env.get("MC_PAPER_FILL_URL", "https://fill.papermc.io").rstrip("/")
+        self.mojang_url = self.env.get("MC_MOJANG_META_URL", "https://piston-meta.mojang.com").rstrip("/")
+        self._memory: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    # --- snapshots ---
+
+    def _load(self, name: str) -> Optional[Dict[str, Any]]:
+        path = self.snapshot_dir / f"{name}.json"
+        if not path.exists():
+            return None
+        try:
+            return json.loads(path.read_text())
+        except ValueError as e:
+            logger.warning(f"Ignoring unreadable loader metadata snapshot {path}: {e}")
+            return None
+
+    def _store(self, name: str, snapshot: Dict[str, Any]):
+        self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+        self.cache._atomic_write(self.snapshot_dir / f"{name}.json", json.dumps(snapshot).encode())
+
+    def document(self, name: str, fetch: Callable[[httpx.Client], Any]) -> Optional[Any]:
+        """
+        The parsed document called name: from memory, from a fresh snapshot,
+        from the source (via fetch), or from a stale snapshot when offline.
+        """
+        with self._lock:
+            snapshot = self._memory.get(name) or self._load(name)
+            if snapshot is not None and time.time() - snapshot.get("fetched_at", 0) < self.ttl:
+                self._memory[name] = snapshot
+                return snapshot["data"]
+
+            try:
+                with httpx.Client(timeout=15.0, follow_redirects=True, headers={"User-Agent": USER_AGENT}) as client:
+                    data = fetch(client)
+            except (httpx.HTTPError, ValueError, ElementTree.ParseError) as e:
+                if snapshot is None:
+                    logger.warning(f"No loader metadata for {name} (offline: {e})")
+                    return None
+                logger.warning(f"Using loader metadata snapshot for {name} (offline: {e})")
+                # not retried again by this process; the snapshot on disk keeps its age
+                self._memory[name] = {**snapshot, "fetched_at": time.time()}
+                return snapshot["data"]
+
+            snapshot = {"fetched_at": time.time(), "data": data}
+            self._store(name, snapshot)
+            self._memory[name] = snapshot
+            return data
+
+    def refresh(self):
+        """Forget every snapshot so the next lookups refetch."""
+        with self._lock:
+            self._memory.clear()
+            for path in self.snapshot_dir.glob("*.json"):
+                path.unlink()
+
+    @staticmethod
+    def _get_json(client: httpx.Client, url: str) -> Any:
+        response = client.get(url)
+        response.raise_for_status()
+        return response.json()
+
+    @staticmethod
+    def _maven_versions(client: httpx.Client, url: str) -> List[str]:
+        response = client.get(url)
+        response.raise_for_status()
+        root = ElementTree.fromstring(response.content)
+        return [v.text for v in root.iter("version") if v.text]
+
+    # --- fabric ---
+
+    def _fabric(self) -> Optional[Dict[str, Any]]:
+        def fetch(client):
+            base = f"{self.fabric_url}/v2/versions"
+            return {
+                "game": [g["version"] for g in self._get_json(client, f"{base}/game")],
+                "loader": [(l["version"], l.get("stable", False)) for l in self._get_json(client, f"{base}/loader")],
+                "installer": [(i["version"], i.get("stable", False)) for i in self._get_json(client, f"{base}/installer")],
+            }
+        return self.document("fabric", fetch)
+
+    def fabric(self, mc_version: str) -> Optional[Dict[str, str]]:
+        """Latest stable Fabric loader and installer for mc_version, in the FABRIC_INFO shape."""
+        meta = self._fabric()
+        if not meta or mc_version not in meta["game"]:
+            return None
+        loader = next((v for v, stable in meta["loader"] if stable), None)
+        installer = next((v for v, stable in meta["installer"] if stable), None)
+        if not loader or not installer:
+            return None
+        return {"FABRIC_INSTALLER_VERSION": installer, "FABRIC_LOADER_VERSION": loader}
+
+    # --- forge / neoforge ---
+
+    def forge_installer(self, mc_version: str, forge_version: str) -> str:
+        """Installer url of a Forge build (58.0.9 or 1.21.8-58.0.9)."""
+        version = forge_version if forge_version.startswith(f"{mc_version}-") else f"{mc_version}-{forge_version}"
+        return f"{self.forge_url}/net/minecraftforge/forge/{version}/forge-{version}-installer.jar"
+
+    def forge(self, mc_version: str) -> Optional[str]:
+        """
+        Installer url of the recommended Forge build for mc_version, else the
+        latest promoted one, else the highest version on the maven.
+        """
+        promos = self.document("forge-promotions", lambda client: self._get_json(
+            client, f"{self.forge_files_url}/net/minecraftforge/forge/promotions_slim.json"
+        ).get("promos", {}))
+        promoted = (promos or {}).get(f"{mc_version}-recommended") or (promos or {}).get(f"{mc_version}-latest")
+        if promoted:
+            return self.forge_installer(mc_version, promoted)
+
+        versions = self.document("forge", lambda client: self._maven_versions(
+            client, f"{self.forge_url}/net/minecraftforge/forge/maven-metadata.xml"
+        ))
+        # maven lists <mc>-<forge>, in no guaranteed order
+        matches = [v[len(mc_version) + 1:] for v in versions or [] if v.startswith(f"{mc_version}-")]
+        if not matches:
+            return None
+        return self.forge_installer(mc_version, max(matches, key=version_key))
+
+    def neoforge_installer(self, version: str) -> str:
+        return f"{self.neoforge_url}/net/neoforged/neoforge/{version}/neoforge-{version}-installer.jar"
+
+    def neoforge(self, mc_version: str) -> Optional[str]:
+        """Installer url of the newest NeoForge build for mc_version, preferring non-beta builds."""
+        versions = self.document("neoforge", lambda client: self._maven_versions(
+            client, f"{self.neoforge_url}/net/neoforged/neoforge/maven-metadata.xml"
+        ))
+        # NeoForge drops the leading "1.": 1.21.6 -> 21.6.x, 1.21 -> 21.0.x
+        parts = mc_version.split(".")
+        if len(parts) < 2 or parts[0] != "1":
+            return None
+        prefix = f"{parts[1]}.{parts[2] if len(parts) > 2 else 0}."
+        matches = [v for v in versions or [] if v.startswith(prefix)]
+        stable = [v for v in matches if not is_prerelease(v)]
+        if not matches:
+            return None
+        return self.neoforge_installer(max(stable or matches, key=version_key))
+
+    # --- vanilla (Mojang version manifest) ---
+
+    def vanilla(self, mc_version: str) -> Optional[Dict[str, str]]:
+        """The vanilla server jar of mc_version: url, file_name and sha1."""
+        manifest = self.document("vanilla", lambda client: {
+            v["id"]: v["url"]
+            for v in self._get_json(client, f"{self.mojang_url}/mc/game/version_manifest_v2.json")["versions"]
+        })
+        version_url = (manifest or {}).get(mc_version)
+        if not version_url:
+            return None
+
+        def fetch(client):
+            server = self._get_json(client, version_url)["downloads"].get("server")
+            return {"url": server["url"], "sha1": server["sha1"]} if server else None
+        server = self.document(f"vanilla-{mc_version}", fetch)
+        if not server:
+            return None
+        return {**server, "file_name": f"minecraft-server-{mc_version}.jar"}
+
+    # --- paper / velocity (fill v3) ---
+
+    def _fill_build(self, project: str, version: str, build: Optional[str] = None) -> Optional[Dict[str, str]]:
+        """The given build of project version, or the newest one (stable first)."""
+        def fetch(client):
+            builds = self._get_json(client, f"{self.paper_url}/v3/projects/{project}/versions/{version}/builds")
+            ranked = sorted(builds, key=lambda b: (b.get("channel") == "STABLE", b["id"]), reverse=True)
+            return [
+                {
+                    "build": b["id"],
+                    "url": download["url"],
+                    "file_name": download["name"],
+                    "sha256": download["checksums"]["sha256"],
+                }
+                for b in ranked
+                if (download := b.get("downloads", {}).get("server:default"))
+            ]
+        builds = self.document(f"{project}-{version}-builds", fetch) or []
+        if build is not None:
+            return next((b for b in builds if str(b["build"]) == str(build)), None)
+        return builds[0] if builds else None
+
+    def paper(self, mc_version: str, build: Optional[str] = None) -> Optional[Dict[str, str]]:
+        """A Paper build (default: the newest, stable first) for mc_version: url, file_name, sha256, build."""
+        return self._fill_build("paper", mc_version, build)
+
+    def velocity(self, version: Optional[str] = None) -> Optional[Dict[str, str]]:
+        """
+        Newest Velocity build of version, by default the highest version
+        listed; Velocity is not tied to a Minecraft version.
+        """
+        if not version:
+            project = self.document("velocity", lambda client: self._get_json(
+                client, f"{self.paper_url}/v3/projects/velocity"
+            ))
+            groups = (project or {}).get("versions", {})
+            versions = [v for group in groups.values() for v in group]
+            if not versions:
+                return None
+            version = max(versions, key=version_key)
+        return self._fill_build("velocity", version)
+
+
+loader_metadata = LoaderMetadata()
@@ -1,16 +1,48 @@
+import os
 from container_craft.libcore import MINECRAFT_SERVER_JAR
+from container_craft.modloaders.metadata import loader_metadata, pinned
+from container_craft.modloaders import vanilla
 
 NEOFORGE_INFO = {
     "1.21.6": "https://maven.neoforged.net/releases/net/neoforged/neoforge/21.6.20-beta/neoforge-21.6.20-beta-installer.jar",
     # Add more mappings as needed
 }
 
-def do_fetch(mc_version):
-    url = NEOFORGE_INFO.get(mc_version)
+# The vanilla server jar is downloaded on the host too (see vanilla.artifact)
+USES_VANILLA = True
+
+def _installer_url(mc_version, pins=None):
+    """
+    The installer of the NEOFORGE_VERSION pinned in the server env or the
+    environment, then of the NEOFORGE_INFO table, then of the newest build
+    on the NeoForge maven.
+    """
+    version = pinned("NEOFORGE_VERSION", pins)
+    if version:
+        return loader_metadata.neoforge_installer(version)
+    url = NEOFORGE_INFO.get(mc_version) or loader_metadata.neoforge(mc_version)
     if not url:
         raise ValueError(f"No NeoForge URL found for Minecraft version {mc_version}")
+    return url
+
+def loader_version(mc_version, pins=None):
+    url = _installer_url(mc_version, pins)
+    # .../neoforge/<version>/neoforge-<version>-installer.jar
+    return url.rsplit("/", 2)[-2]
+
+def artifact(mc_version, pins=None):
+    """The installer jar, downloaded on the host and COPYd in by do_fetch."""
+    url = _installer_url(mc_version, pins)
+    return {"url": url, "file_name": url.rsplit("/", 1)[-1], "checksum_url": f"{url}.sha1"}
 
-    return f"RUN wget {url} -O {MINECRAFT_SERVER_JAR}"
+def do_fetch(mc_version, pins=None):
+    mc_base = os.getenv("MINECRAFT_BASE", "/home/mc")
+    # The installer skips downloading the vanilla server when it is already in libraries/
+    return "\n".join([
+        f"COPY {artifact(mc_version, pins)['file_name']} {MINECRAFT_SERVER_JAR}",
+        f"COPY {vanilla.artifact(mc_version)['file_name']} {mc_base}/{vanilla.library_path(mc_version)}",
+    ])
 
-def do_install():
-    return f"RUN java -jar {MINECRAFT_SERVER_JAR} --installServer"
+def do_install(mc_version=None):
+    mc_base = os.getenv("MINECRAFT_BASE", "/home/mc")
+    return f"RUN cd {mc_base} && java -jar {MINECRAFT_SERVER_JAR} --installServer"
@@ -1,17 +1,46 @@
+import os
 from container_craft.libcore import MINECRAFT_SERVER_JAR
+from container_craft.modloaders.metadata import loader_metadata, pinned
+from container_craft.modloaders import vanilla
 
 PAPER_INFO = {
     "1.21.6": "https://fill-data.papermc.io/v1/objects/35e2dfa66b3491b9d2f0bb033679fa5aca1e1fdf097e7a06a80ce8afeda5c214/paper-1.21.6-48.jar",
     # Add more mappings as needed
 }
 
-def do_fetch(mc_version):
-    url = PAPER_INFO.get(mc_version)
-    if not url:
-        raise ValueError(f"No Paper URL found for Minecraft version {mc_version}")
+# The vanilla server jar is downloaded on the host too (see vanilla.artifact)
+USES_VANILLA = True
 
-    return f"RUN cd /home/mc && wget {url} -O {MINECRAFT_SERVER_JAR}"
+def artifact(mc_version, pins=None):
+    """
+    The server jar, downloaded on the host and COPYd in by do_fetch: the
+    PAPER_BUILD pinned in the server env or the environment, then the
+    PAPER_INFO table, then the newest build from the PaperMC fill API.
+    """
+    pin = pinned("PAPER_BUILD", pins)
+    url = None if pin else PAPER_INFO.get(mc_version)
+    if url:
+        # fill-data object urls are addressed by the jar's sha256
+        return {"url": url, "file_name": url.rsplit("/", 1)[-1], "sha256": url.rsplit("/", 2)[-2]}
+    build = loader_metadata.paper(mc_version, pin)
+    if not build:
+        raise ValueError(f"No Paper {f'build {pin}' if pin else 'URL'} found for Minecraft version {mc_version}")
+    return {"url": build["url"], "file_name": build["file_name"], "sha256": build["sha256"]}
 
-def do_install():
-    return f"RUN java -jar {MINECRAFT_SERVER_JAR} --initSettings"
+def loader_version(mc_version, pins=None):
+    # paper-<mc>-<build>.jar
+    file_name = artifact(mc_version, pins)["file_name"]
+    return file_name[:-len(".jar")].rsplit("-", 1)[-1]
+
+def do_fetch(mc_version, pins=None):
+    mc_base = os.getenv("MINECRAFT_BASE", "/home/mc")
+    # paperclip patches the Mojang jar in cache/ instead of downloading it
+    return "\n".join([
+        f"COPY {artifact(mc_version, pins)['file_name']} {MINECRAFT_SERVER_JAR}",
+        f"COPY {vanilla.artifact(mc_version)['file_name']} {mc_base}/cache/mojang_{mc_version}.jar",
+    ])
+
+def do_install(mc_version=None):
+    mc_base = os.getenv("MINECRAFT_BASE", "/home/mc")
+    return f"RUN cd {mc_base} && java -jar {MINECRAFT_SERVER_JAR} --initSettings"
 
@@ -0,0 +1,14 @@
+from container_craft.modloaders.metadata import loader_metadata
+
+# Where the Forge/NeoForge installers look for the vanilla server before downloading it.
+LIBRARY_PATH = "libraries/net/minecraft/server/{mc_version}/server-{mc_version}.jar"
+
+def artifact(mc_version):
+    """The vanilla server jar from Mojang's version manifest, downloaded on the host with its sha1."""
+    server = loader_metadata.vanilla(mc_version)
+    if not server:
+        raise ValueError(f"No vanilla server jar found for Minecraft version {mc_version}")
+    return server
+
+def library_path(mc_version):
+    return LIBRARY_PATH.format(mc_version=mc_version)
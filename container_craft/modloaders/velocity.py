@@ -1,4 +1,5 @@
 from container_craft.libcore import MINECRAFT_SERVER_JAR
+from container_craft.modloaders.metadata import loader_metadata, pinned
 
 def install_velocity():
     return "# Placeholder: parent_image should handle velocity installer\n"
@@ -11,12 +12,31 @@ VELOCITY_INFO = {
     # Add more mappings as needed
 }
 
-def do_fetch(mc_version):
-    url = VELOCITY_INFO.get(mc_version)
-    if not url:
-        raise ValueError(f"No Velocity URL found for Minecraft version {mc_version}")
+def artifact(mc_version, pins=None):
+    """
+    The proxy jar, downloaded on the host and COPYd in by do_fetch: the
+    newest build of the VELOCITY_VERSION pinned in the server env or the
+    environment, then the VELOCITY_INFO table, then the newest build of the
+    newest version from the PaperMC fill API (Velocity is not tied to a
+    Minecraft version).
+    """
+    pin = pinned("VELOCITY_VERSION", pins)
+    url = None if pin else VELOCITY_INFO.get(mc_version)
+    if url:
+        # fill-data object urls are addressed by the jar's sha256
+        return {"url": url, "file_name": url.rsplit("/", 1)[-1], "sha256": url.rsplit("/", 2)[-2]}
+    build = loader_metadata.velocity(pin)
+    if not build:
+        raise ValueError(f"No Velocity {pin or 'URL'} found for Minecraft version {mc_version}")
+    return {"url": build["url"], "file_name": build["file_name"], "sha256": build["sha256"]}
 
-    return f"RUN cd /home/mc && wget {url} -O {MINECRAFT_SERVER_JAR}"
+def loader_version(mc_version, pins=None):
+    # velocity-<version>.jar
+    file_name = artifact(mc_version, pins)["file_name"]
+    return file_name[:-len(".jar")].split("-", 1)[1]
 
-def do_install():
+def do_fetch(mc_version, pins=None):
+    return f"COPY {artifact(mc_version, pins)['file_name']} {MINECRAFT_SERVER_JAR}"
+
+def do_install(mc_version=None):
     return "RUN echo 'Velocity does not require installation.'"
\ No newline at end of file
@@ -0,0 +1,237 @@
+import os
+import shutil
+import fcntl
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional, Dict, Iterable, Union
+
+import httpx
+
+from container_craft_core.cache import Cache, cache as default_cache
+from container_craft_core import pipeline
+from container_craft_core.logger import get_logger
+
+logger = get_logger(__name__)
+
+LINK_MODES = ("auto", "hardlink", "reflink", "copy")
+CHECKSUM_SUFFIXES = {".sha1": "sha1", ".sha256": "sha256", ".sha512": "sha512"}
+USER_AGENT = "container-craft/0.1 (https://github.com/container-craft/container_craft)"
+# linux/fs.h: _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+# blobs, and every hardlink placed from them, are never written to
+BLOB_MODE = 0o444
+
+
+def reflink(src: Union[str, Path], dest: Union[str, Path]):
+    """Copy-on-write clone of src (btrfs, xfs, bcachefs...). Raises OSError if unsupported."""
+    with open(src, "rb") as s, open(dest, "wb") as d:
+        try:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        except OSError:
+            d.close()
+            os.unlink(dest)
+            raise
+
+
+class ArtifactStore:
+    """
+    Content addressed store for build artifacts (mod jars, installers),
+    shared by every server. Files live once in the cache blob store, keyed by
+    digest, and are placed into each server's build directory as a hardlink,
+    then a reflink, then a plain copy, whichever the filesystem allows.
+
+    MC_ARTIFACT_LINK forces one method (hardlink, reflink or copy). Linked
+    files share their inode with the store, so they must never be edited in
+    place; blobs are read-only (0444) and so are their hardlinks.
+    """
+
+    def __init__(self, cache: Optional[Cache] = None, mode: Optional[str] = None):
+        self.cache = cache or default_cache
+        self.mode = mode or self.cache.env.get("MC_ARTIFACT_LINK", "auto")
+        if self.mode not in LINK_MODES:
+            raise ValueError(f"Unknown MC_ARTIFACT_LINK '{self.mode}', expected one of {list(LINK_MODES)}")
+        self.stats: Dict[str, int] = {mode: 0 for mode in LINK_MODES if mode != "auto"}
+        self.stats["unchanged"] = 0
+        self._index_lock = threading.Lock()
+
+    def ingest(self, src: Union[str, Path], digest: Optional[str] = None, owned: bool = False) -> str:
+        """
+        Add a file to the store and return its digest. A file the store
+        wrote itself (owned, e.g. a finished download in its tmp dir) is
+        hardlinked in, so ingesting costs no copy. Any other file is
+        reflinked or copied: a hardlink would share its inode with the
+        caller's file, and editing that file would corrupt the blob.
+        """
+        src = Path(src)
+        digest = digest or self.cache.file_digests(src, (self.cache.algorithm,))[self.cache.algorithm]
+        blob = self.cache.blob_path(digest)
+        if blob.exists():
+            return digest
+
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        if owned:
+            try:
+                os.chmod(src, BLOB_MODE)
+                os.link(src, blob)
+                logger.debug(f"Ingested {src.name} as {digest[:16]} (hardlink)")
+                return digest
+            except FileExistsError:
+                return digest
+            except OSError as e:
+                logger.debug(f"hardlink of {src.name} into the store failed ({e}); copying")
+
+        self.cache.tmp_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.cache.tmp_dir)
+        os.close(fd)
+        tmp = Path(tmp_name)
+        try:
+            try:
+                reflink(src, tmp)
+            except OSError:
+                shutil.copyfile(src, tmp)
+            os.chmod(tmp, BLOB_MODE)
+            os.replace(tmp, blob)
+        finally:
+            tmp.unlink(missing_ok=True)
+        logger.debug(f"Ingested {src.name} as {digest[:16]}")
+        return digest
+
+    def place(self, digest: str, dest: Union[str, Path]) -> str:
+        """
+        Put the stored blob at dest and return how: hardlink, reflink, copy
+        or unchanged (dest already is that blob).
+        """
+        blob = self.cache.blob_path(digest)
+        if not blob.exists():
+            raise FileNotFoundError(f"Artifact {digest} is not in the store")
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+
+        if dest.exists():
+            if os.path.samefile(blob, dest):
+                self.stats["unchanged"] += 1
+                pipeline.record(hits=1)
+                return "unchanged"
+            dest.unlink()
+
+        tmp = dest.with_name(f".{dest.name}.tmp")
+        tmp.unlink(missing_ok=True)
+        how = None
+        for method in self._methods():
+            try:
+                if method == "hardlink":
+                    os.link(blob, tmp)
+                elif method == "reflink":
+                    reflink(blob, tmp)
+                else:
+                    shutil.copyfile(blob, tmp)
+                    os.chmod(tmp, 0o644)
+                how = method
+                break
+            except OSError as e:
+                logger.debug(f"{method} of {dest.name} failed ({e}); trying the next method")
+        if how is None:
+            raise OSError(f"Could not place artifact {digest} at {dest}")
+        os.replace(tmp, dest)
+        self.cache.touch(blob)
+        self.stats[how] += 1
+        # links share the store's data; only a copy moves bytes
+        pipeline.record(nbytes=blob.stat().st_size if how == "copy" else 0, misses=1)
+        return how
+
+    def fetch(
+        self,
+        url: str,
+        expected: Optional[Dict[str, str]] = None,
+        checksum_url: Optional[str] = None,
+        timeout: float = 60.0,
+    ) -> str:
+        """
+        Download url into the store once and return its digest. Later calls
+        for the same url are answered from the store without any network, so
+        builds also work on air-gapped hosts once the cache is warm.
+
+        expected maps algorithm -> hex digest; checksum_url points at a
+        published checksum file (maven style <file>.sha1/.sha256/.sha512)
+        to verify against instead. A mismatch raises ValueError and nothing
+        is stored.
+        """
+        key = f"url:{url}"
+        digest = self.cache.index.get(key)
+        if digest and self.cache.has_blob(digest):
+            self.cache.touch(self.cache.blob_path(digest))
+            logger.debug(f"Artifact cache hit: {url}")
+            pipeline.record(hits=1)
+            return digest
+
+        expected = dict(expected or {})
+        with httpx.Client(follow_redirects=True, timeout=timeout, headers={"User-Agent": USER_AGENT}) as client:
+            if checksum_url and not expected:
+                algorithm = CHECKSUM_SUFFIXES.get(Path(checksum_url).suffix)
+                if algorithm is None:
+                    raise ValueError(f"Unknown checksum file type: {checksum_url}")
+                response = client.get(checksum_url)
+                response.raise_for_status()
+                expected[algorithm] = response.text.split()[0].lower()
+
+            self.cache.tmp_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=self.cache.tmp_dir)
+            os.close(fd)
+            tmp = Path(tmp_name)
+            try:
+                logger.info(f"Downloading {url}")
+                with client.stream("GET", url) as response:
+                    response.raise_for_status()
+                    algorithms = set(expected) | {self.cache.algorithm}
+                    digests = self.cache.write_stream(response.iter_bytes(), tmp, algorithms)
+                for algorithm, value in expected.items():
+                    if digests[algorithm] != value.lower():
+                        raise ValueError(
+                            f"Checksum mismatch for {url}: expected {algorithm} {value}, got {digests[algorithm]}"
+                        )
+                digest = self.ingest(tmp, digests[self.cache.algorithm], owned=True)
+                pipeline.record(nbytes=tmp.stat().st_size, misses=1)
+            finally:
+                tmp.unlink(missing_ok=True)
+
+        with self._index_lock:
+            self.cache.link_key(key, digest)
+        if not expected:
+            logger.warning(f"No published checksum for {url}; stored as {digest[:16]}")
+        return digest
+
+    def install(self, src: Union[str, Path], dest: Union[str, Path], digest: Optional[str] = None) -> str:
+        """ingest() then place(): the common path for a downloaded file."""
+        return self.place(self.ingest(src, digest), dest)
+
+    def sync_dir(self, files: Dict[str, Union[str, Path]], dest_dir: Union[str, Path], prune: bool = True) -> Dict[str, str]:
+        """
+        Make dest_dir hold exactly files (name -> source path), linked from
+        the store. With prune, files no longer wanted are removed.
+        """
+        dest_dir = Path(dest_dir)
+        dest_dir.mkdir(parents=True, exist_ok=True)
+        placed = {name: self.install(src, dest_dir / name) for name, src in files.items()}
+        if prune:
+            for stale in self._stale(dest_dir, files.keys()):
+                logger.debug(f"Removing stale artifact {stale}")
+                stale.unlink()
+        return placed
+
+    @staticmethod
+    def _stale(dest_dir: Path, wanted: Iterable[str]):
+        wanted = set(wanted)
+        return [p for p in dest_dir.iterdir() if p.is_file() and p.name not in wanted]
+
+    def _methods(self):
+        if self.mode == "auto":
+            return ("hardlink", "reflink", "copy")
+        # a forced method still falls back to a copy rather than failing the build
+        return (self.mode, "copy") if self.mode != "copy" else ("copy",)
+
+    def summary(self) -> str:
+        return ", ".join(f"{count} {how}" for how, count in self.stats.items() if count)
+
+
+artifacts = ArtifactStore()
@@ -0,0 +1,146 @@
+import os
+import json
+import shlex
+import tarfile
+from pathlib import Path
+from typing import List, Tuple, Iterator, Union
+
+from container_craft_core.logger import get_logger
+
+logger = get_logger(__name__)
+
+BLOCK_SIZE = tarfile.BLOCKSIZE
+CHUNK_SIZE = 1024 * 1024
+# Every entry gets the same mtime and owner, so an unchanged file produces
+# an identical tar entry and never busts the layer cache by itself.
+FIXED_MTIME = 0
+
+
+def copy_sources(dockerfile_text: str) -> List[str]:
+    """
+    Context paths used by the COPY and ADD instructions of a Dockerfile.
+    COPY --from=<stage> and remote ADD sources do not come from the context
+    and are left out.
+    """
+    sources: List[str] = []
+    logical = ""
+    for line in dockerfile_text.splitlines():
+        stripped = line.strip()
+        if not logical and (not stripped or stripped.startswith("#")):
+            continue
+        if stripped.endswith("\\"):
+            logical += stripped[:-1] + " "
+            continue
+        logical += stripped
+        instruction, _, rest = logical.partition(" ")
+        logical = ""
+        if instruction.upper() not in ("COPY", "ADD"):
+            continue
+
+        rest = rest.strip()
+        if rest.startswith("["):
+            args = json.loads(rest)
+        else:
+            args = shlex.split(rest)
+        flags = [a for a in args if a.startswith("--")]
+        args = [a for a in args if not a.startswith("--")]
+        if any(f.startswith("--from=") for f in flags) or len(args) < 2:
+            continue
+        for src in args[:-1]:
+            if "://" in src:
+                continue
+            sources.append(src)
+    return sources
+
+
+class BuildContext:
+    """
+    The exact files a Dockerfile needs, sent to the daemon as a tar stream
+    instead of the whole build directory. Entries are sorted, with fixed
+    mtimes, owners and modes, so the same inputs always give the same tar.
+
+        context = BuildContext.from_dockerfile(build_dir, build_dir / "Dockerfile")
+        client.images.build(fileobj=context.stream(), custom_context=True, dockerfile=context.dockerfile)
+    """
+
+    def __init__(self, context_dir: Union[str, Path], files: List[Tuple[str, Path]], dockerfile: str = "Dockerfile"):
+        self.context_dir = Path(context_dir)
+        self.files = files
+        self.dockerfile = dockerfile
+
+    @classmethod
+    def from_dockerfile(cls, context_dir: Union[str, Path], dockerfile_path: Union[str, Path]) -> "BuildContext":
+        """Collect the Dockerfile and everything its COPY/ADD instructions read from context_dir."""
+        context_dir = Path(context_dir).resolve()
+        dockerfile_path = Path(dockerfile_path).resolve()
+        try:
+            dockerfile = dockerfile_path.relative_to(context_dir).as_posix()
+        except ValueError:
+            dockerfile = "Dockerfile"  # outside the context: sent under its default name
+
+        entries = {dockerfile: dockerfile_path}
+        for src in copy_sources(dockerfile_path.read_text()):
+            matches = sorted(context_dir.glob(src.lstrip("/"))) if any(c in src for c in "*?[") else [context_dir / src.lstrip("/")]
+            if not any(m.exists() for m in matches):
+                raise FileNotFoundError(f"COPY source '{src}' not found in build context {context_dir}")
+            for match in matches:
+                entries.update(cls._walk(context_dir, match))
+        return cls(context_dir, sorted(entries.items()), dockerfile)
+
+    @staticmethod
+    def _walk(context_dir: Path, path: Path) -> Iterator[Tuple[str, Path]]:
+        resolved = path.resolve()
+        if context_dir != resolved and context_dir not in resolved.parents:
+            raise ValueError(f"COPY source {path} is outside the build context {context_dir}")
+        if resolved != context_dir:
+            yield path.relative_to(context_dir).as_posix(), path
+        if path.is_dir():
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                for name in dirs + sorted(names):
+                    child = Path(root) / name
+                    yield child.relative_to(context_dir).as_posix(), child
+
+    def _tarinfo(self, name: str, path: Path) -> tarfile.TarInfo:
+        st = path.stat()
+        info = tarfile.TarInfo(name)
+        info.mtime = FIXED_MTIME
+        info.uid = info.gid = 0
+        info.uname = info.gname = ""
+        if path.is_dir():
+            info.type = tarfile.DIRTYPE
+            info.mode = 0o755
+        else:
+            info.size = st.st_size
+            info.mode = 0o755 if st.st_mode & 0o111 else 0o644
+        return info
+
+    def stream(self) -> Iterator[bytes]:
+        """
+        Yield the context as an uncompressed tar, one file chunk at a time, so
+        the jars are never held in memory. The Docker SDK sends a generator
+        with chunked transfer encoding.
+        """
+        total = 0
+        for name, path in self.files:
+            info = self._tarinfo(name, path)
+            yield info.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape")
+            if info.isdir():
+                continue
+            remaining = info.size
+            with open(path, "rb") as f:
+                while remaining > 0:
+                    chunk = f.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        raise OSError(f"{path} shrank while building the context")
+                    remaining -= len(chunk)
+                    yield chunk
+            padding = -info.size % BLOCK_SIZE
+            if padding:
+                yield b"\0" * padding
+            total += info.size
+        yield b"\0" * (BLOCK_SIZE * 2)
+        logger.debug(f"Sent build context: {len(self.files)} entries, {total} bytes")
+
+    def size(self) -> int:
+        return sum(path.stat().st_size for _, path in self.files if path.is_file())
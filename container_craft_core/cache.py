@@ -1,47 +1,464 @@
+import os
+import json
+import time
+import mmap
+import atexit
 import hashlib
+import tempfile
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Dict, Iterable, Iterator, Union, BinaryIO
 
 from container_craft_core.env import ContainerCraftEnv
 from container_craft_core.logger import get_logger
 
 logger = get_logger(__name__)
 
+CACHE_MODES = {"flat", "cas"}
+CAS_ALGORITHMS = {"sha512", "sha256"}
+
+# Hashing reads and hashes in fixed size chunks so memory stays bounded
+# no matter how large the jar or modpack is.
+HASH_CHUNK_SIZE = 1024 * 1024
+DEFAULT_ALGORITHMS = ("sha1", "sha256", "sha512")
+
+HashSource = Union[bytes, str, Path, BinaryIO]
+
+# mkstemp creates 0600 files; published entries must be readable by docker and
+# other users of a shared cache.
+PUBLISHED_MODE = 0o644
+
+
+def publish_file(tmp_name: Union[str, Path], dest: Union[str, Path]):
+    """Atomically move a finished temp file into place with normal permissions."""
+    os.chmod(tmp_name, PUBLISHED_MODE)
+    os.replace(tmp_name, dest)
+
+
+class MultiHasher:
+    """
+    Computes several digests in a single pass over a stream of chunks.
+    Feed it from a download loop to hash without re-reading the file:
+
+        hasher = MultiHasher()
+        for chunk in response.iter_bytes():
+            f.write(chunk)
+            hasher.update(chunk)
+        hasher.hexdigest("sha512")
+    """
+
+    def __init__(self, algorithms: Iterable[str] = DEFAULT_ALGORITHMS):
+        self._hashes = {name: hashlib.new(name) for name in algorithms}
+        self.size = 0
+
+    def update(self, chunk: bytes):
+        for h in self._hashes.values():
+            h.update(chunk)
+        self.size += len(chunk)
+
+    def hexdigest(self, algorithm: str) -> str:
+        return self._hashes[algorithm].hexdigest()
+
+    def hexdigests(self) -> Dict[str, str]:
+        return {name: h.hexdigest() for name, h in self._hashes.items()}
+
+
 class Cache:
     def __init__(self, env: Optional[ContainerCraftEnv] = None):
         self.env = env or ContainerCraftEnv()
         self.cache_dir = self.env.get_path("MC_CACHE_DIR")
         self.cache_dir.mkdir(parents=True, exist_ok=True)
 
-    def sha512sum(self, data: bytes) -> str:
-        return hashlib.sha512(data).hexdigest()
+        self.mode = self.env.get("MC_CACHE_MODE", "flat")
+        if self.mode not in CACHE_MODES:
+            raise ValueError(f"Unknown MC_CACHE_MODE '{self.mode}', expected one of {sorted(CACHE_MODES)}")
+
+        self.algorithm = self.env.get("MC_CACHE_HASH", "sha512")
+        if self.algorithm not in CAS_ALGORITHMS:
+            raise ValueError(f"Unknown MC_CACHE_HASH '{self.algorithm}', expected one of {sorted(CAS_ALGORITHMS)}")
+
+        # Content addressed layout:
+        #   <MC_CACHE_DIR>/blobs/<algo>/ab/cd/abcd....
+        #   <MC_CACHE_DIR>/index.json   key -> digest
+        self.blobs_dir = self.cache_dir / "blobs" / self.algorithm
+        self.tmp_dir = self.cache_dir / "tmp"
+        self.index_path = self.cache_dir / "index.json"
+        self._index: Optional[Dict[str, str]] = None
 
-    def sha1sum(self, data: bytes) -> str:
-        return hashlib.sha1(data).hexdigest()
+        # Last access times are kept in memory and flushed once at exit so the
+        # download hot path never has to stat or walk the cache.
+        self.access_log_path = self.cache_dir / "access.json"
+        self._access: Dict[str, float] = {}
+        atexit.register(self.flush_access)
 
-    def sha256sum(self, data: bytes) -> str:
-        return hashlib.sha256(data).hexdigest()
+        # Digests of files outside the cache (e.g. MC_REPO_DIR) keyed by path,
+        # size and mtime, so unchanged files are never hashed twice.
+        self.digests_path = self.cache_dir / "digests.json"
+        self._digests: Optional[Dict[str, dict]] = None
+        self._digests_dirty = False
+        atexit.register(self.flush_digests)
+
+    def sha512sum(self, data: HashSource) -> str:
+        return self.hash(data, ("sha512",))["sha512"]
+
+    def sha1sum(self, data: HashSource) -> str:
+        return self.hash(data, ("sha1",))["sha1"]
+
+    def sha256sum(self, data: HashSource) -> str:
+        return self.hash(data, ("sha256",))["sha256"]
+
+    def digest(self, data: HashSource) -> str:
+        """Digest of data using the configured content address algorithm."""
+        return self.hash(data, (self.algorithm,))[self.algorithm]
+
+    # --- streaming hashing ---
+
+    def hash(self, data: HashSource, algorithms: Iterable[str] = DEFAULT_ALGORITHMS) -> Dict[str, str]:
+        """
+        Hash bytes, a path or an open binary file with every algorithm in one pass.
+        """
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            hasher = MultiHasher(algorithms)
+            hasher.update(data)
+            return hasher.hexdigests()
+        return self.hash_file(data, algorithms)
+
+    def hash_chunks(self, chunks: Iterable[bytes], algorithms: Iterable[str] = DEFAULT_ALGORITHMS) -> Dict[str, str]:
+        """Hash an iterator of chunks (e.g. response.iter_bytes()) in one pass."""
+        hasher = MultiHasher(algorithms)
+        for chunk in chunks:
+            hasher.update(chunk)
+        return hasher.hexdigests()
+
+    def hash_file(self, src: Union[str, Path, BinaryIO], algorithms: Iterable[str] = DEFAULT_ALGORITHMS) -> Dict[str, str]:
+        """
+        Hash a path or open binary file in fixed size chunks.
+        Paths are memory mapped and hashed straight from the page cache.
+        """
+        if isinstance(src, (str, Path)):
+            hasher = MultiHasher(algorithms)
+            with self.map_file(src) as view:
+                for offset in range(0, len(view), HASH_CHUNK_SIZE):
+                    with view[offset:offset + HASH_CHUNK_SIZE] as chunk:
+                        hasher.update(chunk)
+            return hasher.hexdigests()
+        return self.hash_chunks(self._read_chunks(src), algorithms)
+
+    def file_digests(self, path: Union[str, Path], algorithms: Iterable[str] = DEFAULT_ALGORITHMS) -> Dict[str, str]:
+        """
+        hash_file for a path, memoized by (path, size, mtime_ns). A file that
+        has not changed since it was last hashed or downloaded is not read.
+        """
+        algorithms = tuple(algorithms)
+        key = os.path.abspath(path)
+        st = os.stat(key)
+        known = self._load_digests().get(key)
+        if known and known["size"] == st.st_size and known["mtime_ns"] == st.st_mtime_ns:
+            if all(a in known["digests"] for a in algorithms):
+                return {a: known["digests"][a] for a in algorithms}
+            digests = {**known["digests"], **self.hash_file(key, algorithms)}
+        else:
+            digests = self.hash_file(key, algorithms)
+        self.remember_digests(key, digests)
+        return {a: digests[a] for a in algorithms}
+
+    def remember_digests(self, path: Union[str, Path], digests: Dict[str, str]):
+        """Record digests computed while writing path (see write_stream)."""
+        key = os.path.abspath(path)
+        st = os.stat(key)
+        self._load_digests()[key] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "digests": dict(digests)}
+        self._digests_dirty = True
+
+    def _load_digests(self) -> Dict[str, dict]:
+        if self._digests is None:
+            self._digests = {}
+            if self.digests_path.exists():
+                try:
+                    self._digests = json.loads(self.digests_path.read_text())
+                except ValueError as e:
+                    logger.warning(f"Ignoring unreadable digest memo {self.digests_path}: {e}")
+        return self._digests
+
+    def flush_digests(self):
+        if not self._digests_dirty:
+            return
+        # drop entries for files that are gone (evicted or cleaned up)
+        digests = {k: v for k, v in self._digests.items() if os.path.exists(k)}
+        try:
+            self._atomic_write(self.digests_path, json.dumps(digests, sort_keys=True).encode())
+            self._digests_dirty = False
+        except OSError as e:
+            logger.warning(f"Failed to write digest memo {self.digests_path}: {e}")
+
+    def write_stream(
+        self,
+        chunks: Iterable[bytes],
+        dest: Path,
+        algorithms: Iterable[str] = DEFAULT_ALGORITHMS,
+    ) -> Dict[str, str]:
+        """
+        Write chunks to dest while hashing them, so a download is hashed as it
+        lands on disk and never read back. The file only appears at dest once
+        it is complete.
+        """
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        hasher = MultiHasher(algorithms)
+        fd, tmp_name = tempfile.mkstemp(dir=dest.parent, prefix=f".{dest.name}.")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    hasher.update(chunk)
+            publish_file(tmp_name, dest)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+        logger.debug(f"Wrote {hasher.size} bytes to {dest}")
+        digests = hasher.hexdigests()
+        self.remember_digests(dest, digests)
+        return digests
 
     @staticmethod
+    def _read_chunks(f: BinaryIO) -> Iterable[bytes]:
+        while True:
+            chunk = f.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
     def get_cache_path(self, key: str) -> Path:
+        if self.mode == "cas":
+            digest = self.index.get(key)
+            if digest:
+                return self.blob_path(digest)
         return self.cache_dir / key
 
     def has(self, key: str) -> bool:
-        exists = self.get_cache_path(key).exists()
+        if self.mode == "cas":
+            digest = self.index.get(key)
+            exists = digest is not None and self.has_blob(digest)
+        else:
+            exists = self.get_cache_path(key).exists()
         logger.debug(f"Cache {'hit' if exists else 'miss'} for key: {key}")
+        if exists:
+            self.touch(self.get_cache_path(key))
         return exists
 
     def get(self, key: str) -> Optional[bytes]:
+        """
+        Read a whole entry into memory. For server jars, worlds and other
+        large entries prefer open(), which streams.
+        """
         path = self.get_cache_path(key)
         if path.exists():
             logger.debug(f"Reading cache entry: {key}")
+            self.touch(path)
             return path.read_bytes()
         logger.debug(f"Cache entry missing: {key}")
         return None
 
+    def open(self, key: str) -> Optional[BinaryIO]:
+        """Open an entry as a binary file handle for streaming, or None on a miss."""
+        path = self.get_cache_path(key)
+        if not path.exists():
+            logger.debug(f"Cache entry missing: {key}")
+            return None
+        self.touch(path)
+        return open(path, "rb")
+
+    @staticmethod
+    @contextmanager
+    def map_file(path: Union[str, Path]) -> Iterator[memoryview]:
+        """
+        Memory map a file read-only. Pages are shared with the OS page cache,
+        so peak RSS does not grow with the number of files mapped in turn.
+        """
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                yield memoryview(b"")
+                return
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            view = memoryview(mapped)
+            try:
+                yield view
+            finally:
+                view.release()
+                try:
+                    mapped.close()
+                except BufferError:
+                    # A caller still holds a slice; the map closes when it is collected.
+                    logger.debug(f"Deferred unmap of {path}: view still referenced")
+
     def set(self, key: str, data: bytes):
+        if self.mode == "cas":
+            digest = self.put_blob(data)
+            self.link_key(key, digest)
+            logger.debug(f"Wrote cache entry: {key} -> {digest}")
+            return
+
         path = self.get_cache_path(key)
-        path.write_bytes(data)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._atomic_write(path, data)
         logger.debug(f"Wrote cache entry: {key}")
 
+    # --- content addressed store ---
+
+    def blob_path(self, digest: str) -> Path:
+        """Two level sharded path for a digest: blobs/<algo>/ab/cd/<digest>."""
+        return self.blobs_dir / digest[:2] / digest[2:4] / digest
+
+    def has_blob(self, digest: str) -> bool:
+        return self.blob_path(digest).exists()
+
+    def get_blob(self, digest: str) -> Optional[bytes]:
+        path = self.blob_path(digest)
+        if path.exists():
+            self.touch(path)
+            return path.read_bytes()
+        return None
+
+    def put_blob(self, data: bytes, expected: Optional[str] = None) -> str:
+        """
+        Store data under its digest and return the digest.
+        Identical content is only ever stored once.
+        Raises ValueError if `expected` is given and does not match.
+        """
+        digest = self.digest(data)
+        if expected and expected.lower() != digest:
+            raise ValueError(f"Integrity check failed: expected {expected}, got {digest}")
+
+        path = self.blob_path(digest)
+        if path.exists():
+            logger.debug(f"Blob already stored: {digest}")
+            return digest
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._atomic_write(path, data)
+        logger.debug(f"Stored blob: {digest}")
+        return digest
+
+    def put_file(self, src: Path, expected: Optional[str] = None) -> str:
+        """Store a file from disk in the blob store and return its digest."""
+        with open(src, "rb") as f:
+            return self.put_stream(self._read_chunks(f), expected)[self.algorithm]
+
+    def put_stream(
+        self,
+        chunks: Iterable[bytes],
+        expected: Optional[str] = None,
+        algorithms: Iterable[str] = DEFAULT_ALGORITHMS,
+    ) -> Dict[str, str]:
+        """
+        Stream chunks into the blob store, hashing as they are written.
+        Returns every requested digest; the blob is addressed by self.algorithm.
+        """
+        algorithms = tuple(set(algorithms) | {self.algorithm})
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.tmp_dir)
+        os.close(fd)
+        tmp_path = Path(tmp_name)
+        try:
+            digests = self.write_stream(chunks, tmp_path, algorithms)
+            digest = digests[self.algorithm]
+            if expected and expected.lower() != digest:
+                raise ValueError(f"Integrity check failed: expected {expected}, got {digest}")
+
+            path = self.blob_path(digest)
+            if path.exists():
+                logger.debug(f"Blob already stored: {digest}")
+            else:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp_path, path)
+                logger.debug(f"Stored blob: {digest}")
+            return digests
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    def verify_blob(self, digest: str) -> bool:
+        """Re-hash a stored blob and check it still matches its address."""
+        path = self.blob_path(digest)
+        if not path.exists():
+            return False
+        ok = self.digest(path) == digest
+        if not ok:
+            logger.warning(f"Corrupt blob detected: {digest}")
+        return ok
+
+    # --- key -> digest index ---
+
+    @property
+    def index(self) -> Dict[str, str]:
+        if self._index is None:
+            self._index = {}
+            if self.index_path.exists():
+                try:
+                    self._index = json.loads(self.index_path.read_text())
+                except ValueError as e:
+                    logger.warning(f"Ignoring unreadable cache index {self.index_path}: {e}")
+        return self._index
+
+    def link_key(self, key: str, digest: str):
+        """Point a key at an already stored blob."""
+        if self.index.get(key) == digest:
+            return
+        self.index[key] = digest
+        self._save_index()
+
+    def unlink_digest(self, digest: str):
+        """Drop every key pointing at digest (used when a blob is evicted)."""
+        keys = [k for k, d in self.index.items() if d == digest]
+        for key in keys:
+            del self.index[key]
+        if keys:
+            self._save_index()
+
+    def _save_index(self):
+        self._atomic_write(self.index_path, json.dumps(self.index, indent=1, sort_keys=True).encode())
+
+    # --- access tracking ---
+
+    def touch(self, path: Path):
+        """Record a use of path for LRU eviction. In memory only; see flush_access()."""
+        self._access[os.path.abspath(path)] = time.time()
+
+    def load_access(self) -> Dict[str, float]:
+        if not self.access_log_path.exists():
+            return {}
+        try:
+            return json.loads(self.access_log_path.read_text())
+        except ValueError as e:
+            logger.warning(f"Ignoring unreadable access log {self.access_log_path}: {e}")
+            return {}
+
+    def save_access(self, access: Dict[str, float]):
+        self._atomic_write(self.access_log_path, json.dumps(access, sort_keys=True).encode())
+
+    def flush_access(self):
+        """Merge in-memory access times into the on-disk access log."""
+        if not self._access:
+            return
+        access = self.load_access()
+        access.update(self._access)
+        try:
+            self.save_access(access)
+            self._access.clear()
+        except OSError as e:
+            logger.warning(f"Failed to write access log {self.access_log_path}: {e}")
+
+    def _atomic_write(self, path: Path, data: bytes):
+        """Write via a temp file in the cache and rename over the target."""
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            publish_file(tmp_name, path)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+
 cache = Cache()
@@ -0,0 +1,107 @@
+import hashlib
+import msgpack
+
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Union
+
+from container_craft_core import LOCAL_VERSION
+from container_craft_core.env import ContainerCraftEnv
+from container_craft_core.cache import Cache, cache as default_cache
+from container_craft_core.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Bump when the entry layout changes.
+FORMAT = 1
+
+
+def file_record(path: Union[str, Path], data: Optional[bytes] = None) -> Dict[str, Any]:
+    """
+    Size, mtime and sha256 of path as it was read (data, when given), or
+    missing=True if it does not exist.
+    """
+    path = Path(path)
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return {"path": str(path), "missing": True}
+    if data is None:
+        data = path.read_bytes()
+    return {
+        "path": str(path),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "sha256": hashlib.sha256(data).hexdigest(),
+    }
+
+
+class ConfigCache:
+    """
+    Merged and validated configs compiled to msgpack under
+    ${MC_CACHE_DIR}/config, so commands after the first skip YAML parsing,
+    include resolution and schema validation.
+
+    Entries are keyed by the root config paths and the schema path. Each
+    one lists every file that went into it (all includes, the schema, and
+    includes that did not exist) with its size, mtime and sha256, and is
+    used only while they all still match. Only a file whose size or mtime
+    changed is hashed again, so a touched but unedited file is still a hit.
+    Set MC_CONFIG_CACHE=off to always load from source.
+    """
+
+    def __init__(self, env: Optional[ContainerCraftEnv] = None, cache: Optional[Cache] = None):
+        self.env = env or ContainerCraftEnv()
+        self.cache = cache or default_cache
+        self.cache_dir = self.env.get_path("MC_CACHE_DIR") / "config"
+        self.enabled = str(self.env.get("MC_CONFIG_CACHE", "on")).lower() not in ("off", "0", "false", "no")
+
+    def path(self, roots: List[str], schema_path: Optional[Path]) -> Path:
+        key = hashlib.sha256("\0".join([LOCAL_VERSION, str(schema_path), *roots]).encode()).hexdigest()
+        return self.cache_dir / f"{key}.msgpack"
+
+    @staticmethod
+    def _unchanged(record: Dict[str, Any]) -> bool:
+        path = Path(record["path"])
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return record.get("missing", False)
+        if record.get("missing") or st.st_size != record["size"]:
+            return False
+        if st.st_mtime_ns == record["mtime_ns"]:
+            return True
+        return hashlib.sha256(path.read_bytes()).hexdigest() == record["sha256"]
+
+    def load(self, roots: List[str], schema_path: Optional[Path]) -> Optional[Dict[str, Any]]:
+        """The compiled config for roots, or None if there is none or any of its files changed."""
+        if not self.enabled:
+            return None
+        path = self.path(roots, schema_path)
+        if not path.exists():
+            return None
+        try:
+            entry = msgpack.unpackb(path.read_bytes(), raw=False, strict_map_key=False)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable compiled config {path}: {e}")
+            return None
+        if entry.get("format") != FORMAT or not all(self._unchanged(r) for r in entry["files"]):
+            logger.debug(f"Compiled config {path} is stale")
+            return None
+        logger.debug(f"Using compiled config {path}")
+        return entry["config"]
+
+    def store(self, roots: List[str], schema_path: Optional[Path], files: List[Dict[str, Any]], config: Dict[str, Any]):
+        if not self.enabled:
+            return
+        path = self.path(roots, schema_path)
+        try:
+            data = msgpack.packb({"format": FORMAT, "files": files, "config": config}, use_bin_type=True)
+        except (TypeError, ValueError) as e:
+            # e.g. YAML timestamps, which msgpack has no type for
+            logger.debug(f"Config cannot be compiled, loading from source next time: {e}")
+            return
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self.cache._atomic_write(path, data)
+        except OSError as e:
+            logger.warning(f"Failed to write compiled config {path}: {e}")
@@ -4,6 +4,7 @@ import yaml
 from pathlib import Path
 
 from container_craft_core.config.schema_validator import SchemaValidator
+from container_craft_core.config.config_cache import ConfigCache, file_record
 from container_craft_core.env import ContainerCraftEnv
 from container_craft_core.error_handler import error_handler
 from container_craft_core.logger import get_logger
@@ -21,6 +22,13 @@ class Context:
         # FIFO: base config is loaded last, later entries override earlier ones
         self._raw_paths = list(self.config_paths)
         self.config = None
+        self.config_cache = ConfigCache(self.env)
+
+    def set_config_paths(self, config_paths: list):
+        """Load these config files (instead of MC_CONFIG) on the next load()."""
+        self.config_paths = list(config_paths)
+        self._raw_paths = list(self.config_paths)
+        self.config = None
 
     def load(self):
         logger.debug(f"Initial config paths: {self.config_paths}")
@@ -28,7 +36,32 @@ class Context:
         # MC_INCLUDE_* variables get added to the front (highest priority)
         includes = self.env.get_list("MC_INCLUDE_PRE") + list(self._raw_paths)
 
+        # Reuse the merged, validated config of an earlier run if none of
+        # the files that went into it changed
+        roots = [str(Path(p).expanduser().resolve()) for p in includes]
+        schema_path = SchemaValidator.resolve_schema_path(self.env)
+        merged_config = self.config_cache.load(roots, schema_path)
+        if merged_config is None:
+            merged_config, files = self._compile(includes, schema_path)
+            if schema_path:
+                files.append(file_record(schema_path))
+            self.config_cache.store(roots, schema_path, files, merged_config)
+
+        # Inject env (lowest priority, unless overridden)
+        merged_config.setdefault("defaults", {})
+        merged_config["defaults"].setdefault("env", {})
+        merged_config["defaults"]["env"].update(self.env.as_dict())
+
+        self.config = merged_config
+        return self.config
+
+    def _compile(self, includes: list, schema_path: Path = None) -> tuple:
+        """
+        Parse, merge and validate the config files, following their includes.
+        Returns the merged config and a file_record of every path visited.
+        """
         merged_config = {}
+        files = []
 
         visited = set()
         while includes:
@@ -42,16 +75,18 @@ class Context:
 
             if not path.exists():
                 logger.warning(f"Skipping non-existent config: {path}")
+                files.append(file_record(path))
                 continue
 
             logger.debug(f"Loading config from {path}")
             try:
-                with path.open("r") as f:
-                    if path.suffix == ".json":
-                        config_part = json.load(f)
-                    else:
-                        config_part = yaml.safe_load(f)
-                    config_part = config_part or {}
+                data = path.read_bytes()
+                files.append(file_record(path, data))
+                if path.suffix == ".json":
+                    config_part = json.loads(data)
+                else:
+                    config_part = yaml.safe_load(data)
+                config_part = config_part or {}
             except Exception as e:
                 error_handler.handle_error(f"Failed to parse config file: {path}", e)
 
@@ -67,15 +102,8 @@ class Context:
                 includes.append(str(include_path))
 
         # Validate against schema
-        SchemaValidator().validate(merged_config)
-
-        # Inject env (lowest priority, unless overridden)
-        merged_config.setdefault("defaults", {})
-        merged_config["defaults"].setdefault("env", {})
-        merged_config["defaults"]["env"].update(self.env.as_dict())
-
-        self.config = merged_config
-        return self.config
+        SchemaValidator.shared(schema_path, env=self.env).validate(merged_config)
+        return merged_config, files
 
     def get(self, *keys, default=None):
         """
@@ -2,27 +2,69 @@ import git
 from pathlib import Path
 import shutil
 import os
+import time
+import json
+import fcntl
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Optional, Dict
 
 from container_craft_core.env import ContainerCraftEnv
-from container_craft_core.logging import get_logger
+from container_craft_core.logger import get_logger, prefixed
 from container_craft_core.ssh_agent import ssh_agent
 
 logger = get_logger("container_craft.layers")
 
+DEFAULT_LAYER_JOBS = 8
+CHECKOUT_MODES = ("full", "shallow", "blobless")
+# Last synced commit of every layer, next to the checkouts.
+STATE_FILE = ".layers-state.json"
+
+
+@dataclass
+class LayerResult:
+    name: str
+    path: Optional[Path] = None
+    action: str = ""  # cloned, updated, unchanged, skipped, failed
+    seconds: float = 0.0
+    commit: Optional[str] = None  # HEAD after a clone or update
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
 
 class LayerManager:
-    def __init__(self, env: ContainerCraftEnv):
+    def __init__(self, env: ContainerCraftEnv, layers_dir: Optional[str] = None, ssh_key: Optional[str] = None):
         self.env = env
-        self.layers_dir = Path(self.env.layers_dir)
+        self.layers_dir = Path(layers_dir or self.env.get_path("MC_LAYERS_DIR"))
         self.layers_dir.mkdir(parents=True, exist_ok=True)
-        self.ssh_key = self.env.ssh_key
+        self.ssh_key = ssh_key or self.env.get("SSH_PRIVATE_KEY")
+        self.checkout_mode = self.env.get("MC_LAYER_CHECKOUT", "full")
+        mirror_dir = self.env.get("MC_LAYER_MIRROR_DIR")
+        self.mirror_dir = Path(mirror_dir) if mirror_dir else None
+        self._mirror_locks: Dict[str, threading.Lock] = {}
+        self.state_path = self.layers_dir / STATE_FILE
 
         if self.ssh_key:
             ssh_agent.add_key(self.ssh_key)
 
         logger.debug(f"Initialized LayerManager with layers_dir: {self.layers_dir}, ssh_key: {self.ssh_key}")
 
-    def clone_or_update_layer(self, name: str, url: str, branch: str = None, commit: str = None, path: str = None) -> Path:
+    def clone_or_update_layer(
+        self,
+        name: str,
+        url: str,
+        branch: str = None,
+        commit: str = None,
+        path: str = None,
+        checkout: str = None,
+        depth: int = 1,
+        mirror: bool = True,
+    ) -> Path:
         """
         Clone or update a layer from Git.
         - name: logical name of the layer
@@ -30,28 +72,73 @@ class LayerManager:
         - branch: optional branch
         - commit: optional pinned commit
         - path: override the target folder name inside layers_dir
+        - checkout: full, shallow (depth commits, or just the pinned commit)
+          or blobless (all history, file contents fetched on demand);
+          defaults to MC_LAYER_CHECKOUT
+        - mirror: borrow objects from the bare mirror in MC_LAYER_MIRROR_DIR
+          (git --reference) when cloning, if one is configured. The mirror is
+          only created or refreshed for a clone; existing checkouts fetch
+          from origin.
         """
         target_path = self.layers_dir / (path or name)
-        logger.debug(f"Target repo path: {target_path}")
+        checkout = checkout or self.checkout_mode
+        if checkout not in CHECKOUT_MODES:
+            raise ValueError(f"Unknown checkout mode '{checkout}' for layer {name}, expected one of {list(CHECKOUT_MODES)}")
+        logger.debug(f"Target repo path: {target_path} ({checkout})")
+        use_mirror = mirror and self.mirror_dir
 
         if target_path.exists():
             logger.debug(f"Repo already exists. Updating: {target_path}")
             repo = git.Repo(target_path)
-            origin = repo.remotes.origin
-            origin.fetch()
-
-            if branch:
-                logger.debug(f"Checking out branch: {branch}")
-                repo.git.checkout(branch)
-                repo.git.pull("origin", branch)
 
-            if commit:
-                logger.debug(f"Checking out commit: {commit}")
+            if commit and self._has_commit(repo, commit):
+                logger.debug(f"Pinned commit {commit} already present; checking it out")
                 repo.git.checkout(commit)
+            elif checkout == "shallow":
+                self._fetch_shallow(repo, depth, commit, branch)
+                if commit:
+                    repo.git.checkout("--detach", commit)
+                elif branch:
+                    repo.git.checkout("-B", branch, "FETCH_HEAD")
+                else:
+                    repo.git.checkout("--detach", "FETCH_HEAD")
+            else:
+                origin = repo.remotes.origin
+                origin.fetch()
+
+                if branch:
+                    logger.debug(f"Checking out branch: {branch}")
+                    repo.git.checkout(branch)
+                    repo.git.pull("origin", branch)
+
+                if commit:
+                    logger.debug(f"Checking out commit: {commit}")
+                    repo.git.checkout(commit)
+
+        elif checkout == "shallow" and commit:
+            logger.debug(f"Fetching pinned commit {commit} from {url} into {target_path}")
+            reference = self._mirror(url) if use_mirror else None
+            target_path.mkdir(parents=True)
+            repo = git.Repo.init(target_path)
+            if reference:
+                self._add_alternate(target_path, reference)
+            repo.create_remote("origin", url)
+            self._fetch_shallow(repo, depth, commit, branch)
+            repo.git.checkout("--detach", commit)
 
         else:
             logger.debug(f"Cloning from {url} to {target_path}")
-            repo = git.Repo.clone_from(url, target_path)
+            reference = self._mirror(url) if use_mirror else None
+            options = {}
+            if reference:
+                options["reference_if_able"] = reference
+            if checkout == "blobless":
+                options["filter"] = "blob:none"
+            if checkout == "shallow":
+                options.update(depth=depth, single_branch=True)
+                if branch:
+                    options["branch"] = branch
+            repo = git.Repo.clone_from(url, target_path, **options)
 
             if branch:
                 logger.debug(f"Checking out branch after clone: {branch}")
@@ -63,7 +150,196 @@ class LayerManager:
 
         return target_path
 
-    def update_layers(self, layers_config: dict):
+    @staticmethod
+    def _fetch_shallow(repo: git.Repo, depth: int, commit: Optional[str], branch: Optional[str]):
+        """
+        Fetch just the pinned commit (or the branch tip) depth commits deep.
+        Servers that refuse fetching by sha get the branch, deep enough to
+        usually contain the commit.
+        """
+        if commit:
+            try:
+                repo.git.fetch("--depth", str(depth), "origin", commit)
+                return
+            except git.GitCommandError:
+                logger.debug(f"Fetching {commit} by sha refused; fetching {branch or 'HEAD'} instead")
+                depth = max(depth, 50)
+        repo.git.fetch("--depth", str(depth), "origin", branch or "HEAD")
+
+    @staticmethod
+    def _has_commit(repo: git.Repo, commit: str) -> bool:
+        try:
+            repo.git.cat_file("-e", f"{commit}^{{commit}}")
+            return True
+        except git.GitCommandError:
+            return False
+
+    @staticmethod
+    def _add_alternate(target_path: Path, reference: str):
+        """What git clone --reference does: borrow objects from the mirror."""
+        alternates = target_path / ".git" / "objects" / "info" / "alternates"
+        alternates.parent.mkdir(parents=True, exist_ok=True)
+        alternates.write_text(f"{Path(reference) / 'objects'}\n")
+
+    def _mirror(self, url: str) -> Optional[str]:
+        """
+        Create or refresh the bare mirror of url in MC_LAYER_MIRROR_DIR and
+        return its path. The mirror is always a full one, whatever the
+        checkout mode of the layer: it is shared by full, shallow and
+        blobless clones, and only a full mirror has every object they may
+        borrow. The mirror may live on shared storage, so it is locked
+        across processes and hosts while it is written. Returns None (clone
+        without a reference) if the mirror cannot be updated.
+        """
+        digest = hashlib.sha1(url.encode()).hexdigest()[:12]
+        repo_name = Path(url.rstrip("/")).name
+        if repo_name.endswith(".git"):
+            repo_name = repo_name[:-len(".git")]
+        mirror = self.mirror_dir / f"{digest}-{repo_name}.git"
+        self.mirror_dir.mkdir(parents=True, exist_ok=True)
+        with self._mirror_locks.setdefault(str(mirror), threading.Lock()):
+            with open(f"{mirror}.lock", "w") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    if (mirror / "HEAD").exists():
+                        logger.debug(f"Refreshing layer mirror {mirror}")
+                        repo = git.Repo(mirror)
+                        if repo.git.config("--get", "remote.origin.partialclonefilter", with_exceptions=False):
+                            # blobless mirror of an earlier version: fetch the missing blobs
+                            repo.git.config("--unset", "remote.origin.partialclonefilter")
+                            repo.git.fetch("--refetch", "origin")
+                        else:
+                            repo.git.fetch("origin")
+                    else:
+                        logger.debug(f"Creating layer mirror {mirror}")
+                        git.Repo.clone_from(url, mirror, mirror=True)
+                except git.GitCommandError as e:
+                    logger.warning(f"Layer mirror {mirror} not usable, cloning without it: {e}")
+                    return None
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+        return str(mirror)
+
+    # --- skip-if-unchanged ---
+
+    def load_state(self) -> Dict[str, dict]:
+        """The last synced commit of each layer, as written by update_layers."""
+        try:
+            return json.loads(self.state_path.read_text())
+        except FileNotFoundError:
+            return {}
+        except ValueError as e:
+            logger.warning(f"Ignoring unreadable layer state {self.state_path}: {e}")
+            return {}
+
+    def _save_state(self, state: Dict[str, dict]):
+        tmp = self.state_path.with_name(f"{STATE_FILE}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(state, indent=2, sort_keys=True) + "\n")
+        os.replace(tmp, self.state_path)
+
+    def _state_key(self, layer: dict) -> dict:
+        """The settings a recorded commit is only valid for."""
+        return {
+            "url": layer.get("url"),
+            "branch": layer.get("branch"),
+            "commit": layer.get("commit"),
+            "path": layer.get("path"),
+            "checkout": layer.get("checkout") or self.checkout_mode,
+        }
+
+    @staticmethod
+    def _remote_ref(layer: dict) -> str:
+        return f"refs/heads/{layer['branch']}" if layer.get("branch") else "HEAD"
+
+    def probe_remotes(self, layers: Dict[str, dict], jobs: Optional[int] = None) -> Dict[str, Optional[str]]:
+        """
+        The commit each layer should be at: its pinned commit, or the remote
+        head of its branch (HEAD without one). Each distinct url gets a single
+        git ls-remote asking for every ref its layers need, and the urls are
+        asked concurrently. None where the remote could not be reached.
+        """
+        wanted: Dict[str, Optional[str]] = {}
+        refs_by_url: Dict[str, set] = {}
+        for name, layer in layers.items():
+            if layer.get("commit"):
+                wanted[name] = layer["commit"]
+            else:
+                refs_by_url.setdefault(layer["url"], set()).add(self._remote_ref(layer))
+
+        def _ls_remote(url: str, refs: set) -> Dict[str, str]:
+            heads = {}
+            for line in git.cmd.Git().ls_remote(url, *sorted(refs)).splitlines():
+                sha, _, ref = line.partition("\t")
+                heads[ref] = sha
+            return heads
+
+        heads_by_url: Dict[str, Dict[str, str]] = {}
+        if refs_by_url:
+            jobs = max(1, min(jobs or DEFAULT_LAYER_JOBS, len(refs_by_url)))
+            with ThreadPoolExecutor(max_workers=jobs) as pool:
+                futures = {pool.submit(_ls_remote, url, refs): url for url, refs in refs_by_url.items()}
+                for future in as_completed(futures):
+                    url = futures[future]
+                    try:
+                        heads_by_url[url] = future.result()
+                    except git.GitCommandError as e:
+                        logger.warning(f"Could not probe {url}, syncing its layers anyway: {e}")
+
+        for name, layer in layers.items():
+            if name not in wanted:
+                wanted[name] = heads_by_url.get(layer["url"], {}).get(self._remote_ref(layer))
+        return wanted
+
+    def _unchanged(self, name: str, layer: dict, wanted: Optional[str], recorded: Optional[dict]) -> bool:
+        """True when the checkout was synced with the same settings and is already at wanted."""
+        target_path = self.layers_dir / (layer.get("path") or name)
+        if not wanted or not recorded or not target_path.exists():
+            return False
+        sha = recorded.get("sha") or ""
+        if {k: recorded.get(k) for k in self._state_key(layer)} != self._state_key(layer) or not sha.startswith(wanted):
+            return False
+        try:
+            # the checkout may have been moved by hand since
+            return git.Repo(target_path).git.rev_parse("HEAD") == sha
+        except (git.GitCommandError, git.InvalidGitRepositoryError, git.NoSuchPathError):
+            return False
+
+    def sync_layer(self, name: str, layer: dict, update: bool = True, force_checkout: bool = False) -> LayerResult:
+        """
+        Bring one layer up to date. A dirty checkout is left alone unless
+        update is set; force_checkout removes it and clones again.
+        """
+        started = time.monotonic()
+        result = LayerResult(name)
+        target_path = self.layers_dir / (layer.get("path") or name)
+        args = (name, layer.get("url"), layer.get("branch"), layer.get("commit"), layer.get("path"),
+                layer.get("checkout"), layer.get("depth", 1), layer.get("mirror", True))
+
+        if target_path.exists() and force_checkout:
+            shutil.rmtree(target_path)
+        if not target_path.exists():
+            result.action = "cloned"
+            result.path = self.clone_or_update_layer(*args)
+        elif not update and git.Repo(target_path).is_dirty(untracked_files=True):
+            logger.info(f"Skipping update for dirty layer {name} at {target_path}")
+            result.action, result.path = "skipped", target_path
+        elif update:
+            result.action = "updated"
+            result.path = self.clone_or_update_layer(*args)
+        else:
+            result.action, result.path = "skipped", target_path
+        if result.action in ("cloned", "updated"):
+            result.commit = git.Repo(result.path).git.rev_parse("HEAD")
+        result.seconds = time.monotonic() - started
+        return result
+
+    def update_layers(
+        self,
+        layers_config: dict,
+        jobs: Optional[int] = None,
+        update: bool = True,
+        force_checkout: bool = False,
+    ) -> Dict[str, LayerResult]:
         """
         Takes a dictionary like:
         layers:
@@ -72,25 +348,82 @@ class LayerManager:
             branch: main
             commit: abc123
             path: optional/custom-path
+            checkout: shallow   # full, shallow or blobless
+            depth: 1
+            mirror: true        # use MC_LAYER_MIRROR_DIR when set
+
+        Layers are synced concurrently, up to jobs at once, so the whole set
+        takes about as long as the slowest repo. Every git subprocess uses
+        the one ssh-agent started for this process. A failing layer is
+        reported in its LayerResult and does not stop the others.
+
+        On update, layers synced before are first checked against their
+        remotes (one ls-remote per url, see probe_remotes); those still at
+        the wanted commit are reported "unchanged" without fetching. The
+        synced commits are kept in STATE_FILE in layers_dir.
         """
         if not layers_config:
             logger.info("No layers to update — skipping (possibly base modloader)")
-            return
+            return {}
 
         logger.debug(f"Starting layer update: {layers_config.keys()}")
 
+        results: Dict[str, LayerResult] = {}
+        todo = {}
         for name, layer in layers_config.items():
-            url = layer.get("url")
-            branch = layer.get("branch")
-            commit = layer.get("commit")
-            path = layer.get("path")
-
-            if not url:
+            if not layer.get("url"):
                 logger.warning(f"Skipping layer '{name}' — missing 'url'")
                 continue
+            todo[name] = layer
+
+        state = self.load_state()
+        if update and not force_checkout:
+            known = {name: layer for name, layer in todo.items() if name in state}
+            wanted = self.probe_remotes(known, jobs) if known else {}
+            for name, layer in known.items():
+                if self._unchanged(name, layer, wanted.get(name), state.get(name)):
+                    results[name] = LayerResult(
+                        name, self.layers_dir / (layer.get("path") or name), "unchanged", commit=state[name]["sha"]
+                    )
+                    del todo[name]
+            if results:
+                logger.info(f"{len(results)} of {len(results) + len(todo)} layers unchanged")
+
+        jobs = max(1, min(jobs or DEFAULT_LAYER_JOBS, len(todo) or 1))
+        done = 0
+
+        def _sync(name: str, layer: dict) -> LayerResult:
+            try:
+                return self.sync_layer(name, layer, update, force_checkout)
+            except Exception as e:
+                return LayerResult(name, action="failed", error=e)
+
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(_sync, name, layer): name for name, layer in todo.items()}
+            for future in as_completed(futures):
+                result = future.result()
+                results[result.name] = result
+                done += 1
+                log = prefixed(logger, result.name)
+                if result.ok:
+                    log.info(f"[{done}/{len(todo)}] {result.action} ({result.seconds:.1f}s)")
+                else:
+                    log.error(f"[{done}/{len(todo)}] failed: {result.error}")
+
+        for name, result in results.items():
+            if name not in todo:
+                continue
+            if result.commit:
+                state[name] = {**self._state_key(todo[name]), "sha": result.commit}
+            elif not result.ok:
+                state.pop(name, None)
+        if todo:
+            self._save_state(state)
 
-            logger.debug(f"Updating layer: {name}")
-            self.clone_or_update_layer(name, url, branch, commit, path)
+        failed = sorted(name for name, result in results.items() if not result.ok)
+        if failed:
+            logger.error(f"{len(failed)} of {len(results)} layers failed to sync: {', '.join(failed)}")
+        return results
 
 
 def get_layers_dir(context: dict) -> Path:
@@ -1,7 +1,11 @@
+import os
 import json
+import hashlib
+import threading
 import jsonschema
 import yaml
 from pathlib import Path
+from typing import Dict, Tuple, Any
 from container_craft_core.logger import get_logger
 from container_craft_core.error_handler import error_handler
 from container_craft_core.env import ContainerCraftEnv
@@ -9,6 +13,41 @@ from container_craft_core import LOCAL_VERSION, SUPPORTED_VERSIONS
 
 logger = get_logger(__name__)
 
+# Process-wide: (path, sha256) -> (schema, validator), and path -> the
+# (size, mtime_ns, sha256) it was last hashed at.
+_compiled: Dict[Tuple[str, str], Tuple[dict, Any]] = {}
+_digests: Dict[str, Tuple[int, int, str]] = {}
+_compiled_lock = threading.Lock()
+
+
+def compiled_schema(schema_path: Path) -> Tuple[dict, Any]:
+    """
+    The parsed schema at schema_path and a validator for it. The schema is
+    checked and its validator built once per process for each version
+    (sha256) of the file; the file is only read again when its size or
+    mtime changes.
+    """
+    path = str(schema_path)
+    st = os.stat(path)
+    with _compiled_lock:
+        known = _digests.get(path)
+        if known and known[:2] == (st.st_size, st.st_mtime_ns) and (path, known[2]) in _compiled:
+            return _compiled[(path, known[2])]
+
+        content = schema_path.read_bytes()
+        digest = hashlib.sha256(content).hexdigest()
+        _digests[path] = (st.st_size, st.st_mtime_ns, digest)
+        if (path, digest) not in _compiled:
+            if schema_path.suffix in {".yaml", ".yml"}:
+                schema = yaml.safe_load(content)
+            else:
+                schema = json.loads(content)
+            cls = jsonschema.validators.validator_for(schema)
+            cls.check_schema(schema)
+            logger.debug(f"Compiled schema {path} ({cls.__name__})")
+            _compiled[(path, digest)] = (schema, cls(schema))
+        return _compiled[(path, digest)]
+
 
 class SchemaValidator:
     def __init__(self, schema_path: str = None, env: ContainerCraftEnv = None):
@@ -19,14 +58,20 @@ class SchemaValidator:
         self.env = env or ContainerCraftEnv()
         self.schema_path = self._resolve_schema_path(schema_path)
         self.schema = None
+        self._validator = None
         self._load_schema()
 
     def _resolve_schema_path(self, schema_path: str = None) -> Path:
+        return self.resolve_schema_path(self.env, schema_path)
+
+    @staticmethod
+    def resolve_schema_path(env: ContainerCraftEnv, schema_path: str = None) -> Path:
+        """The schema a SchemaValidator would load, without loading it."""
         if schema_path:
             return Path(schema_path).resolve()
 
         # Try to find a schema next to MC_CONFIG
-        mc_config = Path(self.env.get("MC_CONFIG"))
+        mc_config = Path(env.get("MC_CONFIG"))
         default_dir = mc_config.parent
 
         candidates = [
@@ -50,13 +95,23 @@ class SchemaValidator:
             f"Tried: {candidates + [internal]}"
         )
 
+    _shared: Dict[str, "SchemaValidator"] = {}
+
+    @classmethod
+    def shared(cls, schema_path: str = None, env: ContainerCraftEnv = None) -> "SchemaValidator":
+        """One SchemaValidator per schema file for the whole process."""
+        path = str(cls.resolve_schema_path(env or ContainerCraftEnv(), schema_path))
+        with _compiled_lock:
+            validator = cls._shared.get(path)
+        if validator is None:
+            validator = cls(path, env=env)
+            with _compiled_lock:
+                validator = cls._shared.setdefault(path, validator)
+        return validator
+
     def _load_schema(self):
         try:
-            content = self.schema_path.read_text()
-            if self.schema_path.suffix in {".yaml", ".yml"}:
-                self.schema = yaml.safe_load(content)
-            else:
-                self.schema = json.loads(content)
+            self.schema, self._validator = compiled_schema(self.schema_path)
         except Exception as e:
             error_handler.handle_error(f"Failed to load schema: {self.schema_path}", e)
 
@@ -65,8 +120,8 @@ class SchemaValidator:
         Validates the given data against the loaded JSON Schema.
         Raises ValueError on failure.
         """
-        if self.schema is None:
-            self._load_schema()
+        # picks up a changed schema file; otherwise just a stat
+        self._load_schema()
 
         # Check for required version key
         config_version = data.get("version")
@@ -80,7 +135,7 @@ class SchemaValidator:
                 f"Current tool version: {LOCAL_VERSION}"
             )
 
-        try:
-            jsonschema.validate(instance=data, schema=self.schema)
-        except jsonschema.ValidationError as e:
-            raise ValueError(f"Schema validation error: {e.message}")
+        # the error jsonschema.validate would raise, without re-checking the schema
+        error = jsonschema.exceptions.best_match(self._validator.iter_errors(data))
+        if error is not None:
+            raise ValueError(f"Schema validation error: {error.message}")
@@ -4,9 +4,14 @@ from docker import from_env as docker_from_env, errors as docker_errors
 from container_craft_core.env import ContainerCraftEnv
 from container_craft_core.logger import get_logger
 from container_craft_core.error_handler import error_handler
+from container_craft_core.build_context import BuildContext
+from container_craft_core import pipeline
 
 logger = get_logger(__name__)
 
+# Image label holding the build fingerprint of images built by container_craft
+FINGERPRINT_LABEL = "io.container-craft.fingerprint"
+
 
 class Docker:
     def __init__(self, env: Optional[ContainerCraftEnv] = None):
@@ -19,10 +24,17 @@ class Docker:
         tag: str,
         build_args: Optional[Dict[str, str]] = None,
         context_dir: Optional[str] = None,
+        log=None,
+        labels: Optional[Dict[str, str]] = None,
     ) -> bool:
         """
         Build a Docker image using the Docker SDK with args from environment.
+        Only the Dockerfile and the files it COPYs are sent, as a streamed,
+        deterministic tar (see BuildContext). log receives the build output
+        (defaults to this module's logger); pass a prefixed logger when
+        several builds run at once.
         """
+        log = log or logger
         context_path = context_dir or str(self.env.get_path("MC_BUILD_DIR"))
         dockerfile_path = Path(dockerfile_path)
 
@@ -30,35 +42,62 @@ class Docker:
         if build_args:
             full_build_args.update(build_args)
 
-        logger.debug(f"Building image: {tag}")
-        logger.debug(f"Context dir: {context_path}")
-        logger.debug(f"Dockerfile: {dockerfile_path}")
-        logger.debug(f"Build args: {full_build_args}")
+        log.debug(f"Building image: {tag}")
+        log.debug(f"Context dir: {context_path}")
+        log.debug(f"Dockerfile: {dockerfile_path}")
+        log.debug(f"Build args: {full_build_args}")
+
+        try:
+            context = BuildContext.from_dockerfile(context_path, dockerfile_path)
+        except (OSError, ValueError) as e:
+            error_handler.handle_error(f"Could not assemble the build context for {tag}", e, fatal=False)
+            return False
+        context_size = context.size()
+        log.debug(f"Context: {len(context.files)} entries, {context_size} bytes")
+        pipeline.record(nbytes=context_size)
 
         try:
             image, logs = self.client.images.build(
-                path=context_path,
-                dockerfile=str(dockerfile_path),
+                fileobj=context.stream(),
+                custom_context=True,
+                dockerfile=context.dockerfile,
                 tag=tag,
                 buildargs=full_build_args,
                 rm=True,
                 pull=False,
+                labels=labels,
             )
             for chunk in logs:
-                if "stream" in chunk:
-                    logger.debug(chunk["stream"].strip())
-            logger.info(f"Built image '{tag}' successfully")
+                if "stream" in chunk and chunk["stream"].strip():
+                    log.info(chunk["stream"].strip())
+            log.info(f"Built image '{tag}' successfully")
             return True
         except docker_errors.BuildError as e:
             for line in e.build_log:
-                if "stream" in line:
-                    logger.error(line["stream"].strip())
-            error_handler.handle_error("Docker build failed", e)
+                if "stream" in line and line["stream"].strip():
+                    log.error(line["stream"].strip())
+            error_handler.handle_error(f"Docker build failed for {tag}", e, fatal=False)
             return False
         except docker_errors.APIError as e:
-            error_handler.handle_error("Docker API error during build", e)
+            error_handler.handle_error(f"Docker API error during build of {tag}", e, fatal=False)
             return False
 
+    def image_labels(self, tag: str) -> Optional[Dict[str, str]]:
+        """Labels of a local image, or None if there is no such image."""
+        try:
+            return self.client.images.get(tag).labels or {}
+        except docker_errors.ImageNotFound:
+            return None
+        except docker_errors.APIError as e:
+            logger.debug(f"Could not inspect image {tag}: {e}")
+            return None
+
+    def image_id(self, tag: str) -> Optional[str]:
+        try:
+            return self.client.images.get(tag).id
+        except (docker_errors.ImageNotFound, docker_errors.APIError):
+            return None
+
     def run_container(
         self,
         image: str,
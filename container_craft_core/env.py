@@ -18,6 +18,30 @@ BASE_DEFAULTS = {
     "MC_BUILD_DIR": os.path.join(os.getcwd(), "build"),
     "VELOCITY_FILES": "",
 
+    # Build cache
+    "MC_CACHE_MODE": "flat",
+    "MC_CACHE_HASH": "sha512",
+    "MC_CACHE_MAX_SIZE": None,
+    "MC_CACHE_TTL": None,
+    "MC_HTTP_CACHE_TTL": "3600",
+    "MC_ARTIFACT_LINK": "auto",
+
+    # Modloader metadata sources
+    "MC_LOADER_META_TTL": "86400",
+    "MC_FABRIC_META_URL": "https://meta.fabricmc.net",
+    "MC_FORGE_MAVEN_URL": "https://maven.minecraftforge.net",
+    "MC_FORGE_FILES_URL": "https://files.minecraftforge.net",
+    "MC_NEOFORGE_MAVEN_URL": "https://maven.neoforged.net/releases",
+    "MC_PAPER_FILL_URL": "https://fill.papermc.io",
+    "MC_MOJANG_META_URL": "https://piston-meta.mojang.com",
+
+    # Config loading
+    "MC_CONFIG_CACHE": "on",
+
+    # Git layers
+    "MC_LAYER_CHECKOUT": "full",
+    "MC_LAYER_MIRROR_DIR": None,
+
     # Optional
     "SSH_PRIVATE_KEY": None,
 
@@ -34,6 +58,8 @@ def derived_defaults(work_dir: str, build_dir: str) -> Dict[str, str]:
     return {
         "MC_DOWNLOADS_DIR": os.path.join(build_dir, "downloads"),
         "MC_CACHE_DIR": os.path.join(build_dir, "cache"),
+        "MC_REPO_DIR": os.path.join(build_dir, "cache", "repo"),
+        "MC_INDEX_DIR": os.path.join(build_dir, "cache", "index"),
         "MC_LAYERS_DIR": os.path.join(build_dir, "layers"),
         "MC_CONFIG": os.path.join(work_dir, ".config.yml"),
     }
@@ -41,6 +67,8 @@ def derived_defaults(work_dir: str, build_dir: str) -> Dict[str, str]:
 ALL_KNOWN_VARS = set(BASE_DEFAULTS.keys()) | {
     "MC_DOWNLOADS_DIR",
     "MC_CACHE_DIR",
+    "MC_REPO_DIR",
+    "MC_INDEX_DIR",
     "MC_LAYERS_DIR",
     "MC_CONFIG",
 }
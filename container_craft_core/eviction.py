@@ -0,0 +1,247 @@
+import os
+import re
+import json
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, List, Set, Iterable, Dict, Tuple
+
+from container_craft_core.cache import Cache, cache as default_cache
+from container_craft_core.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Bookkeeping files the evictor must never remove.
+PROTECTED_NAMES = {"index.json", "access.json", "digests.json"}
+PROTECTED_SUFFIXES = ("_packagegroup.json", ".mcpkg")
+
+SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+
+def parse_size(value: Optional[str]) -> Optional[int]:
+    """Parse sizes the way MC_MEMORY is written: '512M', '20G', '1048576'."""
+    if value is None or str(value).strip() == "":
+        return None
+    match = re.match(r"^(\d+(?:\.\d+)?)\s*([KMGT]?)(?:I?B)?$", str(value).strip().upper())
+    if not match:
+        raise ValueError(f"Invalid size '{value}'")
+    number, unit = match.groups()
+    return int(float(number) * SIZE_UNITS[unit])
+
+
+@dataclass
+class EvictionPolicy:
+    """
+    max_bytes: evict least recently used entries until the cache fits
+    ttl_seconds: evict entries not used for this long
+    Either may be None to disable that rule.
+    """
+    max_bytes: Optional[int] = None
+    ttl_seconds: Optional[float] = None
+
+    @classmethod
+    def from_env(cls, env) -> "EvictionPolicy":
+        ttl_days = env.get("MC_CACHE_TTL")
+        return cls(
+            max_bytes=parse_size(env.get("MC_CACHE_MAX_SIZE")),
+            ttl_seconds=float(ttl_days) * 86400 if ttl_days else None,
+        )
+
+
+@dataclass
+class CacheEntry:
+    """
+    One path in the cache. Hardlinks of the same file (blob store, repo
+    dir, build dirs) are separate entries sharing an inode; links is the
+    file's st_nlink when scanned.
+    """
+    path: Path
+    size: int
+    last_access: float
+    pinned: bool = False
+    inode: Optional[Tuple[int, int]] = None
+    links: int = 1
+
+    @property
+    def key(self):
+        return self.inode or str(self.path)
+
+
+def disk_usage(entries: Iterable[CacheEntry]) -> int:
+    """Bytes used by entries, counting each hardlinked file once."""
+    return sum({e.key: e.size for e in entries}.values())
+
+
+@dataclass
+class GcReport:
+    removed: List[Path] = field(default_factory=list)
+    bytes_reclaimed: int = 0
+    bytes_remaining: int = 0
+    pinned: int = 0
+    dry_run: bool = False
+
+    def summary(self) -> str:
+        verb = "Would reclaim" if self.dry_run else "Reclaimed"
+        return (
+            f"{verb} {format_size(self.bytes_reclaimed)} from {len(self.removed)} entries, "
+            f"{format_size(self.bytes_remaining)} remaining ({self.pinned} pinned)"
+        )
+
+
+def format_size(size: int) -> str:
+    for unit in ("B", "K", "M", "G"):
+        if size < 1024:
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}T"
+
+
+class CacheEvictor:
+    """
+    Size and age bounded eviction over MC_CACHE_DIR and MC_REPO_DIR.
+
+    Last access comes from the Cache access log (written at exit, never on the
+    hot path) and falls back to the file mtime. Anything referenced by a
+    *_packagegroup.json in the repo dir is pinned and never evicted.
+    """
+
+    def __init__(self, cache: Optional[Cache] = None, policy: Optional[EvictionPolicy] = None):
+        self.cache = cache or default_cache
+        self.env = self.cache.env
+        self.policy = policy or EvictionPolicy.from_env(self.env)
+        self.repo_dir = self.env.get_path("MC_REPO_DIR")
+
+    def roots(self) -> List[Path]:
+        roots = []
+        for root in (self.cache.cache_dir, self.repo_dir):
+            root = Path(os.path.abspath(root))
+            if root.exists() and not any(root == r or r in root.parents for r in roots):
+                roots.append(root)
+        return roots
+
+    def pinned_refs(self) -> Set[str]:
+        """File names and digests referenced by every packagegroup in the repo dir."""
+        refs: Set[str] = set()
+        if not self.repo_dir.exists():
+            return refs
+        for group in self.repo_dir.rglob("*_packagegroup.json"):
+            try:
+                entries = json.loads(group.read_text())
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping unreadable packagegroup {group}: {e}")
+                continue
+            for entry in entries if isinstance(entries, list) else []:
+                for key in ("file_name", "sha", "sha512"):
+                    if entry.get(key):
+                        refs.add(entry[key])
+        logger.debug(f"Pinned {len(refs)} references from packagegroups")
+        return refs
+
+    def scan(self) -> List[CacheEntry]:
+        access = self.cache.load_access()
+        access.update(self.cache._access)
+        pinned = self.pinned_refs()
+        tmp_dir = Path(os.path.abspath(self.cache.tmp_dir))
+        # the package index (mcpkg update) is metadata, not cached content
+        index_dir = Path(os.path.abspath(self.env.get_path("MC_INDEX_DIR")))
+
+        entries = []
+        for root in self.roots():
+            for dirpath, _, filenames in os.walk(root):
+                if Path(dirpath) == tmp_dir or Path(dirpath) == index_dir or index_dir in Path(dirpath).parents:
+                    continue
+                for name in filenames:
+                    if name in PROTECTED_NAMES or name.endswith(PROTECTED_SUFFIXES):
+                        continue
+                    path = Path(dirpath) / name
+                    try:
+                        st = path.stat()
+                    except OSError:
+                        continue
+                    entries.append(CacheEntry(
+                        path=path,
+                        size=st.st_size,
+                        last_access=max(access.get(str(path), 0.0), st.st_mtime),
+                        pinned=name in pinned,
+                        inode=(st.st_dev, st.st_ino),
+                        links=st.st_nlink,
+                    ))
+        return entries
+
+    def collect(self, entries: Iterable[CacheEntry], now: Optional[float] = None) -> List[CacheEntry]:
+        """
+        Pick the entries the policy evicts: expired first, then LRU over
+        budget. For the budget the links of a file are one unit, used last
+        when any of them was, and never evicted if any of them is pinned;
+        a file's size is counted once however many links it has.
+        """
+        now = now or time.time()
+        entries = list(entries)
+        victims = []
+
+        if self.policy.ttl_seconds is not None:
+            cutoff = now - self.policy.ttl_seconds
+            victims = [e for e in entries if not e.pinned and e.last_access < cutoff]
+
+        if self.policy.max_bytes is not None:
+            chosen = {id(e) for e in victims}
+            kept = [e for e in entries if id(e) not in chosen]
+            total = disk_usage(kept)
+            files: Dict[object, List[CacheEntry]] = {}
+            for entry in kept:
+                files.setdefault(entry.key, []).append(entry)
+            candidates = sorted(
+                (links for links in files.values() if not any(e.pinned for e in links)),
+                key=lambda links: max(e.last_access for e in links),
+            )
+            for links in candidates:
+                if total <= self.policy.max_bytes:
+                    break
+                victims.extend(links)
+                total -= links[0].size
+
+        return victims
+
+    def gc(self, dry_run: bool = False) -> GcReport:
+        self.cache.flush_access()
+        entries = self.scan()
+        victims = self.collect(entries)
+        report = GcReport(dry_run=dry_run, pinned=sum(1 for e in entries if e.pinned))
+
+        blobs_dir = Path(os.path.abspath(self.cache.blobs_dir))
+        # links left per file, to count its bytes only when the last one goes
+        links = {e.key: e.links for e in entries}
+        for entry in victims:
+            logger.debug(f"Evicting {entry.path} ({format_size(entry.size)})")
+            if not dry_run:
+                try:
+                    links[entry.key] = entry.path.stat().st_nlink
+                    entry.path.unlink()
+                except OSError as e:
+                    logger.warning(f"Failed to evict {entry.path}: {e}")
+                    continue
+                if blobs_dir in entry.path.parents:
+                    self.cache.unlink_digest(entry.path.name)
+                    self._prune_empty(entry.path.parent, blobs_dir)
+            report.removed.append(entry.path)
+            if links[entry.key] == 1:
+                report.bytes_reclaimed += entry.size
+            links[entry.key] -= 1
+
+        removed = {str(p) for p in report.removed}
+        report.bytes_remaining = disk_usage(e for e in entries if str(e.path) not in removed)
+        if not dry_run and report.removed:
+            access = self.cache.load_access()
+            self.cache.save_access({k: v for k, v in access.items() if k not in removed})
+
+        logger.info(report.summary())
+        return report
+
+    @staticmethod
+    def _prune_empty(directory: Path, stop: Path):
+        while directory != stop and stop in directory.parents:
+            try:
+                directory.rmdir()
+            except OSError:
+                return
+            directory = directory.parent
@@ -28,6 +28,16 @@ def get_logger(category: str) -> logging.Logger:
     _logger_cache[category] = logger
     return logger
 
+class PrefixAdapter(logging.LoggerAdapter):
+    """Prefixes every message, e.g. with the server name when builds run in parallel."""
+
+    def process(self, msg, kwargs):
+        return f"[{self.extra['prefix']}] {msg}", kwargs
+
+
+def prefixed(base: logging.Logger, prefix: str) -> PrefixAdapter:
+    return PrefixAdapter(base, {"prefix": prefix})
+
 # Default/base logger used when no specific category is passed
 logger = get_logger("[CONTAINER_CRAFT] ")
 core_logger = get_logger("[Core] ")
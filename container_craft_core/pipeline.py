@@ -0,0 +1,171 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Union, Iterator
+
+from container_craft_core.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Build stages in pipeline order; "context" and "layers" run once per build.
+STAGES = ("context", "layers", "resolve", "fetch", "stage", "render", "build")
+GLOBAL = "*"
+
+
+class BuildReport:
+    """
+    Wall-clock time, bytes moved and cache hits/misses per server and stage
+    of one build run. Stages are timed with `with report.stage(server, name)`
+    (or the module level stage() inside a scope()); the numbers go out as a
+    JSON report and, optionally, a Chrome trace (chrome://tracing, Perfetto)
+    with one track per server.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        self.servers: Dict[str, Dict[str, Dict[str, float]]] = {}
+        self.results: Dict[str, str] = {}
+        self.events: List[Dict[str, Any]] = []
+
+    def _stats(self, server: str, name: str) -> Dict[str, float]:
+        return self.servers.setdefault(server, {}).setdefault(
+            name, {"seconds": 0.0, "bytes": 0, "hits": 0, "misses": 0}
+        )
+
+    @contextmanager
+    def stage(self, server: str, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                self._stats(server, name)["seconds"] += end - start
+                self.events.append({
+                    "name": name, "cat": "build", "ph": "X", "pid": os.getpid(), "tid": server,
+                    "ts": round((start - self._t0) * 1e6), "dur": round((end - start) * 1e6),
+                })
+
+    def record(self, server: str, name: str, nbytes: int = 0, hits: int = 0, misses: int = 0):
+        with self._lock:
+            stats = self._stats(server, name)
+            stats["bytes"] += nbytes
+            stats["hits"] += hits
+            stats["misses"] += misses
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            stages: Dict[str, Dict[str, float]] = {}
+            for per_stage in self.servers.values():
+                for name, stats in per_stage.items():
+                    total = stages.setdefault(name, {"seconds": 0.0, "bytes": 0, "hits": 0, "misses": 0})
+                    for key, value in stats.items():
+                        total[key] += value
+            for stats in stages.values():
+                lookups = stats["hits"] + stats["misses"]
+                stats["hit_ratio"] = round(stats["hits"] / lookups, 3) if lookups else None
+            servers = {
+                server: {
+                    "result": self.results.get(server),
+                    "seconds": round(sum(s["seconds"] for s in per_stage.values()), 3),
+                    "stages": per_stage,
+                }
+                for server, per_stage in self.servers.items()
+            }
+            return {
+                "started": self.started,
+                "wall_seconds": round(time.perf_counter() - self._t0, 3),
+                "stages": {name: stages[name] for name in sorted(stages, key=_stage_order)},
+                "servers": dict(sorted(servers.items(), key=lambda item: -item[1]["seconds"])),
+            }
+
+    def write_json(self, path: Union[str, Path]):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.as_dict(), indent=2) + "\n")
+        logger.info(f"Wrote build report: {path}")
+
+    def write_trace(self, path: Union[str, Path]):
+        """Chrome trace event format; each server gets its own named track."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            tracks = {server: i for i, server in enumerate(sorted({e["tid"] for e in self.events}))}
+            events = [{**e, "tid": tracks[e["tid"]]} for e in self.events]
+        events += [
+            {"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": server}}
+            for server, tid in tracks.items()
+        ]
+        path.write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}))
+        logger.info(f"Wrote build trace: {path}")
+
+    def summary(self) -> List[str]:
+        data = self.as_dict()
+        lines = [f"Build took {data['wall_seconds']:.1f}s"]
+        for name, stats in data["stages"].items():
+            ratio = f", {stats['hit_ratio']:.0%} cache hits" if stats["hit_ratio"] is not None else ""
+            lines.append(f"  {name:<8} {stats['seconds']:8.2f}s {_size(stats['bytes']):>10}{ratio}")
+        slowest = [s for s in data["servers"] if s != GLOBAL][:3]
+        if slowest:
+            lines.append("  slowest: " + ", ".join(f"{s} ({data['servers'][s]['seconds']:.1f}s)" for s in slowest))
+        return lines
+
+
+def _stage_order(name: str):
+    return (STAGES.index(name) if name in STAGES else len(STAGES), name)
+
+
+def _size(nbytes: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if nbytes < 1024 or unit == "GiB":
+            return f"{nbytes:.0f} {unit}" if unit == "B" else f"{nbytes:.1f} {unit}"
+        nbytes /= 1024
+    return f"{nbytes} B"
+
+
+# The report and server a build thread is working for, so code deep in the
+# build (artifact store, docker, modloaders) can time and count its work
+# without passing the report around.
+_current = threading.local()
+
+
+@contextmanager
+def scope(report: Optional[BuildReport], server: str) -> Iterator[None]:
+    previous = getattr(_current, "scope", None)
+    _current.scope = (report, server) if report is not None else None
+    try:
+        yield
+    finally:
+        _current.scope = previous
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time the enclosed block as stage name of the current server; a no-op outside a scope."""
+    current = getattr(_current, "scope", None)
+    if current is None:
+        yield
+        return
+    report, server = current
+    previous = getattr(_current, "stage", None)
+    _current.stage = name
+    try:
+        with report.stage(server, name):
+            yield
+    finally:
+        _current.stage = previous
+
+
+def record(nbytes: int = 0, hits: int = 0, misses: int = 0, name: Optional[str] = None):
+    """Count bytes and cache hits/misses against the current (or named) stage."""
+    current = getattr(_current, "scope", None)
+    name = name or getattr(_current, "stage", None)
+    if current is None or name is None:
+        return
+    report, server = current
+    report.record(server, name, nbytes, hits, misses)
@@ -1,7 +1,9 @@
 import subprocess
 import os
-from container_craft_core.env import ContainerCraftEnv
-from container_craft_core.error_handling import error_handler
+import threading
+from typing import Dict
+from container_craft_core.env import ContainerCraftEnv, env as default_env
+from container_craft_core.error_handler import error_handler
 from container_craft_core.logger import get_logger
 
 logger = get_logger("ssh_agent")
@@ -13,8 +15,16 @@ class SSHAgent:
         self.ssh_auth_sock = self.env.get("SSH_AUTH_SOCK")
         self.ssh_agent_pid = self.env.get("SSH_AGENT_PID")
         self.ssh_askpass = self.env.get("SSH_ASKPASS")
+        # One agent and one ssh-add per key per process, even when several
+        # layer checkouts start at once.
+        self._lock = threading.RLock()
+        self._keys = set()
 
     def start(self):
+        with self._lock:
+            self._start()
+
+    def _start(self):
         if self.ssh_auth_sock and self.ssh_agent_pid:
             logger.debug("SSH agent already running via env — skipping start")
             return
@@ -31,11 +41,25 @@ class SSHAgent:
                 os.environ[key] = value
                 logger.debug(f"Exported {key}={value}")
 
+        self.ssh_auth_sock = os.environ.get("SSH_AUTH_SOCK")
+        self.ssh_agent_pid = os.environ.get("SSH_AGENT_PID")
         self.agent_process = True
 
+    def environ(self) -> Dict[str, str]:
+        """The variables git/ssh subprocesses need to reach this agent."""
+        return {
+            k: v for k, v in (("SSH_AUTH_SOCK", self.ssh_auth_sock), ("SSH_AGENT_PID", self.ssh_agent_pid)) if v
+        }
+
     def add_key(self, key_path: str):
-        self.start()
+        with self._lock:
+            if key_path in self._keys:
+                return
+            self._start()
+            self._add_key(key_path)
+            self._keys.add(key_path)
 
+    def _add_key(self, key_path: str):
         logger.debug(f"Adding SSH key: {key_path}")
         env = os.environ.copy()
         if self.ssh_askpass:
@@ -54,5 +78,4 @@ class SSHAgent:
             self.agent_process = None
 
 
-# Global instance will be passed the default env at runtime if needed
-ssh_agent = None
+ssh_agent = SSHAgent(default_env)
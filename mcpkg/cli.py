@@ -3,6 +3,9 @@ import argparse
 from container_craft_core.logger import logger
 
 from mcpkg.commands.search import search
+from mcpkg.commands.update import update
+from mcpkg.commands.install import install
+from mcpkg.commands.upgrade import upgrade
 
 # All supported top-level commands
 COMMANDS = {
@@ -27,6 +30,16 @@ def parse_commands():
     search_parser = command_parser.add_parser("search", help="Search for mods from a provider")    
     search.args(search_parser)
 
+    # --- update subcommand ---
+    update_parser = command_parser.add_parser("update", help="Update the local package index")
+    update.args(update_parser)
+
+    # --- install / upgrade subcommands ---
+    install_parser = command_parser.add_parser("install", help="Resolve, lock and download mods")
+    install.args(install_parser)
+    upgrade_parser = command_parser.add_parser("upgrade", help="Re-resolve locked mods against the local index")
+    upgrade.args(upgrade_parser)
+
 
 
 
@@ -34,11 +47,8 @@ def parse_commands():
 
     # --- other stubs ---
     command_parser.add_parser("create", help="Create a repo or package (TODO).")
-    command_parser.add_parser("install", help="Install a package (TODO).")
     command_parser.add_parser("list", help="List packages (TODO).")
     command_parser.add_parser("remove", help="Remove a package (TODO).")
-    command_parser.add_parser("update", help="Update package metadata (TODO).")
-    command_parser.add_parser("upgrade", help="Upgrade packages (TODO).")
     command_parser.add_parser("verify", help="Verify signatures (TODO).")
 
 
@@ -46,7 +56,16 @@ def parse_commands():
     args = parser.parse_args()
     if args.command == "search":
         return search.run(search_parser)
-    
+
+    elif args.command == "update":
+        return update.run(args)
+
+    elif args.command == "install":
+        return install.run(args)
+
+    elif args.command == "upgrade":
+        return upgrade.run(args)
+
     elif args.command in COMMANDS:
         logger.warning(f"Command '{args.command}' not yet implemented.")
         parser.print_help()
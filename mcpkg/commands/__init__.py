@@ -1,2 +1,5 @@
 from .search import search
+from .update import update
+from .install import install
+from .upgrade import upgrade
 from .mcpkg_abstract_commands import McPkgAbstractCommands
@@ -0,0 +1,256 @@
+from pathlib import Path
+from typing import Optional, Dict, List, Tuple
+
+from container_craft_core.logger import mcpkg_logger
+from container_craft_core.config.context import context
+from container_craft_core.env import env
+
+from mcpkg.commands.mcpkg_abstract_commands import McPkgAbstractCommands
+from mcpkg.commands.search import SearchCommand
+from mcpkg.fetch import FetchEngine
+from mcpkg.index import package_index
+from mcpkg.lockfile import Lockfile, LOCKFILE_NAME, entries_from_packagegroup
+from mcpkg.mcpkg_entry import McPkgEntry
+from mcpkg.resolver import Requirement, ResolutionError, resolver
+
+# server name -> (mc_version, loader, requirements)
+ServerRequirements = Dict[str, Tuple[str, str, List[Requirement]]]
+
+
+class InstallCommand(McPkgAbstractCommands):
+    """
+    Resolve mods and their dependencies from the local index, write the
+    lockfile and download every resolved file into MC_REPO_DIR.
+
+        mcpkg install --mod sodium --version 1.21.8
+        mcpkg install servers.yml
+        mcpkg install --locked [servers.yml]
+        mcpkg install --packagegroup build/cache/repo/my_server_packagegroup.json
+
+    Requirements already in the lockfile keep their locked solution, so
+    only new or changed mods are resolved. --locked and --packagegroup
+    skip the index and the provider APIs entirely: files are downloaded
+    straight from the recorded URLs and checked against the recorded hash.
+    """
+
+    def __init__(self):
+        self.env = env
+
+    @staticmethod
+    def args(subparser):
+        subparser.add_argument(
+            "-p", "--provider",
+            help="Provider of --mod (modrith(default), curse_forge, hangar)",
+            type=str,
+            default="modrith"
+        )
+        subparser.add_argument(
+            "-m", "--mod",
+            help="Slug of the mod, optionally pinned as slug@version",
+            type=str,
+            default=None
+        )
+        subparser.add_argument(
+            "-v", "--version",
+            help="Minecraft version (default: MC_VERSION)",
+            type=str,
+            default=None
+        )
+        subparser.add_argument(
+            "-l", "--loader",
+            help="ModLoader (default: MC_LOADER)",
+            type=str,
+            default=None
+        )
+        subparser.add_argument(
+            "--lockfile",
+            help=f"Lockfile to read and write (default: $MC_WORK_DIR/{LOCKFILE_NAME})",
+            type=str,
+            default=None
+        )
+        subparser.add_argument(
+            "--locked",
+            help="Install exactly what the lockfile records, without resolving",
+            action="store_true"
+        )
+        subparser.add_argument(
+            "--packagegroup",
+            help="Install the files recorded in a *_packagegroup.json (implies --locked, repeatable)",
+            action="append",
+            default=[]
+        )
+        subparser.add_argument(
+            "--optional",
+            help="Also install optional dependencies",
+            action="store_true"
+        )
+        subparser.add_argument(
+            "config_file",
+            nargs="*",
+            help="YAML or JSON config file",
+            type=str,
+            default=[]
+        )
+
+    def lockfile_path(self, opts) -> Path:
+        return Path(opts.lockfile) if opts.lockfile else self.env.get_path("MC_WORK_DIR") / LOCKFILE_NAME
+
+    def requirements(self, opts) -> Optional[ServerRequirements]:
+        """Requirements per server from the config files, or from --mod."""
+        mc_version = opts.version or self.env.get("MC_VERSION")
+        loader = opts.loader or self.env.get("MC_LOADER")
+
+        if not opts.config_file:
+            if not opts.mod:
+                mcpkg_logger.error("--mod must be set, or a config file must be provided.")
+                return None
+            if not mc_version:
+                mcpkg_logger.error("A Minecraft version is required (--version or MC_VERSION).")
+                return None
+            slug, _, pin = opts.mod.partition("@")
+            return {"default": (mc_version, loader, [Requirement(opts.provider, slug, pin or None)])}
+
+        context.set_config_paths(opts.config_file)
+        context.load()
+        mc_version = context.get("defaults", "env", "MC_VERSION") or mc_version
+        if not mc_version:
+            mcpkg_logger.error(
+                "A Minecraft version is required (defaults.env.MC_VERSION in the config, --version or MC_VERSION)."
+            )
+            return None
+
+        servers: ServerRequirements = {}
+        for server_name, server_entry in context.get("servers", default={}).items():
+            reqs = []
+            mod_groups = server_entry.get("mcpkg") or server_entry.get("mods") or {}
+            for provider, mods in mod_groups.items():
+                for mod_entry in mods:
+                    if isinstance(mod_entry, str):
+                        reqs.append(Requirement(provider, mod_entry))
+                    elif isinstance(mod_entry, dict):
+                        slug, spec = next(iter(mod_entry.items()))
+                        reqs.append(Requirement(provider, slug, (spec or {}).get("version")))
+                    else:
+                        mcpkg_logger.warning(f"Invalid mod entry: {mod_entry}")
+            servers[server_name] = (mc_version, server_entry.get("modloader") or loader, reqs)
+        return servers
+
+    def ensure_index(self, servers: ServerRequirements) -> bool:
+        """Build the local index for any provider/version/loader that has none yet."""
+        wanted = {
+            (req.provider, mc_version, loader)
+            for mc_version, loader, reqs in servers.values()
+            for req in reqs
+        }
+        success = True
+        for provider, mc_version, loader in sorted(wanted):
+            if package_index.exists(provider, mc_version, loader):
+                continue
+            mcpkg_logger.info(f"No local index for {provider} {mc_version} {loader}; updating")
+            client = SearchCommand._load_client(provider)
+            if client is None or not client.do_update(mc_version, loader):
+                success = False
+        return success
+
+    @staticmethod
+    def fetch(packages: List[McPkgEntry]) -> bool:
+        """
+        Download packages concurrently from their recorded source and check
+        each file's sha512. Files already in MC_REPO_DIR with the right hash
+        are not downloaded again. Only the recorded URLs are used, so no
+        provider API client (or API key) is needed.
+        """
+        engine = FetchEngine()
+        repo_dir = env.get_path("MC_REPO_DIR")
+
+        async def _fetch(pkg: McPkgEntry):
+            path = repo_dir / pkg.file_name
+            await engine.download_verified(pkg.provider or "download", pkg.source, path, pkg.sha512 or None)
+            return path
+
+        results = engine.run_jobs(lambda: [(f"{pkg.slug} {pkg.version}", _fetch(pkg)) for pkg in packages])
+        failed = [label for label, _, error in results if error is not None]
+        for label, _, error in results:
+            if error is not None:
+                mcpkg_logger.error(f"Failed to fetch {label}: {error}")
+        return not failed
+
+    def locked_roots(self, lock: Lockfile, server: str, mc_version: str, loader: str, opts) -> Dict[str, List[McPkgEntry]]:
+        return lock.locked_roots(server, mc_version, loader)
+
+    def locked_packages(self, opts) -> Optional[List[McPkgEntry]]:
+        """
+        Packages recorded by packagegroups or the lockfile. With a config or
+        --mod the lockfile must cover every requirement, like a CI install.
+        """
+        if opts.packagegroup:
+            packages = []
+            for path in opts.packagegroup:
+                try:
+                    packages.extend(entries_from_packagegroup(Path(path)))
+                except (OSError, ValueError, KeyError) as e:
+                    mcpkg_logger.error(f"Failed to read packagegroup {path}: {e}")
+                    return None
+            return packages
+
+        lock = Lockfile.load(self.lockfile_path(opts))
+        if not lock.exists():
+            mcpkg_logger.error(f"No lockfile at {lock.path}; run `mcpkg install` without --locked first.")
+            return None
+
+        server_names = list(lock.servers)
+        if opts.config_file or opts.mod:
+            servers = self.requirements(opts)
+            if servers is None:
+                return None
+            for server_name, (mc_version, loader, reqs) in servers.items():
+                roots = lock.locked_roots(server_name, mc_version, loader)
+                missing = [req.root_key for req in reqs if req.root_key not in roots]
+                if missing:
+                    mcpkg_logger.error(
+                        f"[{server_name}] Lockfile is out of date ({', '.join(missing)}); run `mcpkg install`."
+                    )
+                    return None
+            server_names = list(servers)
+
+        return [pkg for server_name in server_names for pkg in lock.packages(server_name)]
+
+    def run(self, opts) -> bool:
+        if opts.locked or opts.packagegroup:
+            packages = self.locked_packages(opts)
+            if packages is None:
+                return False
+            unique = {(pkg.provider, pkg.file_name): pkg for pkg in packages}
+            mcpkg_logger.info(f"Installing {len(unique)} locked packages")
+            return self.fetch(list(unique.values()))
+
+        servers = self.requirements(opts)
+        if servers is None:
+            return False
+        if not self.ensure_index(servers):
+            return False
+
+        lock = Lockfile.load(self.lockfile_path(opts))
+        packages: Dict[Tuple[str, str], McPkgEntry] = {}
+        for server_name, (mc_version, loader, reqs) in servers.items():
+            try:
+                resolution = resolver.resolve(
+                    reqs, mc_version, loader,
+                    locked=self.locked_roots(lock, server_name, mc_version, loader, opts),
+                    include_optional=opts.optional,
+                )
+            except ResolutionError as e:
+                mcpkg_logger.error(f"[{server_name}] {e}")
+                return False
+            for slug, by in sorted(resolution.optional.items()):
+                mcpkg_logger.info(f"[{server_name}] Optional: {slug} (suggested by {', '.join(sorted(by))})")
+            mcpkg_logger.info(f"[{server_name}] {len(resolution.packages)} packages ({loader} {mc_version})")
+            lock.update(server_name, resolution)
+            for pkg in resolution.packages.values():
+                packages[(pkg.provider, pkg.file_name)] = pkg
+
+        lock.save()
+        return self.fetch(list(packages.values()))
+
+
+install = InstallCommand()
@@ -2,13 +2,16 @@ import sys
 import importlib
 import argparse
 import os
-from typing import Optional
+from typing import Optional, Dict, List, Tuple
 
 from container_craft_core.logger import mcpkg_logger
 from container_craft_core.config.context import context
 from container_craft_core.env import env
 
 from mcpkg.commands.mcpkg_abstract_commands import McPkgAbstractCommands
+from mcpkg.fetch import FetchEngine
+from mcpkg.index import package_index
+from mcpkg.mcpkg_entry import McPkgEntry
 
 
 # from mcpkg.plugins.modrith import ModrinthClient
@@ -25,69 +28,98 @@ class SearchCommand(McPkgAbstractCommands):
         return {
             "modrith": "ModrinthClient",
             "curse_forge": "CurseForgeClient",
-            "hangar": "HangarClient",
+            "hangar": "HangerClient",
         }.get(name, "")
 
     @staticmethod
-    def _search_single(provider: str, package_name: str, version: Optional[str] = None) -> bool:
-        # print(f"Searching for '{package_name}' from provider '{provider}' (version={version})")
-
+    def _load_client(provider: str):
+        """Import the provider plugin and return a client instance, or None."""
         # this fails even though it is in the path
         try:
             plugin = importlib.import_module(f"mcpkg.plugins.{provider}")
         except ImportError:
             mcpkg_logger.error(f"Unknown provider '{provider}'.")
-            return False
+            return None
 
         provider_class_name = SearchCommand.provider_to_class(provider)
         if not hasattr(plugin, provider_class_name):
             mcpkg_logger.error(f"Provider plugin '{provider}' does not define expected class.")
-            return False
+            return None
 
         client_cls = getattr(plugin, provider_class_name)
-        client = client_cls()
+        try:
+            client = client_cls()
+        except Exception as e:
+            mcpkg_logger.error(f"Failed to initialise provider '{provider}': {e}")
+            return None
 
         if not hasattr(client, "do_search"):
             mcpkg_logger.error(f"Provider '{provider}' does not implement search().")
+            return None
+        return client
+
+    @staticmethod
+    def _print_result(results) -> bool:
+        if not results:
+            mcpkg_logger.info("No results found.")
+            return False
+        if isinstance(results, McPkgEntry):
+            print(f"\nFound: {results.name} ({results.version}) [index]")
+            print(f"  - MC Versions: {[results.mc_version]}")
+            print(f"  - Loaders: {[results.loader]}")
+            print(f"  - File: {results.file_name}")
+            print(f"  - Download: {results.source}")
+        elif isinstance(results, dict):
+            mod_name = results.get('name')
+            mod_version = results.get('version_number')  # Assuming version_number is what you want
+            game_versions = results.get('game_versions', [])
+            loaders = results.get('loaders', [])
+            author = results.get('author_id', 'Unknown')
+            file_name = None
+            download_url = None
+
+            # Accessing file details if available (the first file in 'files' list)
+            if results.get('files'):
+                file_data = results['files'][0]  # Assuming we want the first file
+                file_name = file_data.get('filename')
+                download_url = file_data.get('url')
+
+            # Print the found details
+            print(f"\nFound: {mod_name} ({mod_version})")
+            print(f"  - MC Versions: {game_versions}")
+            print(f"  - Loaders: {loaders}")
+            print(f"  - Author: {author}")
+            print(f"  - File: {file_name}")
+            print(f"  - Download: {download_url}")
+
+        return True  # Return after processing all results
+
+    @staticmethod
+    def _search_single(provider: str, package_name: str, version: Optional[str] = None) -> bool:
+        # print(f"Searching for '{package_name}' from provider '{provider}' (version={version})")
+        indexed = package_index.lookup(provider, package_name, version, env.get("MC_LOADER"))
+        if indexed is not None:
+            return SearchCommand._print_result(indexed)
+
+        client = SearchCommand._load_client(provider)
+        if client is None:
             return False
 
         try:
             results = client.do_search(package_name, version)
-            if not results:
-                mcpkg_logger.info("No results found.")
-                return False
-            if isinstance(results, dict):
-                mod_name = results.get('name')
-                mod_version = results.get('version_number')  # Assuming version_number is what you want
-                game_versions = results.get('game_versions', [])
-                loaders = results.get('loaders', [])
-                author = results.get('author_id', 'Unknown')
-                file_name = None
-                download_url = None
-
-                # Accessing file details if available (the first file in 'files' list)
-                if results.get('files'):
-                    file_data = results['files'][0]  # Assuming we want the first file
-                    file_name = file_data.get('filename')
-                    download_url = file_data.get('url')
-
-                # Print the found details
-                print(f"\nFound: {mod_name} ({mod_version})")
-                print(f"  - MC Versions: {game_versions}")
-                print(f"  - Loaders: {loaders}")
-                print(f"  - Author: {author}")
-                print(f"  - File: {file_name}")
-                print(f"  - Download: {download_url}")
-
-            return True  # Return after processing all results
+            return SearchCommand._print_result(results)
         except Exception as e:
             mcpkg_logger.error(f"Search failed for provider '{provider}': {e}")
             return False
 
     @staticmethod
     def _search_from_config(config_path: str) -> bool:
+        """
+        Resolve every mod of every server concurrently through the fetch
+        engine, bounded and rate limited per provider.
+        """
         mcpkg_logger.info(f"Loading config from {config_path}")
-        context.config_paths = config_path.split(":")
+        context.set_config_paths(config_path.split(":"))
         cfg = context.load()
 
         provider_blocks = context.get("servers", default={})
@@ -96,8 +128,9 @@ class SearchCommand(McPkgAbstractCommands):
             return False
 
         success = True
+        searches = []
         for server_name, server_entry in provider_blocks.items():
-            mcpkg_logger.info(f"Searching mods for server: {server_name}")
+            mcpkg_logger.info(f"Collecting mods for server: {server_name}")
             mod_groups = server_entry.get("mcpkg", {})
             for provider_key, mods in mod_groups.items():
                 for mod_entry in mods:
@@ -111,10 +144,71 @@ class SearchCommand(McPkgAbstractCommands):
                         mcpkg_logger.warning(f"Invalid mod entry: {mod_entry}")
                         success = False
                         continue
+                    searches.append((server_name, provider_key, mod_slug, mod_version))
 
-                    mcpkg_logger.info(f"→ Searching: {mod_slug} (provider: {provider_key}, version: {mod_version})")
-                    if not SearchCommand._search_single(provider_key, mod_slug, mod_version):
-                        success = False
+        # Same mod on several servers is only resolved once, and mods in the
+        # local index (mcpkg update) are not resolved over the network at all
+        unique = []
+        loader = env.get("MC_LOADER")
+        for p, slug, ver in dict.fromkeys((p, slug, ver) for _, p, slug, ver in searches):
+            indexed = package_index.lookup(p, slug, ver, loader)
+            if indexed is None:
+                unique.append((p, slug, ver))
+            elif not SearchCommand._print_result(indexed):
+                success = False
+        if not unique:
+            return success
+
+        engine = FetchEngine()
+        clients = {}
+        for provider_key in dict.fromkeys(p for p, _, _ in unique):
+            client = SearchCommand._load_client(provider_key)
+            if client is None:
+                success = False
+                continue
+            client.register(engine)
+            clients[provider_key] = client
+
+        # Providers with a bulk API resolve each (provider, version) batch in a
+        # handful of requests; the rest get one job per mod.
+        batches: Dict[Tuple[str, str], List[str]] = {}
+        singles = []
+        for p, slug, ver in unique:
+            if p not in clients:
+                continue
+            if hasattr(clients[p], "resolve_many_async"):
+                batches.setdefault((p, ver), []).append(slug)
+            else:
+                singles.append((p, slug, ver))
+
+        mcpkg_logger.info(f"Resolving {len(unique)} mods across {len(clients)} providers")
+        results = engine.run_jobs(lambda: [
+            (f"{len(slugs)} mods (provider: {p}, version: {ver})", clients[p].resolve_many_async(engine, slugs, ver))
+            for (p, ver), slugs in batches.items()
+        ] + [
+            (f"{slug} (provider: {p}, version: {ver})", clients[p].do_search_async(engine, slug, ver))
+            for p, slug, ver in singles
+        ])
+
+        batch_results, single_results = results[:len(batches)], results[len(batches):]
+        for ((p, ver), slugs), (label, resolved, error) in zip(batches.items(), batch_results):
+            if error is not None:
+                mcpkg_logger.error(f"Search failed for {label}: {error}")
+                success = False
+                continue
+            for slug in slugs:
+                if slug not in resolved:
+                    mcpkg_logger.error(f"No matching version found for {slug} (provider: {p}, version: {ver})")
+                    success = False
+                elif not SearchCommand._print_result(resolved[slug]):
+                    success = False
+
+        for (p, slug, ver), (label, result, error) in zip(singles, single_results):
+            if error is not None:
+                mcpkg_logger.error(f"Search failed for {label}: {error}")
+                success = False
+            elif not SearchCommand._print_result(result):
+                success = False
 
         return success
 
@@ -166,9 +260,9 @@ class SearchCommand(McPkgAbstractCommands):
 
         # os.environ['MC_LOADER'] = opts.loader
         # mcpkg_logger.debug(f" ")
-        resoved_config = None
-        if opts.config_file[0] == "search":
-            resolved_config = opts.config_file[1:]  # Shift left if 'search' is the first arg
+        resolved_config = opts.config_file
+        if resolved_config and resolved_config[0] == "search":
+            resolved_config = resolved_config[1:]  # Shift left if 'search' is the first arg
 
         # No arguments provided
         if not any(vars(opts).values()):
@@ -178,7 +272,7 @@ class SearchCommand(McPkgAbstractCommands):
 
         # Config-based search
         if resolved_config:
-            return SearchCommand._search_from_config(resolved_config)
+            return SearchCommand._search_from_config(":".join(resolved_config))
 
         # Direct provider/mod search
         if not opts.mod:
@@ -0,0 +1,77 @@
+from typing import Optional
+
+from container_craft_core.logger import mcpkg_logger
+from container_craft_core.env import env
+
+from mcpkg.commands.mcpkg_abstract_commands import McPkgAbstractCommands
+from mcpkg.commands.search import SearchCommand
+from mcpkg.index import package_index
+
+
+class UpdateCommand(McPkgAbstractCommands):
+    """
+    Refresh the local package index, much like apt update.
+
+        mcpkg update
+        mcpkg update --provider modrith --version 1.21.8 --loader fabric
+        mcpkg update --full
+
+    After the first run only mods changed since the provider's sync cursor
+    are fetched and appended to the index as a delta segment.
+    """
+
+    def __init__(self):
+        self.env = env
+
+    @staticmethod
+    def args(subparser):
+        subparser.add_argument(
+            "-p", "--provider",
+            help="Provider(s) to index, comma separated (modrith(default))",
+            type=str,
+            default="modrith"
+        )
+        subparser.add_argument(
+            "-v", "--version",
+            help="Minecraft version to index (default: MC_VERSION)",
+            type=str,
+            default=None
+        )
+        subparser.add_argument(
+            "-l", "--loader",
+            help="ModLoader to index (default: MC_LOADER)",
+            type=str,
+            default=None
+        )
+        subparser.add_argument(
+            "--full",
+            help="Ignore the sync cursor and rebuild the index from scratch",
+            action="store_true"
+        )
+
+    def run(self, opts) -> bool:
+        version: Optional[str] = opts.version or self.env.get("MC_VERSION")
+        if not version:
+            mcpkg_logger.error("--version must be set, or MC_VERSION exported.")
+            return False
+        loader: str = opts.loader or self.env.get("MC_LOADER")
+
+        success = True
+        for provider in [p.strip() for p in opts.provider.split(",") if p.strip()]:
+            client = SearchCommand._load_client(provider)
+            if client is None:
+                success = False
+                continue
+            if opts.full:
+                package_index.reset(client.name(), version, loader)
+            try:
+                if not client.do_update(version, loader):
+                    success = False
+            except Exception as e:
+                mcpkg_logger.error(f"Update failed for provider '{provider}': {e}")
+                success = False
+        package_index.wait()
+        return success
+
+
+update = UpdateCommand()
@@ -0,0 +1,36 @@
+from typing import Dict, List
+
+from container_craft_core.logger import mcpkg_logger
+from mcpkg.commands.install import InstallCommand
+from mcpkg.lockfile import Lockfile
+from mcpkg.mcpkg_entry import McPkgEntry
+
+
+class UpgradeCommand(InstallCommand):
+    """
+    Like install, but re-resolve requirements against the local index
+    instead of keeping their locked solutions, much like apt upgrade.
+
+        mcpkg upgrade servers.yml
+        mcpkg upgrade --mod sodium servers.yml    only re-resolve sodium
+    """
+
+    def locked_roots(self, lock: Lockfile, server: str, mc_version: str, loader: str, opts) -> Dict[str, List[McPkgEntry]]:
+        if not opts.config_file or not opts.mod:
+            return {}
+        # upgrade the requirements naming --mod, keep every other locked solution
+        slug = opts.mod.partition("@")[0]
+        return {
+            key: closure
+            for key, closure in lock.locked_roots(server, mc_version, loader).items()
+            if key.split(":", 1)[1].rsplit("@", 1)[0] != slug
+        }
+
+    def run(self, opts) -> bool:
+        if opts.locked or opts.packagegroup:
+            mcpkg_logger.error("upgrade re-resolves the lockfile; --locked/--packagegroup only apply to install.")
+            return False
+        return super().run(opts)
+
+
+upgrade = UpgradeCommand()
@@ -0,0 +1,305 @@
+import os
+import time
+import random
+import asyncio
+import tempfile
+import httpx
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Dict, List, Any, Iterable, Tuple, Awaitable, Callable
+
+from container_craft_core.logger import mcpkg_logger
+from container_craft_core.cache import MultiHasher, DEFAULT_ALGORITHMS, publish_file, cache
+from mcpkg.http_cache import HttpCache, http_cache as default_http_cache
+
+# Status codes worth retrying: rate limited or a transient server error.
+RETRY_STATUS = {429, 500, 502, 503, 504}
+USER_AGENT = "mcpkg/0.1 (https://github.com/container-craft/container_craft)"
+
+
+@dataclass
+class ProviderLimits:
+    base_url: str = ""
+    headers: Optional[Dict[str, str]] = None
+    concurrency: int = 8
+    rate_limit_interval: float = 0.0
+
+
+class Progress:
+    """Counts finished jobs and logs one line per job: [12/150] label."""
+
+    def __init__(self, total: int, callback: Optional[Callable[[int, int, str, bool], None]] = None):
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self.callback = callback
+
+    def advance(self, label: str, ok: bool = True):
+        self.done += 1
+        if not ok:
+            self.failed += 1
+        mcpkg_logger.info(f"[{self.done}/{self.total}] {'ok' if ok else 'FAILED'}: {label}")
+        if self.callback:
+            self.callback(self.done, self.total, label, ok)
+
+
+class _Retry(Exception):
+    """Raised inside a download to retry on a retryable status code."""
+
+    def __init__(self, response: httpx.Response):
+        super().__init__(f"HTTP {response.status_code}")
+        self.response = response
+
+
+class FetchEngine:
+    """
+    Async HTTP engine shared by the provider plugins.
+
+    Every provider gets its own httpx.AsyncClient, a semaphore bounding the
+    requests in flight and a rate limiter spacing request starts. Requests
+    are retried with exponential backoff on transport errors, 429 and 5xx.
+
+        engine = FetchEngine()
+        client.register(engine)
+        results = engine.run_jobs(lambda: [(slug, client.do_search_async(engine, slug)) for slug in slugs])
+    """
+
+    def __init__(
+        self,
+        retries: int = 3,
+        backoff: float = 0.5,
+        timeout: float = 30.0,
+        http_cache: Optional[HttpCache] = None,
+    ):
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.http_cache = http_cache or default_http_cache
+        self.providers: Dict[str, ProviderLimits] = {}
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._rate_locks: Dict[str, asyncio.Lock] = {}
+        self._next_slot: Dict[str, float] = {}
+
+    def register(
+        self,
+        provider: str,
+        base_url: str = "",
+        headers: Optional[Dict[str, str]] = None,
+        concurrency: int = 8,
+        rate_limit_interval: float = 0.0,
+    ):
+        self.providers[provider] = ProviderLimits(base_url, headers, max(1, concurrency), rate_limit_interval)
+
+    # --- per provider state, created lazily inside the running loop ---
+
+    def _client(self, provider: str) -> httpx.AsyncClient:
+        if provider not in self._clients:
+            limits = self.providers.get(provider) or ProviderLimits()
+            self._clients[provider] = httpx.AsyncClient(
+                base_url=limits.base_url,
+                headers={"User-Agent": USER_AGENT, **(limits.headers or {})},
+                timeout=self.timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=limits.concurrency),
+            )
+        return self._clients[provider]
+
+    def _semaphore(self, provider: str) -> asyncio.Semaphore:
+        if provider not in self._semaphores:
+            limits = self.providers.get(provider) or ProviderLimits()
+            self._semaphores[provider] = asyncio.Semaphore(limits.concurrency)
+        return self._semaphores[provider]
+
+    async def _rate_limit(self, provider: str):
+        interval = (self.providers.get(provider) or ProviderLimits()).rate_limit_interval
+        if interval <= 0:
+            return
+        lock = self._rate_locks.setdefault(provider, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(provider, 0.0))
+            self._next_slot[provider] = slot + interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        if response is not None:
+            retry_after = response.headers.get("Retry-After") or response.headers.get("X-Ratelimit-Reset")
+            if retry_after and retry_after.isdigit():
+                return float(retry_after)
+        return self.backoff * (2 ** attempt) + random.uniform(0, self.backoff)
+
+    # --- requests ---
+
+    async def request(self, provider: str, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Send a request within the provider's concurrency and rate limits,
+        retrying transient failures. Raises on the final failure.
+        """
+        client = self._client(provider)
+        async with self._semaphore(provider):
+            for attempt in range(self.retries + 1):
+                await self._rate_limit(provider)
+                try:
+                    response = await client.request(method, url, **kwargs)
+                except httpx.TransportError as e:
+                    if attempt == self.retries:
+                        raise
+                    delay = self._retry_delay(attempt)
+                    mcpkg_logger.debug(f"[{provider}] {method} {url} failed ({e}); retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                    continue
+
+                if response.status_code in RETRY_STATUS and attempt < self.retries:
+                    delay = self._retry_delay(attempt, response)
+                    mcpkg_logger.debug(f"[{provider}] {method} {url} -> {response.status_code}; retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                    continue
+                if response.status_code != 304:  # Not Modified is answered by the HTTP cache
+                    response.raise_for_status()
+                return response
+
+    async def get_json(
+        self,
+        provider: str,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        max_age: Optional[float] = None,
+    ) -> Any:
+        """
+        GET JSON metadata through the shared HTTP cache (TTL + ETag/Last-Modified).
+        max_age=0 always revalidates with the provider.
+        """
+        base_url = (self.providers.get(provider) or ProviderLimits()).base_url
+        key = self.http_cache.key(self.http_cache.full_url(base_url, url), params)
+        entry = self.http_cache.load(key)
+        if self.http_cache.is_fresh(entry, max_age):
+            mcpkg_logger.debug(f"[{provider}] HTTP cache hit: {url}")
+            return entry["body"]
+        try:
+            response = await self.request(
+                provider, "GET", url, params=params, headers=self.http_cache.conditional_headers(entry)
+            )
+        except httpx.TransportError as e:
+            return self.http_cache.stale(entry, e)
+        return self.http_cache.update(key, entry, response)
+
+    async def download(
+        self,
+        provider: str,
+        url: str,
+        dest: Path,
+        algorithms: Iterable[str] = DEFAULT_ALGORITHMS,
+    ) -> Dict[str, str]:
+        """
+        Stream url to dest, hashing while writing. dest only appears once the
+        download completes. Returns the digests of the written file.
+        """
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        client = self._client(provider)
+
+        async with self._semaphore(provider):
+            for attempt in range(self.retries + 1):
+                await self._rate_limit(provider)
+                fd, tmp_name = tempfile.mkstemp(dir=dest.parent, prefix=f".{dest.name}.")
+                hasher = MultiHasher(algorithms)
+                try:
+                    with os.fdopen(fd, "wb") as f:
+                        async with client.stream("GET", url) as response:
+                            if response.status_code in RETRY_STATUS and attempt < self.retries:
+                                raise _Retry(response)
+                            response.raise_for_status()
+                            async for chunk in response.aiter_bytes():
+                                f.write(chunk)
+                                hasher.update(chunk)
+                    publish_file(tmp_name, dest)
+                    mcpkg_logger.debug(f"[{provider}] Downloaded {hasher.size} bytes to {dest}")
+                    return hasher.hexdigests()
+                except (_Retry, httpx.TransportError) as e:
+                    response = e.response if isinstance(e, _Retry) else None
+                    if response is None and attempt == self.retries:
+                        raise
+                    delay = self._retry_delay(attempt, response)
+                    mcpkg_logger.debug(f"[{provider}] Download {url} failed; retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                finally:
+                    if os.path.exists(tmp_name):
+                        os.unlink(tmp_name)
+
+    async def download_verified(
+        self,
+        provider: str,
+        url: str,
+        dest: Path,
+        expected_sha512: Optional[str] = None,
+    ) -> Dict[str, str]:
+        """
+        download() for package files: a file already at dest is reused
+        (its digests are memoized by size and mtime, so an unchanged file is
+        not re-read). With expected_sha512 a stale file is replaced and a
+        download that does not match is removed and raises. Returns the sha1
+        and sha512 of dest.
+        """
+        dest = Path(dest)
+        if dest.exists():
+            digests = cache.file_digests(dest, ("sha1", "sha512"))
+            if not expected_sha512 or digests["sha512"] == expected_sha512:
+                cache.touch(dest)
+                return digests
+        digests = await self.download(provider, url, dest, ("sha1", "sha512"))
+        if expected_sha512 and digests["sha512"] != expected_sha512:
+            dest.unlink(missing_ok=True)
+            raise RuntimeError(f"sha512 mismatch for {dest.name}")
+        cache.remember_digests(dest, digests)
+        return digests
+
+    # --- job running ---
+
+    async def gather(
+        self,
+        jobs: List[Tuple[str, Awaitable[Any]]],
+        progress: Optional[Progress] = None,
+    ) -> List[Tuple[str, Any, Optional[BaseException]]]:
+        """
+        Run labelled jobs concurrently. One failing job never cancels the
+        others; returns (label, result, error) in the order given.
+        """
+        progress = progress or Progress(len(jobs))
+
+        async def _run(label: str, job: Awaitable[Any]):
+            try:
+                result = await job
+            except Exception as e:
+                mcpkg_logger.debug(f"Job {label} failed: {e}")
+                progress.advance(label, ok=False)
+                return label, None, e
+            progress.advance(label)
+            return label, result, None
+
+        try:
+            return await asyncio.gather(*(_run(label, job) for label, job in jobs))
+        finally:
+            await self.aclose()
+
+    def run_jobs(
+        self,
+        jobs: Callable[[], List[Tuple[str, Awaitable[Any]]]],
+        progress: Optional[Progress] = None,
+    ) -> List[Tuple[str, Any, Optional[BaseException]]]:
+        """
+        Blocking entry point for the (sync) commands. jobs is a callable so the
+        coroutines are created inside the event loop.
+        """
+        async def _main():
+            return await self.gather(jobs(), progress)
+        return asyncio.run(_main())
+
+    async def aclose(self):
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+        self._semaphores.clear()
+        self._rate_locks.clear()
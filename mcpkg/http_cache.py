@@ -0,0 +1,132 @@
+import json
+import time
+import hashlib
+import msgpack
+import zstandard as zstd
+import httpx
+
+from pathlib import Path
+from typing import Optional, Dict, Any, Callable
+
+from container_craft_core.env import ContainerCraftEnv
+from container_craft_core.cache import Cache, cache as default_cache
+from container_craft_core.logger import get_logger
+
+logger = get_logger("mcpkg.http_cache")
+
+
+class HttpCache:
+    """
+    On-disk cache for provider API metadata (JSON GET responses).
+
+    Entries are keyed by URL and params and stored as zstd compressed msgpack
+    under ${MC_CACHE_DIR}/http. Within MC_HTTP_CACHE_TTL seconds an entry is
+    served without touching the network; after that it is revalidated with
+    If-None-Match / If-Modified-Since and a 304 just refreshes the entry.
+    If the provider cannot be reached, the last stored response is used.
+    """
+
+    def __init__(self, env: Optional[ContainerCraftEnv] = None, cache: Optional[Cache] = None):
+        self.env = env or ContainerCraftEnv()
+        self.cache = cache or default_cache
+        self.cache_dir = self.env.get_path("MC_CACHE_DIR") / "http"
+        self.ttl = float(self.env.get("MC_HTTP_CACHE_TTL", 3600))
+
+    @staticmethod
+    def full_url(base_url: str, url: str) -> str:
+        """Resolve url against a client base_url the way httpx does (append, not replace)."""
+        if url.startswith(("http://", "https://")):
+            return url
+        return f"{str(base_url).rstrip('/')}/{url.lstrip('/')}"
+
+    def key(self, url: str, params: Optional[Dict[str, Any]] = None) -> str:
+        canonical = json.dumps([url, sorted((params or {}).items())], default=str)
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.msgpack.zst"
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self.path(key)
+        if not path.exists():
+            return None
+        try:
+            entry = msgpack.unpackb(zstd.ZstdDecompressor().decompress(path.read_bytes()), raw=False)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable HTTP cache entry {path}: {e}")
+            return None
+        self.cache.touch(path)
+        return entry
+
+    def store(self, key: str, entry: Dict[str, Any]):
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = zstd.ZstdCompressor().compress(msgpack.packb(entry, use_bin_type=True))
+        self.cache._atomic_write(path, data)
+
+    def is_fresh(self, entry: Optional[Dict[str, Any]], max_age: Optional[float] = None) -> bool:
+        """max_age overrides MC_HTTP_CACHE_TTL; 0 always revalidates."""
+        ttl = self.ttl if max_age is None else max_age
+        return entry is not None and time.time() - entry.get("fetched_at", 0) < ttl
+
+    @staticmethod
+    def conditional_headers(entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def update(self, key: str, entry: Optional[Dict[str, Any]], response: httpx.Response) -> Any:
+        """Store a fresh or revalidated response and return its JSON body."""
+        if response.status_code == 304 and entry is not None:
+            logger.debug(f"HTTP cache revalidated: {entry['url']}")
+            entry["fetched_at"] = time.time()
+            self.store(key, entry)
+            return entry["body"]
+
+        response.raise_for_status()
+        body = response.json()
+        self.store(key, {
+            "url": str(response.request.url),
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+            "body": body,
+        })
+        return body
+
+    def stale(self, entry: Optional[Dict[str, Any]], error: Exception) -> Any:
+        """Fall back to the stored body when the provider is unreachable."""
+        if entry is None:
+            raise error
+        logger.warning(f"Using cached response for {entry['url']} (offline: {error})")
+        return entry["body"]
+
+    def get_json(
+        self,
+        client: httpx.Client,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        before_request: Optional[Callable[[], None]] = None,
+    ) -> Any:
+        """
+        Cached GET through a blocking httpx.Client. before_request (e.g. a
+        provider's rate limiter) runs only when the network is actually used.
+        """
+        key = self.key(self.full_url(client.base_url, url), params)
+        entry = self.load(key)
+        if self.is_fresh(entry):
+            logger.debug(f"HTTP cache hit: {url}")
+            return entry["body"]
+        if before_request is not None:
+            before_request()
+        try:
+            response = client.get(url, params=params, headers=self.conditional_headers(entry))
+        except httpx.TransportError as e:
+            return self.stale(entry, e)
+        return self.update(key, entry, response)
+
+
+http_cache = HttpCache()
@@ -0,0 +1,360 @@
+import json
+import time
+import fcntl
+import struct
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, Dict, List, Iterable, Iterator, Tuple, Any
+
+from container_craft_core.env import env as default_env, ContainerCraftEnv
+from container_craft_core.cache import cache
+from container_craft_core.logger import mcpkg_logger
+from mcpkg.mcpkg_entry import McPkgEntry
+
+# File layout: MAGIC, then records of a 4 byte big endian length followed by
+# one McPkgEntry.to_msgpack_zst() blob.
+INDEX_MAGIC = b"MCPKGIDX\x01"
+INDEX_SUFFIX = ".idx"
+SEGMENT_SUFFIX = ".seg"
+# Compact once this many delta segments pile up, or once they hold more
+# than COMPACT_RATIO of the base index size.
+COMPACT_SEGMENTS = 8
+COMPACT_RATIO = 0.25
+_LEN = struct.Struct(">I")
+
+
+def encode_records(entries: Iterable[McPkgEntry]) -> bytes:
+    parts = [INDEX_MAGIC]
+    for entry in entries:
+        blob = entry.to_msgpack_zst()
+        parts.append(_LEN.pack(len(blob)))
+        parts.append(blob)
+    return b"".join(parts)
+
+
+def decode_records(data) -> List[McPkgEntry]:
+    """Decode an index file from bytes or a (memory mapped) buffer."""
+    entries = []
+    with memoryview(data) as view:
+        if bytes(view[:len(INDEX_MAGIC)]) != INDEX_MAGIC:
+            raise ValueError("Not an mcpkg index file")
+        offset = len(INDEX_MAGIC)
+        while offset < len(view):
+            (length,) = _LEN.unpack_from(view, offset)
+            offset += _LEN.size
+            if offset + length > len(view):
+                raise ValueError("Truncated mcpkg index record")
+            entries.append(McPkgEntry.from_msgpack_zst(bytes(view[offset:offset + length])))
+            offset += length
+    return entries
+
+
+class IndexTable:
+    """
+    In-memory lookup for one provider/mc_version/loader index:
+    slug -> versions (newest first), plus project id -> slug.
+    """
+
+    def __init__(self, entries: Iterable[McPkgEntry] = ()):
+        self.by_slug: Dict[str, List[McPkgEntry]] = {}
+        self.project_slugs: Dict[str, str] = {}
+        self.by_version_id: Dict[str, McPkgEntry] = {}
+        for entry in entries:
+            self.add(entry)
+        self.sort()
+
+    def add(self, entry: McPkgEntry):
+        versions = self.by_slug.setdefault(entry.slug, [])
+        # a re-indexed version replaces the old record
+        versions[:] = [v for v in versions if not self._same_version(v, entry)]
+        versions.append(entry)
+        if entry.project_id:
+            self.project_slugs[entry.project_id] = entry.slug
+        if entry.version_id:
+            self.by_version_id[entry.version_id] = entry
+
+    def apply(self, entries: Iterable[McPkgEntry]):
+        """
+        Apply a delta segment: every slug in it is replaced as a whole, since
+        a delta carries the full set of matching versions of a changed mod.
+        """
+        changed: Dict[str, List[McPkgEntry]] = {}
+        for entry in entries:
+            changed.setdefault(entry.slug, []).append(entry)
+        for slug, versions in changed.items():
+            for old in self.by_slug.pop(slug, []):
+                self.by_version_id.pop(old.version_id, None)
+            for entry in versions:
+                self.add(entry)
+        self.sort()
+
+    def sort(self):
+        for versions in self.by_slug.values():
+            versions.sort(key=lambda e: str(e.timestamp), reverse=True)
+
+    @staticmethod
+    def _same_version(a: McPkgEntry, b: McPkgEntry) -> bool:
+        if a.version_id and b.version_id:
+            return a.version_id == b.version_id
+        return a.version == b.version
+
+    def slug(self, name: str) -> Optional[str]:
+        """Resolve a slug or provider project id to the indexed slug."""
+        if name in self.by_slug:
+            return name
+        return self.project_slugs.get(name)
+
+    def versions(self, name: str) -> List[McPkgEntry]:
+        slug = self.slug(name)
+        return self.by_slug.get(slug, []) if slug else []
+
+    def latest(self, name: str, version: Optional[str] = None) -> Optional[McPkgEntry]:
+        """Newest indexed entry for a mod, or the one with the given version number or id."""
+        for entry in self.versions(name):
+            if version is None or version in (entry.version, entry.version_id):
+                return entry
+        return None
+
+    def version(self, version_id: str) -> Optional[McPkgEntry]:
+        return self.by_version_id.get(version_id)
+
+    def entries(self) -> Iterator[McPkgEntry]:
+        for versions in self.by_slug.values():
+            yield from versions
+
+    def __len__(self) -> int:
+        return len(self.by_slug)
+
+    def __contains__(self, name: str) -> bool:
+        return self.slug(name) is not None
+
+
+class PackageIndex:
+    """
+    Local package index, much like apt's lists: one index per provider,
+    minecraft version and loader under MC_INDEX_DIR, built by `mcpkg update`.
+
+        ${MC_INDEX_DIR}/modrith/1.21.8/fabric.idx           base index
+        ${MC_INDEX_DIR}/modrith/1.21.8/fabric.d/<ns>.seg    append-only deltas
+        ${MC_INDEX_DIR}/modrith/1.21.8/fabric.cursor        provider sync cursor
+
+    Incremental updates only append a delta segment holding the mods that
+    changed since the cursor; segments are folded back into the base index
+    by a background compaction. Tables are loaded lazily (base + segments)
+    and kept in memory, so search/install resolve a mod without touching
+    the network.
+    """
+
+    def __init__(self, env: Optional[ContainerCraftEnv] = None):
+        self.env = env or default_env
+        self._tables: Dict[Tuple[str, str, str], IndexTable] = {}
+        self._compactions: List[threading.Thread] = []
+
+    @property
+    def index_dir(self) -> Path:
+        return self.env.get_path("MC_INDEX_DIR")
+
+    def path(self, provider: str, mc_version: str, loader: str) -> Path:
+        return self.index_dir / provider / mc_version / f"{loader}{INDEX_SUFFIX}"
+
+    def segments_dir(self, provider: str, mc_version: str, loader: str) -> Path:
+        return self.index_dir / provider / mc_version / f"{loader}.d"
+
+    def cursor_path(self, provider: str, mc_version: str, loader: str) -> Path:
+        return self.index_dir / provider / mc_version / f"{loader}.cursor"
+
+    def exists(self, provider: str, mc_version: str, loader: str) -> bool:
+        return self.path(provider, mc_version, loader).exists()
+
+    def segments(self, provider: str, mc_version: str, loader: str) -> List[Path]:
+        """Delta segments in the order they were appended."""
+        seg_dir = self.segments_dir(provider, mc_version, loader)
+        if not seg_dir.exists():
+            return []
+        return sorted(seg_dir.glob(f"*{SEGMENT_SUFFIX}"), key=lambda p: int(p.stem))
+
+    def table(self, provider: str, mc_version: str, loader: str) -> IndexTable:
+        key = (provider, mc_version, loader)
+        if key not in self._tables:
+            table = IndexTable(self._read(self.path(*key)))
+            for segment in self.segments(*key):
+                table.apply(self._read(segment))
+            self._tables[key] = table
+        return self._tables[key]
+
+    def _read(self, path: Path) -> List[McPkgEntry]:
+        if not path.exists():
+            return []
+        try:
+            with cache.map_file(path) as view:
+                entries = decode_records(view)
+        except (OSError, ValueError) as e:
+            mcpkg_logger.warning(f"Ignoring unreadable index {path}: {e}")
+            return []
+        mcpkg_logger.debug(f"Loaded {len(entries)} index records from {path}")
+        return entries
+
+    # --- sync cursors ---
+
+    def cursor(self, provider: str, mc_version: str, loader: str) -> Optional[Dict[str, Any]]:
+        """Provider specific sync state of the last update, or None before the first full one."""
+        path = self.cursor_path(provider, mc_version, loader)
+        if not path.exists() or not self.exists(provider, mc_version, loader):
+            return None
+        try:
+            return json.loads(path.read_text())
+        except (OSError, ValueError) as e:
+            mcpkg_logger.warning(f"Ignoring unreadable sync cursor {path}: {e}")
+            return None
+
+    def set_cursor(self, provider: str, mc_version: str, loader: str, cursor: Dict[str, Any]):
+        path = self.cursor_path(provider, mc_version, loader)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        cache._atomic_write(path, json.dumps({**cursor, "synced_at": time.time()}, indent=2).encode())
+
+    def reset(self, provider: str, mc_version: str, loader: str):
+        """Drop the cursor so the next update rebuilds the index from scratch."""
+        self.cursor_path(provider, mc_version, loader).unlink(missing_ok=True)
+
+    # --- writing ---
+
+    def write(
+        self,
+        provider: str,
+        mc_version: str,
+        loader: str,
+        entries: Iterable[McPkgEntry],
+        cursor: Optional[Dict[str, Any]] = None,
+    ) -> IndexTable:
+        """Replace the index for provider/mc_version/loader (full update)."""
+        key = (provider, mc_version, loader)
+        table = IndexTable(entries)
+        path = self.path(*key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock(*key):
+            cache._atomic_write(path, encode_records(table.entries()))
+            for segment in self.segments(*key):
+                segment.unlink(missing_ok=True)
+        if cursor is not None:
+            self.set_cursor(*key, cursor)
+        self._tables[key] = table
+        mcpkg_logger.info(f"Indexed {len(table)} mods ({provider} {mc_version} {loader}) -> {path}")
+        return table
+
+    def append(
+        self,
+        provider: str,
+        mc_version: str,
+        loader: str,
+        entries: Iterable[McPkgEntry],
+        cursor: Optional[Dict[str, Any]] = None,
+        compact: bool = True,
+    ) -> Optional[Path]:
+        """
+        Record the mods that changed since the last update as a new delta
+        segment, then advance the cursor. A crash in between only means the
+        next update fetches the same changes again.
+        """
+        key = (provider, mc_version, loader)
+        entries = list(entries)
+        segment = None
+        if entries:
+            seg_dir = self.segments_dir(*key)
+            seg_dir.mkdir(parents=True, exist_ok=True)
+            segment = seg_dir / f"{time.time_ns()}{SEGMENT_SUFFIX}"
+            cache._atomic_write(segment, encode_records(entries))
+            if key in self._tables:
+                self._tables[key].apply(entries)
+            mcpkg_logger.info(
+                f"Indexed {len({e.slug for e in entries})} changed mods ({provider} {mc_version} {loader}) -> {segment.name}"
+            )
+        if cursor is not None:
+            self.set_cursor(*key, cursor)
+        if compact and self.needs_compaction(*key):
+            self.compact_in_background(*key)
+        return segment
+
+    # --- compaction ---
+
+    def needs_compaction(self, provider: str, mc_version: str, loader: str) -> bool:
+        segments = self.segments(provider, mc_version, loader)
+        if len(segments) >= COMPACT_SEGMENTS:
+            return True
+        base = self.path(provider, mc_version, loader)
+        base_size = base.stat().st_size if base.exists() else 0
+        return bool(segments) and sum(s.stat().st_size for s in segments) > base_size * COMPACT_RATIO
+
+    @contextmanager
+    def _lock(self, provider: str, mc_version: str, loader: str):
+        """Inter-process lock serialising base rewrites of one index."""
+        lock_path = self.index_dir / provider / mc_version / f".{loader}.lock"
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(lock_path, "w") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def compact(self, provider: str, mc_version: str, loader: str) -> int:
+        """
+        Fold the current delta segments into the base index. Segments
+        appended while compacting are left for the next run. Returns the
+        number of segments folded in.
+        """
+        key = (provider, mc_version, loader)
+        with self._lock(*key):
+            segments = self.segments(*key)
+            if not segments:
+                return 0
+            table = IndexTable(self._read(self.path(*key)))
+            for segment in segments:
+                table.apply(self._read(segment))
+            cache._atomic_write(self.path(*key), encode_records(table.entries()))
+            for segment in segments:
+                segment.unlink(missing_ok=True)
+        mcpkg_logger.debug(f"Compacted {len(segments)} segments into {self.path(*key)}")
+        return len(segments)
+
+    def compact_in_background(self, provider: str, mc_version: str, loader: str) -> threading.Thread:
+        """
+        Compact on a worker thread so the update returns straight away. The
+        thread is not a daemon: the process finishes the compaction before
+        exiting, and readers are correct with or without it.
+        """
+        def _run():
+            try:
+                self.compact(provider, mc_version, loader)
+            except Exception as e:
+                mcpkg_logger.warning(f"Index compaction failed for {provider} {mc_version} {loader}: {e}")
+
+        thread = threading.Thread(target=_run, name=f"mcpkg-compact-{provider}-{mc_version}-{loader}")
+        thread.start()
+        self._compactions.append(thread)
+        return thread
+
+    def wait(self):
+        """Block until background compactions finish."""
+        for thread in self._compactions:
+            thread.join()
+        self._compactions.clear()
+
+    def lookup(
+        self,
+        provider: str,
+        name: str,
+        mc_version: Optional[str],
+        loader: Optional[str],
+        version: Optional[str] = None,
+    ) -> Optional[McPkgEntry]:
+        # no index without a version and loader; callers fall back to the provider
+        if not mc_version or not loader or not self.exists(provider, mc_version, loader):
+            return None
+        return self.table(provider, mc_version, loader).latest(name, version)
+
+    def invalidate(self):
+        self._tables.clear()
+
+
+package_index = PackageIndex()
@@ -0,0 +1,130 @@
+import os
+import json
+import tempfile
+from dataclasses import asdict, fields
+from pathlib import Path
+from typing import Dict, List, Any
+
+from container_craft_core.cache import publish_file
+from container_craft_core.logger import mcpkg_logger
+from mcpkg.mcpkg_entry import McPkgEntry
+from mcpkg.resolver import Resolution
+
+LOCKFILE_VERSION = 1
+LOCKFILE_NAME = "mcpkg.lock.json"
+
+_ENTRY_FIELDS = {f.name for f in fields(McPkgEntry)}
+# Provider names written by older releases
+LEGACY_PROVIDERS = {"hanger": "hangar"}
+
+
+def entry_from_dict(data: Dict[str, Any]) -> McPkgEntry:
+    entry = McPkgEntry(**{k: v for k, v in data.items() if k in _ENTRY_FIELDS})
+    entry.provider = LEGACY_PROVIDERS.get(entry.provider, entry.provider)
+    return entry
+
+
+def entries_from_packagegroup(path: Path) -> List[McPkgEntry]:
+    """Read the *_packagegroup.json written by a provider's do_package."""
+    entries = []
+    for pkg in json.loads(Path(path).read_text()):
+        entries.append(McPkgEntry(
+            name=pkg.get("name", ""),
+            slug=pkg.get("slug") or pkg.get("name", ""),
+            version=str(pkg.get("version", "")),
+            loader=pkg.get("loader", ""),
+            mc_version=pkg.get("mc_version", ""),
+            file_name=pkg["file_name"],
+            source=pkg["source"],
+            sha512=pkg.get("sha512") or pkg.get("sha", ""),
+            timestamp=str(pkg.get("timestamp", "")),
+            provider=LEGACY_PROVIDERS.get(pkg.get("provider", ""), pkg.get("provider", "")),
+            dependencies=pkg.get("dependencies", []),
+        ))
+    return entries
+
+
+class Lockfile:
+    """
+    Resolved package sets, one per server, written by `mcpkg install` and
+    `mcpkg upgrade`:
+
+        {
+          "lockfile_version": 1,
+          "servers": {
+            "my_server": {
+              "mc_version": "1.21.8",
+              "loader": "fabric",
+              "roots": {"modrith:sodium@*": ["sodium", "fabric-api"]},
+              "packages": {"sodium": {...McPkgEntry..., "required_by": [...]}}
+            }
+          }
+        }
+
+    roots holds the solved closure of every requirement, which the resolver
+    reuses as long as the requirement, loader and minecraft version stay
+    the same.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.servers: Dict[str, Dict[str, Any]] = {}
+
+    @classmethod
+    def load(cls, path: Path) -> "Lockfile":
+        lock = cls(path)
+        if not lock.path.exists():
+            return lock
+        try:
+            data = json.loads(lock.path.read_text())
+        except (OSError, ValueError) as e:
+            mcpkg_logger.warning(f"Ignoring unreadable lockfile {lock.path}: {e}")
+            return lock
+        if data.get("lockfile_version") != LOCKFILE_VERSION:
+            mcpkg_logger.warning(f"Ignoring lockfile {lock.path} with version {data.get('lockfile_version')}")
+            return lock
+        lock.servers = data.get("servers", {})
+        return lock
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def packages(self, server: str) -> List[McPkgEntry]:
+        return [entry_from_dict(p) for p in self.servers.get(server, {}).get("packages", {}).values()]
+
+    def locked_roots(self, server: str, mc_version: str, loader: str) -> Dict[str, List[McPkgEntry]]:
+        """Solved closures per requirement, if the server was locked for the same loader/version."""
+        locked = self.servers.get(server)
+        if not locked or locked.get("mc_version") != mc_version or locked.get("loader") != loader:
+            return {}
+        packages = locked.get("packages", {})
+        roots = {}
+        for root_key, slugs in locked.get("roots", {}).items():
+            if all(slug in packages for slug in slugs):
+                roots[root_key] = [entry_from_dict(packages[slug]) for slug in slugs]
+        return roots
+
+    def update(self, server: str, resolution: Resolution):
+        self.servers[server] = {
+            "mc_version": resolution.mc_version,
+            "loader": resolution.loader,
+            "roots": resolution.roots,
+            "packages": {
+                slug: {**asdict(entry), "required_by": sorted(resolution.required_by.get(slug, ()))}
+                for slug, entry in sorted(resolution.packages.items())
+            },
+        }
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"lockfile_version": LOCKFILE_VERSION, "servers": dict(sorted(self.servers.items()))}
+        fd, tmp_name = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(json.dumps(data, indent=2) + "\n")
+            publish_file(tmp_name, self.path)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+        mcpkg_logger.info(f"Wrote lockfile: {self.path}")
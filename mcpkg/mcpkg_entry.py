@@ -15,6 +15,10 @@ class McPkgEntry:
     timestamp: str
     provider: str
     dependencies: List[Dict[str, Any]]
+    # provider ids, used by the local index (mcpkg/index.py)
+    project_id: str = ""
+    version_id: str = ""
+    sha1: str = ""
 
     def to_msgpack(self) -> bytes:
         return msgpack.packb(asdict(self), use_bin_type=True)
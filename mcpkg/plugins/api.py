@@ -1,4 +1,10 @@
+import asyncio
 from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from container_craft_core.env import env
+from mcpkg.http_cache import http_cache
 
 class McPkgApi(ABC):
     @abstractmethod
@@ -16,19 +22,22 @@ class McPkgApi(ABC):
         return None
 
     @abstractmethod
-    def do_update(version: str = None) -> bool
+    def do_update(self, version: str = None, loader: str = None) -> bool:
         """
         Used to index local index much like apt update
+        for version and loader (default MC_VERSION and MC_LOADER)
         returns True if it passes else returns False
         """
+        pass
 
     @abstractmethod
-    def do_upgrade(mod: str = None, version: str = None) -> bool
+    def do_upgrade(self, mod: str = None, version: str = None) -> bool:
         """
         Used to upgrade a mod with the local index much like
         apt upgrade
         returns True if it passes else returns False
         """
+        pass
 
     @abstractmethod
     def do_parse(self, node: dict) -> dict:
@@ -74,3 +83,62 @@ class McPkgApi(ABC):
         Returns a list of results (with slug, version, title, summary, etc).
         """
         pass
+
+    def _get_json(self, url: str, params: Optional[dict] = None):
+        """
+        GET provider metadata through the shared on-disk HTTP cache.
+        Plugins keep their blocking httpx.Client in self.client. Cache hits
+        skip _rate_limit.
+        """
+        return http_cache.get_json(self.client, url, params, before_request=self._rate_limit)
+
+    def _rate_limit(self):
+        """Called before each blocking request that reaches the provider; no limit by default."""
+
+    # --- async fetch engine hooks (see mcpkg/fetch.py) ---
+
+    # Max requests in flight against this provider and minimum seconds between
+    # request starts. Providers override these with their published limits.
+    concurrency: int = 8
+    rate_limit_interval: float = 0.0
+
+    def headers(self) -> Dict[str, str]:
+        """Default headers for every request to this provider."""
+        return {}
+
+    def register(self, engine) -> None:
+        """Register this provider's client settings and limits with a FetchEngine."""
+        engine.register(
+            self.name(),
+            base_url=self.base_url(),
+            headers=self.headers(),
+            concurrency=self.concurrency,
+            rate_limit_interval=self.rate_limit_interval,
+        )
+
+    async def do_search_async(self, engine, mod_name: str, version: Optional[str] = None):
+        """
+        Async do_search used by the fetch engine. The default runs the blocking
+        do_search in a worker thread; providers override it with a native
+        implementation on engine requests.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.do_search, mod_name, version)
+
+    async def download_async(
+        self,
+        engine,
+        url: str,
+        file_name: str,
+        expected_sha512: Optional[str] = None,
+    ) -> Tuple[Path, Dict[str, str]]:
+        """
+        Download url into MC_REPO_DIR through the engine, hashing while it is
+        written. Files already in the repo dir are reused (their digests are
+        memoized by size and mtime, so an unchanged file is not re-read).
+        With expected_sha512 a stale file is replaced and a download that
+        does not match is removed and raises.
+        """
+        file_path = env.get_path("MC_REPO_DIR") / file_name
+        digests = await engine.download_verified(self.name(), url, file_path, expected_sha512)
+        return file_path, digests
@@ -16,6 +16,9 @@ logger = get_logger("mcpkg.plugins.curse_forge")
 
 
 class CurseForgeClient(McPkgApi):
+    # CurseForge does not publish a rate limit; stay polite.
+    concurrency = 4
+
     def __init__(self):
         self.api_key = context.env.get("CURSE_FORGE_KEY")
         if not self.api_key:
@@ -39,6 +42,16 @@ class CurseForgeClient(McPkgApi):
 
     def key(self) -> Optional[str]:
         return self.api_key
+    def headers(self) -> Dict[str, str]:
+        return {"Accept": "application/json", "x-api-key": self.api_key}
+
+    def do_update(self, version: Optional[str] = None, loader: Optional[str] = None) -> bool:
+        logger.warning("[curse_forge] update is not implemented yet")
+        return False
+
+    def do_upgrade(self, mod: Optional[str] = None, version: Optional[str] = None) -> bool:
+        logger.warning("[curse_forge] upgrade is not implemented yet")
+        return False
 
     def do_parse(self, node: dict) -> dict:
         if isinstance(node, str):
@@ -56,9 +69,7 @@ class CurseForgeClient(McPkgApi):
             "classId": 6,
             "pageSize": 10
         }
-        resp = self.client.get("/v1/mods/search", params=params)
-        resp.raise_for_status()
-        return resp.json().get("data", [])
+        return self._get_json("/v1/mods/search", params=params).get("data", [])
 
     def do_fetch(self, parsed: dict, server_name: str, modloader: str, mc_version: str) -> dict:
         slug = parsed["slug"]
@@ -75,25 +86,24 @@ class CurseForgeClient(McPkgApi):
         file_id = file_info["id"]
         file_name = file_info["fileName"]
 
-        resp = self.client.get(f"/v1/mods/files/{file_id}/download-url")
-        resp.raise_for_status()
-        download_url = resp.json()["data"]
+        download_url = self._get_json(f"/v1/mods/files/{file_id}/download-url")["data"]
 
         file_path = target_dir / file_name
+        digests = {}
         if not file_path.exists():
             logger.info(f"[curse_forge] Downloading {file_name}")
             try:
                 with httpx.stream("GET", download_url) as response:
                     response.raise_for_status()
-                    with open(file_path, "wb") as f:
-                        for chunk in response.iter_bytes():
-                            f.write(chunk)
+                    digests = cache.write_stream(response.iter_bytes(), file_path, ("sha512",))
             except Exception as e:
-                error_handler(f"[curse_forge] Failed to download {download_url}", e)
+                error_handler.handle_error(f"[curse_forge] Failed to download {download_url}", e)
         else:
             logger.info(f"[curse_forge] Cached: {file_name}")
+            cache.touch(file_path)
+            digests = cache.file_digests(file_path, ("sha512",))
 
-        sha = cache.sha512sum(file_path)
+        sha = digests["sha512"]
 
         return {
             "name": mod_info["name"],
@@ -139,14 +149,10 @@ class CurseForgeClient(McPkgApi):
         return results[0]["id"] if results else None
 
     def _get_mod_info(self, mod_id: int) -> dict:
-        resp = self.client.get(f"/v1/mods/{mod_id}")
-        resp.raise_for_status()
-        return resp.json()["data"]
+        return self._get_json(f"/v1/mods/{mod_id}")["data"]
 
     def _select_file(self, mod_id: int, loader: str, version: Optional[str], override: Optional[str] = None) -> dict:
-        resp = self.client.get(f"/v1/mods/{mod_id}/files")
-        resp.raise_for_status()
-        files = resp.json()["data"]
+        files = self._get_json(f"/v1/mods/{mod_id}/files")["data"]
 
         for f in files:
             if version and version not in f.get("gameVersions", []):
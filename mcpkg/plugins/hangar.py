@@ -12,12 +12,12 @@ from container_craft_core.error_handler import error_handler
 from container_craft_core.config import context
 from container_craft_core.cache import cache
 
-log = get_logger("mcpkg.plugins.hanger")
+log = get_logger("mcpkg.plugins.hangar")
 
 
 class HangerClient(McPkgApi):
     def name(self) -> str:
-        return "hanger"
+        return "hangar"
 
     def base_url(self) -> str:
         return "https://cdn.hangar.papermc.io"
@@ -25,10 +25,22 @@ class HangerClient(McPkgApi):
     def key(self) -> Optional[str]:
         return None
 
+    def do_search(self, mod_name: str, version: Optional[str] = None) -> List[dict]:
+        log.warning("[hangar] Hangar has no search API; use full plugin URLs")
+        return []
+
+    def do_update(self, version: Optional[str] = None, loader: Optional[str] = None) -> bool:
+        log.warning("[hangar] update is not supported")
+        return False
+
+    def do_upgrade(self, mod: Optional[str] = None, version: Optional[str] = None) -> bool:
+        log.warning("[hangar] upgrade is not supported")
+        return False
+
     def do_parse(self, node: dict) -> dict:
         if isinstance(node, str) and node.startswith("http"):
             return {"url": node}
-        raise ValueError(f"[hanger] Invalid config node: {node}")
+        raise ValueError(f"[hangar] Invalid config node: {node}")
 
     def do_fetch(self, parsed: dict, server_name: str, modloader: str, mc_version: str) -> dict:
         url = parsed["url"]
@@ -38,20 +50,21 @@ class HangerClient(McPkgApi):
 
         file_path = repo_dir / file_name
 
+        digests = {}
         if not file_path.exists():
-            log.info(f"[hanger] Downloading: {url}")
+            log.info(f"[hangar] Downloading: {url}")
             try:
                 with httpx.stream("GET", url) as response:
                     response.raise_for_status()
-                    with open(file_path, "wb") as f:
-                        for chunk in response.iter_bytes():
-                            f.write(chunk)
+                    digests = cache.write_stream(response.iter_bytes(), file_path, ("sha512",))
             except Exception as e:
-                error_handler(f"[hanger] Failed to download {url}", e)
+                error_handler.handle_error(f"[hangar] Failed to download {url}", e)
         else:
-            log.info(f"[hanger] Using cached file: {file_name}")
+            log.info(f"[hangar] Using cached file: {file_name}")
+            cache.touch(file_path)
+            digests = cache.file_digests(file_path, ("sha512",))
 
-        sha = cache.sha512sum(file_path)
+        sha = digests["sha512"]
 
         return {
             "name": file_name.rsplit(".", 1)[0],
@@ -60,7 +73,7 @@ class HangerClient(McPkgApi):
             "file_name": file_name,
             "source": url,
             "loader": modloader,
-            "provider": "hanger",
+            "provider": "hangar",
             "timestamp": int(time.time()),
             "signed_by": f"{server_name}_packagegroup.json.sig"
         }
@@ -77,19 +90,19 @@ class HangerClient(McPkgApi):
                 if not jar_path.exists():
                     raise FileNotFoundError(f"Missing mod jar: {jar_path}")
                 zipf.write(jar_path, arcname=meta["file_name"])
-        log.info(f"[hanger] Created ZIP archive: {zip_path}")
+        log.info(f"[hangar] Created ZIP archive: {zip_path}")
 
         # 2. Write packagegroup metadata
         json_path = output_path / f"{group_name}_packagegroup.json"
         with open(json_path, "w") as f:
             json.dump(downloaded_metadata, f, indent=2)
-        log.info(f"[hanger] Created packagegroup JSON: {json_path}")
+        log.info(f"[hangar] Created packagegroup JSON: {json_path}")
 
         # 3. Write .mcpkg pointer
         mcpkg_path = output_path / f"{group_name}.mcpkg"
         repo_url = context.env["MC_REPO_URL"]
         with open(mcpkg_path, "w") as f:
             f.write(f"{repo_url}/{group_name}_packagegroup.json\n")
-        log.info(f"[hanger] Wrote .mcpkg: {mcpkg_path}")
+        log.info(f"[hangar] Wrote .mcpkg: {mcpkg_path}")
 
         return str(zip_path), str(json_path)
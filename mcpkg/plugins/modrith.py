@@ -1,8 +1,10 @@
 import os
+import json
 import time
+import asyncio
 import httpx
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple, Dict, List, Iterable
 
 from mcpkg.plugins.api import McPkgApi
 from container_craft_core.env import env
@@ -10,10 +12,21 @@ from container_craft_core.config.context import context
 from container_craft_core.logger import mcpkg_logger
 from container_craft_core.error_handler import error_handler
 from container_craft_core.cache import cache
+from mcpkg.fetch import FetchEngine
+from mcpkg.index import package_index
+from mcpkg.mcpkg_entry import McPkgEntry
 
 MODRINTH_API_BASE = "https://api.modrinth.com/v2"
 USER_AGENT = "m_jimmer/container_craft/0.1.0 (m_jimmer@dontspamme.com)"
 
+# Ids per bulk request; keeps the JSON encoded query string well under URL limits.
+BULK_CHUNK = 100
+# Newest version ids per project fetched in bulk before falling back to a
+# filtered per-project version listing.
+BULK_VERSION_WINDOW = 10
+# Hits per /search page when building the local index (Modrinth's maximum).
+SEARCH_PAGE = 100
+
 class ModrinthClient(McPkgApi):
     def __init__(self):
         self.env = env
@@ -33,22 +46,309 @@ class ModrinthClient(McPkgApi):
     def key(self) -> Optional[str]:
         return None  # No API key required
 
+    def headers(self) -> Dict[str, str]:
+        return {"User-Agent": USER_AGENT}
+
+    def do_update(self, version: Optional[str] = None, loader: Optional[str] = None) -> bool:
+        """
+        Update the local index for loader (default MC_LOADER) and version. The first run
+        indexes every mod Modrinth lists for them; later runs walk the search
+        results newest-modified first, stop at the sync cursor and only
+        append the changed mods as a delta segment.
+        """
+        version = version or self.env.get("MC_VERSION")
+        loader = loader or self.env.get("MC_LOADER")
+        cursor = package_index.cursor(self.name(), version, loader)
+        engine = FetchEngine()
+        self.register(engine)
+
+        if cursor and cursor.get("date_modified"):
+            mcpkg_logger.info(f"[modrith] Updating index for {loader} {version} since {cursor['date_modified']}")
+            job = self.changes_async(engine, version, loader, cursor["date_modified"])
+        else:
+            mcpkg_logger.info(f"[modrith] Building index for {loader} {version}")
+            job = self.index_async(engine, version, loader)
+
+        [(label, result, error)] = engine.run_jobs(lambda: [(f"index {loader} {version}", job)])
+        if error is not None:
+            mcpkg_logger.error(f"[modrith] Index update failed: {error}")
+            return False
+
+        entries, date_modified = result
+        new_cursor = {"date_modified": date_modified}
+        if cursor:
+            package_index.append(self.name(), version, loader, entries, new_cursor)
+        else:
+            package_index.write(self.name(), version, loader, entries, new_cursor)
+        return True
+
+    def do_upgrade(self, mod: Optional[str] = None, version: Optional[str] = None) -> bool:
+        mcpkg_logger.warning("[modrith] upgrade is not implemented yet")
+        return False
+
     def _rate_limit(self):
         elapsed = time.time() - self.last_call
         if elapsed < self.rate_limit_interval:
             time.sleep(self.rate_limit_interval - elapsed)
         self.last_call = time.time()
 
+    def _version_filters(self, version: str) -> Dict[str, str]:
+        """Loader and game version filters applied server side by Modrinth."""
+        return {
+            "loaders": json.dumps([self.env.get("MC_LOADER")]),
+            "game_versions": json.dumps([version]),
+        }
+
     def do_search(self, slug: str, version: Optional[str] = None):
         version = version or self.env.get("MC_VERSION")
-        self._rate_limit()
-        res = self.client.get(f"/project/{slug}/version")
-        if res.status_code != 200:
-            raise RuntimeError(f"Failed to fetch versions for {slug}: {res.status_code}")
-        versions = res.json()
+        try:
+            versions = self._get_json(f"/project/{slug}/version", params=self._version_filters(version))
+        except httpx.HTTPStatusError as e:
+            raise RuntimeError(f"Failed to fetch versions for {slug}: {e.response.status_code}")
+        return self._match_version(slug, versions, version)
+
+    async def do_search_async(self, engine, slug: str, version: Optional[str] = None):
+        version = version or self.env.get("MC_VERSION")
+        versions = await engine.get_json(self.name(), f"/project/{slug}/version", params=self._version_filters(version))
+        return self._match_version(slug, versions, version)
+
+    async def resolve_many_async(
+        self,
+        engine,
+        slugs: Iterable[str],
+        version: Optional[str] = None,
+        known_hashes: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, dict]:
+        """
+        Resolve a whole mod list with bulk requests. Returns slug -> version;
+        slugs that cannot be resolved for this loader/version are left out.
+
+        1. Mods with a known sha512 (from a packagegroup) are upgraded in one
+           POST /version_files/update.
+        2. Every other slug is looked up in GET /projects (ids and slugs are
+           both accepted), dropping projects that do not list the loader or
+           game version at all.
+        3. The newest few version ids of the remaining projects are fetched
+           with GET /versions and matched locally.
+        4. Only projects with no match in that window fall back to a
+           filtered per-project version listing.
+        """
+        version = version or self.env.get("MC_VERSION")
+        loader = self.env.get("MC_LOADER")
+        slugs = list(dict.fromkeys(slugs))
+        resolved: Dict[str, dict] = {}
+
+        # 1. upgrade known files by hash
+        known = {slug: sha for slug, sha in (known_hashes or {}).items() if slug in slugs and sha}
+        if known:
+            updates = await engine.request(self.name(), "POST", "/version_files/update", json={
+                "hashes": list(known.values()),
+                "algorithm": "sha512",
+                "loaders": [loader],
+                "game_versions": [version],
+            })
+            by_hash = updates.json()
+            for slug, sha in known.items():
+                if sha in by_hash:
+                    resolved[slug] = by_hash[sha]
+
+        # 2. bulk project lookup
+        pending = [slug for slug in slugs if slug not in resolved]
+        projects: Dict[str, dict] = {}
+        for chunk in self._chunks(pending, BULK_CHUNK):
+            found = await engine.get_json(self.name(), "/projects", params={"ids": json.dumps(chunk)})
+            for project in found:
+                for slug in chunk:
+                    if slug in (project.get("slug"), project.get("id")):
+                        projects[slug] = project
+
+        for slug in pending:
+            project = projects.get(slug)
+            if project is None:
+                mcpkg_logger.warning(f"[modrith] Unknown project: {slug}")
+            elif loader not in project.get("loaders", []) or version not in project.get("game_versions", []):
+                mcpkg_logger.warning(f"[modrith] {slug} has no release for {loader} {version}")
+                del projects[slug]
+
+        # 3./4. newest versions in bulk, per-project listing for the rest
+        candidates = await self._project_versions_async(engine, projects, version, loader)
+        for slug, matches in candidates.items():
+            if matches:
+                resolved[slug] = matches[0]
+
+        return resolved
+
+    async def _project_versions_async(
+        self,
+        engine,
+        projects: Dict[str, dict],
+        version: str,
+        loader: str,
+        max_age: Optional[float] = None,
+    ) -> Dict[str, List[dict]]:
+        """
+        All versions of each project matching loader and game version, newest
+        first. The newest few version ids of every project are fetched with
+        GET /versions; only projects with no match in that window fall back to
+        a filtered per-project version listing. Versions are immutable, so
+        max_age only applies to the listings.
+        """
+        window = {slug: p.get("versions", [])[-BULK_VERSION_WINDOW:] for slug, p in projects.items()}
+        version_ids = [vid for ids in window.values() for vid in ids]
+        versions_by_id: Dict[str, dict] = {}
+        pages = await asyncio.gather(*(
+            engine.get_json(self.name(), "/versions", params={"ids": json.dumps(chunk)})
+            for chunk in self._chunks(version_ids, BULK_CHUNK)
+        ))
+        for page in pages:
+            for v in page:
+                versions_by_id[v["id"]] = v
+
+        matched: Dict[str, List[dict]] = {}
+        fallback = []
+        for slug, ids in window.items():
+            matches = [
+                versions_by_id[vid] for vid in ids
+                if vid in versions_by_id and self._matches(versions_by_id[vid], version, loader)
+            ]
+            if matches:
+                matched[slug] = sorted(matches, key=lambda v: v.get("date_published", ""), reverse=True)
+            else:
+                fallback.append(slug)
+
+        if fallback:
+            mcpkg_logger.debug(f"[modrith] Falling back to per-project listing for: {fallback}")
+            results = await asyncio.gather(
+                *(engine.get_json(
+                    self.name(),
+                    f"/project/{projects[slug]['id']}/version",
+                    params=self._version_filters(version),
+                    max_age=max_age,
+                ) for slug in fallback),
+                return_exceptions=True,
+            )
+            for slug, result in zip(fallback, results):
+                if isinstance(result, Exception):
+                    mcpkg_logger.warning(f"[modrith] {slug}: {result}")
+                    continue
+                matches = [v for v in result if isinstance(v, dict) and self._matches(v, version, loader)]
+                if matches:
+                    matched[slug] = sorted(matches, key=lambda v: v.get("date_published", ""), reverse=True)
+                else:
+                    mcpkg_logger.warning(f"[modrith] No matching version found for {slug}")
+
+        return matched
+
+    def _search_page(self, engine, version: str, loader: str, offset: int, max_age: Optional[float] = None):
+        """One page of mods for loader and version, most recently modified first."""
+        facets = json.dumps([[f"categories:{loader}"], [f"versions:{version}"], ["project_type:mod"]])
+        return engine.get_json(self.name(), "/search", params={
+            "facets": facets, "index": "updated", "limit": SEARCH_PAGE, "offset": offset,
+        }, max_age=max_age)
+
+    async def index_async(self, engine, version: str, loader: str) -> Tuple[List[McPkgEntry], str]:
+        """
+        Every mod listed for loader and version as index entries, plus the
+        newest date_modified seen (the sync cursor). The search pages are
+        fetched concurrently after the first, then projects and their
+        versions in bulk.
+        """
+        first = await self._search_page(engine, version, loader, 0)
+        total = first.get("total_hits", 0)
+        rest = await asyncio.gather(*(
+            self._search_page(engine, version, loader, offset) for offset in range(SEARCH_PAGE, total, SEARCH_PAGE)
+        ))
+        hits = [hit for p in [first, *rest] for hit in p.get("hits", [])]
+        entries = await self._index_projects_async(engine, hits, version, loader)
+        return entries, max((hit.get("date_modified", "") for hit in hits), default="")
+
+    async def changes_async(self, engine, version: str, loader: str, since: str) -> Tuple[List[McPkgEntry], str]:
+        """
+        Index entries for the mods modified after the since cursor. Search
+        pages are walked in order, always revalidated, until a hit at or
+        before the cursor shows up.
+        """
+        hits = []
+        offset = 0
+        while True:
+            page = await self._search_page(engine, version, loader, offset, max_age=0)
+            page_hits = page.get("hits", [])
+            changed = [hit for hit in page_hits if hit.get("date_modified", "") > since]
+            hits.extend(changed)
+            offset += SEARCH_PAGE
+            if len(changed) < len(page_hits) or offset >= page.get("total_hits", 0):
+                break
+
+        mcpkg_logger.info(f"[modrith] {len(hits)} projects changed since {since}")
+        entries = await self._index_projects_async(engine, hits, version, loader, max_age=0)
+        return entries, max((hit.get("date_modified", "") for hit in hits), default=since)
+
+    async def _index_projects_async(
+        self,
+        engine,
+        hits: List[dict],
+        version: str,
+        loader: str,
+        max_age: Optional[float] = None,
+    ) -> List[McPkgEntry]:
+        """Index entries for search hits: projects and versions fetched in bulk."""
+        project_ids = list(dict.fromkeys(hit["project_id"] for hit in hits))
+        mcpkg_logger.info(f"[modrith] Indexing {len(project_ids)} projects for {loader} {version}")
+
+        projects: Dict[str, dict] = {}
+        found = await asyncio.gather(*(
+            engine.get_json(self.name(), "/projects", params={"ids": json.dumps(chunk)}, max_age=max_age)
+            for chunk in self._chunks(project_ids, BULK_CHUNK)
+        ))
+        for chunk in found:
+            for project in chunk:
+                projects[project["slug"]] = project
+
+        candidates = await self._project_versions_async(engine, projects, version, loader, max_age)
+        entries = []
+        for slug, matches in candidates.items():
+            for v in matches:
+                entry = self._to_entry(projects[slug], v, version, loader)
+                if entry is not None:
+                    entries.append(entry)
+        return entries
+
+    def _to_entry(self, project: dict, mod_version: dict, mc_version: str, loader: str) -> Optional[McPkgEntry]:
+        try:
+            file = self._primary_file(project["slug"], mod_version)
+        except RuntimeError:
+            return None
+        hashes = file.get("hashes", {})
+        return McPkgEntry(
+            name=project.get("title", project["slug"]),
+            slug=project["slug"],
+            version=mod_version["version_number"],
+            loader=loader,
+            mc_version=mc_version,
+            file_name=file["filename"],
+            source=file["url"],
+            sha512=hashes.get("sha512", ""),
+            timestamp=mod_version.get("date_published", ""),
+            provider=self.name(),
+            dependencies=mod_version.get("dependencies", []),
+            project_id=project["id"],
+            version_id=mod_version["id"],
+            sha1=hashes.get("sha1", ""),
+        )
+
+    @staticmethod
+    def _chunks(items: List[str], size: int) -> Iterable[List[str]]:
+        for i in range(0, len(items), size):
+            yield items[i:i + size]
+
+    @staticmethod
+    def _matches(mod_version: dict, version: str, loader: str) -> bool:
+        return version in mod_version.get("game_versions", []) and loader in mod_version.get("loaders", [])
+
+    def _match_version(self, slug: str, versions: list, version: str) -> dict:
         for v in versions:
             if isinstance(v, dict):
-                if version in v.get("game_versions", []) and self.env.get("MC_LOADER") in v.get("loaders", []):
+                if self._matches(v, version, self.env.get("MC_LOADER")):
                   # pkg = McPkgConig()
                   ## in this plugin we create the pkg to return
 
@@ -57,33 +357,46 @@ class ModrinthClient(McPkgApi):
 
     def do_fetch(self, slug: str, version: Optional[str] = None):
         mod_version = self.do_search(slug, version)
+        file = self._primary_file(slug, mod_version)
+        file_path, _ = self._download_file(file["url"], file["filename"])
+        return file_path
+
+    async def do_fetch_async(self, engine, slug: str, version: Optional[str] = None) -> Path:
+        mod_version = await self.do_search_async(engine, slug, version)
+        file = self._primary_file(slug, mod_version)
+        file_path, _ = await self.download_async(engine, file["url"], file["filename"])
+        return file_path
+
+    @staticmethod
+    def _primary_file(slug: str, mod_version: dict) -> dict:
         file = next((f for f in mod_version["files"] if f.get("primary", True)), None)
         if not file:
             raise RuntimeError(f"No downloadable file found for {slug}")
+        return file
 
-        file_path = self._download_file(file["url"], file["filename"])
-        return file_path
-
-    def _download_file(self, url: str, filename: str) -> Path:
-        target_dir = Path(self.env.repo_dir)
+    def _download_file(self, url: str, filename: str) -> Tuple[Path, Dict[str, str]]:
+        """
+        Download into the repo dir, hashing while the file is written.
+        Returns the path and its sha1/sha512 digests.
+        """
+        target_dir = self.env.get_path("MC_REPO_DIR")
         target_dir.mkdir(parents=True, exist_ok=True)
         target_path = target_dir / filename
 
         if target_path.exists():
             mcpkg_logger.info(f"[modrith] Using cached mod: {target_path}")
-            return target_path
+            cache.touch(target_path)
+            return target_path, cache.file_digests(target_path, ("sha1", "sha512"))
 
         self._rate_limit()
         try:
             with httpx.stream("GET", url, headers={"User-Agent": USER_AGENT}) as response:
                 response.raise_for_status()
-                with target_path.open("wb") as f:
-                    for chunk in response.iter_bytes():
-                        f.write(chunk)
+                digests = cache.write_stream(response.iter_bytes(), target_path, ("sha1", "sha512"))
             mcpkg_logger.info(f"[modrith] Downloaded mod to: {target_path}")
-            return target_path
+            return target_path, digests
         except Exception as e:
-            error_handler(f"Failed to download {url}", e)
+            error_handler.handle_error(f"Failed to download {url}", e)
 
     def do_parse(self, node: dict):
         """
@@ -106,9 +419,9 @@ class ModrinthClient(McPkgApi):
         if not file:
             raise RuntimeError(f"No downloadable file for {slug}")
 
-        file_path = self._download_file(file["url"], file["filename"])
-        file_sha512 = cache.sha512sum(file_path)
-        file_sha1 = cache.sha1sum(file_path)
+        file_path, digests = self._download_file(file["url"], file["filename"])
+        file_sha512 = digests["sha512"]
+        file_sha1 = digests["sha1"]
 
         pkg_entry = {
             "name": slug,
@@ -0,0 +1,257 @@
+from dataclasses import dataclass, field
+from typing import Optional, Dict, List, Tuple, Iterable, Set
+
+from container_craft_core.logger import mcpkg_logger
+from mcpkg.index import PackageIndex, IndexTable, package_index
+from mcpkg.mcpkg_entry import McPkgEntry
+
+# (provider, slug, version, loader, mc_version); version None means newest.
+SolveKey = Tuple[str, str, Optional[str], str, str]
+
+
+class ResolutionError(Exception):
+    """A requirement cannot be satisfied from the local index."""
+
+
+@dataclass(frozen=True)
+class Requirement:
+    provider: str
+    slug: str
+    version: Optional[str] = None  # version number or version id, None for newest
+
+    @property
+    def root_key(self) -> str:
+        """Key the lockfile records this requirement's solution under."""
+        return f"{self.provider}:{self.slug}@{self.version or '*'}"
+
+
+@dataclass(frozen=True)
+class SubGraph:
+    """
+    Solution for one package: the package and its required dependency
+    closure, plus what that closure declares incompatible or optional.
+    """
+    root: McPkgEntry
+    packages: Tuple[McPkgEntry, ...]
+    incompatible: Tuple[Tuple[str, str], ...] = ()  # (slug, declared by)
+    optional: Tuple[Tuple[str, str], ...] = ()      # (slug, suggested by)
+
+
+@dataclass
+class Resolution:
+    mc_version: str
+    loader: str
+    packages: Dict[str, McPkgEntry] = field(default_factory=dict)
+    required_by: Dict[str, Set[str]] = field(default_factory=dict)
+    roots: Dict[str, List[str]] = field(default_factory=dict)  # root_key -> closure slugs
+    optional: Dict[str, Set[str]] = field(default_factory=dict)
+    warnings: List[str] = field(default_factory=list)
+
+    def warn(self, message: str):
+        mcpkg_logger.warning(message)
+        self.warnings.append(message)
+
+
+class Resolver:
+    """
+    Dependency resolver over the local package index (mcpkg update).
+
+    Each package is solved once into a SubGraph, memoized by
+    (provider, slug, version, loader, mc_version), so shared dependencies
+    (fabric-api and friends) are walked once however many mods, servers or
+    resolutions need them. Solutions recorded in a lockfile are reused for
+    unchanged requirements, so editing one mod only re-solves that mod.
+
+    Required dependencies are pulled in, optional ones are reported (or
+    pulled in with include_optional) and incompatible ones fail the
+    resolution when both ends end up installed.
+    """
+
+    def __init__(self, index: Optional[PackageIndex] = None):
+        self.index = index or package_index
+        self._memo: Dict[SolveKey, SubGraph] = {}
+
+    def _table(self, provider: str, mc_version: str, loader: str) -> IndexTable:
+        if not self.index.exists(provider, mc_version, loader):
+            raise ResolutionError(
+                f"No local index for {provider} {mc_version} {loader}; run `mcpkg update` first."
+            )
+        return self.index.table(provider, mc_version, loader)
+
+    def solve(
+        self,
+        provider: str,
+        name: str,
+        version: Optional[str],
+        loader: str,
+        mc_version: str,
+        _stack: Tuple[str, ...] = (),
+    ) -> SubGraph:
+        """Solve one package (slug, project id or version id) and its required closure."""
+        table = self._table(provider, mc_version, loader)
+        entry = table.latest(name, version) if version else None
+        if entry is None and version:
+            pinned = table.version(version)
+            if pinned is not None and (table.slug(name) in (None, pinned.slug)):
+                entry = pinned
+            elif table.slug(name):
+                mcpkg_logger.debug(f"{name}@{version} is not indexed; using the newest version")
+        if entry is None:
+            entry = table.latest(name) or table.version(name)
+        if entry is None:
+            raise ResolutionError(f"{name} is not available for {loader} {mc_version} ({provider})")
+
+        key: SolveKey = (provider, entry.slug, version, loader, mc_version)
+        if key in self._memo:
+            return self._memo[key]
+        if entry.slug in _stack:
+            # dependency cycle: the package is already being solved further up
+            return SubGraph(root=entry, packages=(entry,))
+
+        packages: Dict[str, McPkgEntry] = {entry.slug: entry}
+        incompatible, optional = self._edges(entry, table)
+        for dep in entry.dependencies or []:
+            target = dep.get("project_id") or dep.get("version_id")
+            if not target or dep.get("dependency_type", "required") != "required":
+                continue
+
+            sub = self.solve(provider, target, dep.get("version_id"), loader, mc_version, _stack + (entry.slug,))
+            for pkg in sub.packages:
+                current = packages.get(pkg.slug)
+                if pkg.slug == entry.slug:
+                    continue  # a dependency cycle back to this package keeps its version
+                if current is None or str(pkg.timestamp) > str(current.timestamp):
+                    packages[pkg.slug] = pkg
+            incompatible.extend(sub.incompatible)
+            optional.extend(sub.optional)
+
+        graph = SubGraph(
+            root=entry,
+            packages=tuple(packages.values()),
+            incompatible=tuple(dict.fromkeys(incompatible)),
+            optional=tuple(dict.fromkeys(optional)),
+        )
+        if not _stack or not any(p.slug in _stack for p in graph.packages):
+            # partial solutions inside a cycle are not memoized
+            self._memo[key] = graph
+        return graph
+
+    @staticmethod
+    def _edges(entry: McPkgEntry, table: Optional[IndexTable]) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+        """(incompatible, optional) dependencies of entry as (slug, entry slug) pairs."""
+        incompatible: List[Tuple[str, str]] = []
+        optional: List[Tuple[str, str]] = []
+        for dep in entry.dependencies or []:
+            target = dep.get("project_id") or dep.get("version_id")
+            if not target:
+                continue
+            slug = (table.slug(target) if table else None) or target
+            kind = dep.get("dependency_type", "required")
+            if kind == "incompatible":
+                incompatible.append((slug, entry.slug))
+            elif kind == "optional":
+                optional.append((slug, entry.slug))
+        return incompatible, optional
+
+    def resolve(
+        self,
+        requirements: Iterable[Requirement],
+        mc_version: str,
+        loader: str,
+        locked: Optional[Dict[str, List[McPkgEntry]]] = None,
+        include_optional: bool = False,
+    ) -> Resolution:
+        """
+        Resolve requirements into one consistent package set.
+
+        locked maps Requirement.root_key to a previously solved closure (from
+        the lockfile); those requirements are not re-solved. Drop a key to
+        upgrade that requirement.
+        """
+        resolution = Resolution(mc_version=mc_version, loader=loader)
+        locked = locked or {}
+        requirements = list(dict.fromkeys(requirements))
+        root_slugs: Dict[str, Requirement] = {}
+        incompatible: List[Tuple[str, str]] = []
+        optional: List[Tuple[str, str]] = []
+
+        def _add(pkg: McPkgEntry, parent: str):
+            current = resolution.packages.get(pkg.slug)
+            if current is not None and current.provider != pkg.provider:
+                resolution.warn(
+                    f"{pkg.slug} is provided by both {current.provider} and {pkg.provider}; keeping {current.provider}"
+                )
+                pkg = current
+            elif current is not None and current.version != pkg.version:
+                pinned = root_slugs.get(pkg.slug)
+                if pinned is not None and pinned.version and pinned.version in (current.version, current.version_id):
+                    pkg = current  # an explicit pin always wins
+                elif str(current.timestamp) >= str(pkg.timestamp):
+                    resolution.warn(f"{pkg.slug}: {parent} wants {pkg.version}, keeping newer {current.version}")
+                    pkg = current
+                else:
+                    resolution.warn(f"{pkg.slug}: {parent} wants {pkg.version}, upgrading from {current.version}")
+            resolution.packages[pkg.slug] = pkg
+            resolution.required_by.setdefault(pkg.slug, set()).add(parent)
+
+        for req in requirements:
+            if req.root_key in locked:
+                closure = locked[req.root_key]
+                root_slugs[closure[0].slug if closure else req.slug] = req
+                table = (
+                    self.index.table(req.provider, mc_version, loader)
+                    if self.index.exists(req.provider, mc_version, loader) else None
+                )
+                for pkg in closure:
+                    _add(pkg, req.root_key)
+                    pkg_incompatible, pkg_optional = self._edges(pkg, table)
+                    incompatible.extend(pkg_incompatible)
+                    optional.extend(pkg_optional)
+                resolution.roots[req.root_key] = [pkg.slug for pkg in closure]
+                continue
+
+            graph = self.solve(req.provider, req.slug, req.version, loader, mc_version)
+            root_slugs[graph.root.slug] = req
+            # root first, so the lockfile can tell which package a root resolved to
+            ordered = [graph.root] + [p for p in graph.packages if p.slug != graph.root.slug]
+            for pkg in ordered:
+                _add(pkg, req.root_key)
+            resolution.roots[req.root_key] = [pkg.slug for pkg in ordered]
+            incompatible.extend(graph.incompatible)
+            optional.extend(graph.optional)
+
+        for slug, by in optional:
+            if slug in resolution.packages:
+                continue
+            if include_optional:
+                provider = resolution.packages[by].provider if by in resolution.packages else None
+                try:
+                    graph = self.solve(provider, slug, None, loader, mc_version)
+                except ResolutionError as e:
+                    resolution.warn(f"Optional dependency {slug} of {by} skipped: {e}")
+                    continue
+                for pkg in graph.packages:
+                    _add(pkg, by)
+                incompatible.extend(graph.incompatible)
+            else:
+                resolution.optional.setdefault(slug, set()).add(by)
+
+        clashes = [
+            f"{by} is incompatible with {slug}"
+            for slug, by in dict.fromkeys(incompatible)
+            if slug in resolution.packages and by in resolution.packages
+        ]
+        if clashes:
+            raise ResolutionError("; ".join(clashes))
+
+        mcpkg_logger.debug(
+            f"Resolved {len(requirements)} requirements into {len(resolution.packages)} packages "
+            f"({loader} {mc_version}, {len(self._memo)} memoized sub-graphs)"
+        )
+        return resolution
+
+    def clear(self):
+        self._memo.clear()
+
+
+resolver = Resolver()
@@ -0,0 +1,6 @@
+import os
+import tempfile
+
+# The module level singletons (env, cache, ...) are created on import; keep
+# their cache and repo dirs out of the checkout.
+os.environ.setdefault("MC_BUILD_DIR", tempfile.mkdtemp(prefix="container-craft-tests-"))
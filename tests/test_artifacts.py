@@ -0,0 +1,46 @@
+import os
+import stat
+
+import pytest
+
+from container_craft_core.artifacts import ArtifactStore
+from container_craft_core.cache import Cache
+from container_craft_core.env import ContainerCraftEnv
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtifactStore(Cache(ContainerCraftEnv(cli_args={"MC_CACHE_DIR": str(tmp_path / "cache")})))
+
+
+def test_foreign_file_not_linked_into_store(store, tmp_path):
+    jar = tmp_path / "repo" / "sodium.jar"
+    jar.parent.mkdir()
+    jar.write_bytes(b"sodium")
+
+    blob = store.cache.blob_path(store.ingest(jar))
+    assert not os.path.samefile(jar, blob)
+    assert stat.S_IMODE(blob.stat().st_mode) == 0o444
+
+    # editing the user's file leaves the stored blob alone
+    jar.write_bytes(b"edited")
+    assert blob.read_bytes() == b"sodium"
+
+
+def test_owned_file_hardlinked_read_only(store):
+    store.cache.tmp_dir.mkdir(parents=True)
+    download = store.cache.tmp_dir / "download"
+    download.write_bytes(b"installer")
+
+    blob = store.cache.blob_path(store.ingest(download, owned=True))
+    assert os.path.samefile(download, blob)
+    assert stat.S_IMODE(blob.stat().st_mode) == 0o444
+
+
+def test_placed_hardlink_read_only(store, tmp_path):
+    jar = tmp_path / "sodium.jar"
+    jar.write_bytes(b"sodium")
+
+    dest = tmp_path / "build" / "mods" / "sodium.jar"
+    assert store.install(jar, dest) == "hardlink"
+    assert stat.S_IMODE(dest.stat().st_mode) == 0o444
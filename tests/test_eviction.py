@@ -0,0 +1,69 @@
+import os
+
+import pytest
+
+from container_craft_core.cache import Cache
+from container_craft_core.env import ContainerCraftEnv
+from container_craft_core.eviction import CacheEvictor, EvictionPolicy
+
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def make_evictor(tmp_path):
+    (tmp_path / "repo").mkdir()
+    cache = Cache(ContainerCraftEnv(cli_args={
+        "MC_CACHE_DIR": str(tmp_path / "cache"),
+        "MC_REPO_DIR": str(tmp_path / "repo"),
+        "MC_INDEX_DIR": str(tmp_path / "index"),
+    }))
+
+    def _make(max_bytes=None):
+        return CacheEvictor(cache, EvictionPolicy(max_bytes=max_bytes))
+    return _make
+
+
+def write(path, size, age):
+    """A file of size bytes, last used age seconds ago."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"\0" * size)
+    used = path.stat().st_mtime - age
+    os.utime(path, (used, used))
+    return path
+
+
+def test_hardlinks_counted_once(make_evictor, tmp_path):
+    blob = write(tmp_path / "cache" / "blobs" / "sha512" / "ab" / "cd" / "abcd", 2 * MB, 100)
+    os.link(blob, tmp_path / "repo" / "sodium.jar")
+    write(tmp_path / "repo" / "lithium.jar", MB, 50)
+
+    # 3M on disk, not 5M: nothing to evict
+    report = make_evictor(max_bytes=3 * MB).gc(dry_run=True)
+    assert report.removed == []
+    assert report.bytes_remaining == 3 * MB
+
+
+def test_reclaimed_when_last_link_goes(make_evictor, tmp_path):
+    blob = write(tmp_path / "cache" / "blobs" / "sha512" / "ab" / "cd" / "abcd", 2 * MB, 100)
+    jar = tmp_path / "repo" / "sodium.jar"
+    os.link(blob, jar)
+    write(tmp_path / "repo" / "lithium.jar", MB, 50)
+
+    dry = make_evictor(max_bytes=2 * MB).gc(dry_run=True)
+    report = make_evictor(max_bytes=2 * MB).gc()
+    # both links of the least recently used file go, its bytes once
+    for r in (dry, report):
+        assert sorted(r.removed) == sorted([blob, jar])
+        assert r.bytes_reclaimed == 2 * MB
+        assert r.bytes_remaining == MB
+    assert not blob.exists() and not jar.exists()
+
+
+def test_link_outside_the_cache_reclaims_nothing(make_evictor, tmp_path):
+    jar = write(tmp_path / "repo" / "sodium.jar", 2 * MB, 100)
+    os.link(jar, tmp_path / "server.jar")
+
+    report = make_evictor(max_bytes=MB).gc()
+    assert report.removed == [jar]
+    assert report.bytes_reclaimed == 0
+    assert (tmp_path / "server.jar").exists()
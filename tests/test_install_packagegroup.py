@@ -0,0 +1,89 @@
+import argparse
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from container_craft_core.env import env
+from mcpkg.commands.install import InstallCommand
+from mcpkg.lockfile import entries_from_packagegroup
+
+JAR = b"PK\x03\x04 hangar plugin jar"
+
+
+@pytest.fixture
+def cdn():
+    """Serves the plugin jar and counts downloads."""
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests.append(self.path)
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(JAR)))
+            self.end_headers()
+            self.wfile.write(JAR)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", requests
+    server.shutdown()
+    server.server_close()
+
+
+def hangar_packagegroup(path, url, provider="hangar"):
+    """A *_packagegroup.json as HangerClient.do_fetch/do_package write it."""
+    path.write_text(json.dumps([{
+        "name": "Chunky-1.4.40",
+        "version": "unknown",
+        "sha": hashlib.sha512(JAR).hexdigest(),
+        "file_name": "Chunky-1.4.40.jar",
+        "source": url,
+        "loader": "paper",
+        "provider": provider,
+        "timestamp": 1760000000,
+        "signed_by": "lobby_packagegroup.json.sig",
+    }]))
+    return path
+
+
+def install(*argv):
+    parser = argparse.ArgumentParser()
+    InstallCommand.args(parser)
+    return InstallCommand().run(parser.parse_args(list(argv)))
+
+
+@pytest.mark.parametrize("provider", ["hangar", "hanger"])
+def test_hangar_packagegroup_round_trip(cdn, tmp_path, monkeypatch, provider):
+    url, requests = cdn
+    repo_dir = tmp_path / "repo"
+    monkeypatch.setitem(env.cli_args, "MC_REPO_DIR", str(repo_dir))
+    group = hangar_packagegroup(tmp_path / "lobby_packagegroup.json", f"{url}/Chunky-1.4.40.jar", provider)
+
+    assert [e.provider for e in entries_from_packagegroup(group)] == ["hangar"]
+
+    assert install("--packagegroup", str(group))
+    assert (repo_dir / "Chunky-1.4.40.jar").read_bytes() == JAR
+    assert requests == ["/Chunky-1.4.40.jar"]
+
+    # verified against the recorded sha512 and not downloaded again
+    assert install("--packagegroup", str(group))
+    assert len(requests) == 1
+
+
+def test_packagegroup_hash_mismatch_fails(cdn, tmp_path, monkeypatch):
+    url, _ = cdn
+    monkeypatch.setitem(env.cli_args, "MC_REPO_DIR", str(tmp_path / "repo"))
+    group = hangar_packagegroup(tmp_path / "lobby_packagegroup.json", f"{url}/Chunky-1.4.40.jar")
+    data = json.loads(group.read_text())
+    data[0]["sha"] = "0" * 128
+    group.write_text(json.dumps(data))
+
+    assert not install("--packagegroup", str(group))
+    assert not (tmp_path / "repo" / "Chunky-1.4.40.jar").exists()
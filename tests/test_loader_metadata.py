@@ -0,0 +1,220 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from container_craft_core.cache import Cache
+from container_craft_core.env import ContainerCraftEnv
+from container_craft.modloaders.metadata import LoaderMetadata
+
+# not in version order, as the maven does not promise one
+FORGE_METADATA = """<metadata><versioning><versions>
+<version>1.21.6-56.0.10</version>
+<version>1.21.6-56.0.9</version>
+<version>1.21.7-57.0.1</version>
+<version>1.21.8-58.0.10</version>
+<version>1.21.8-58.0.9</version>
+</versions></versioning></metadata>"""
+
+FORGE_PROMOTIONS = {"promos": {
+    "1.21.7-latest": "57.0.1",
+    "1.21.8-latest": "58.0.10",
+    "1.21.8-recommended": "58.0.9",
+}}
+
+NEOFORGE_METADATA = """<metadata><versioning><versions>
+<version>21.8.1</version>
+<version>21.8.10</version>
+<version>21.8.2</version>
+<version>21.8.11-beta</version>
+</versions></versioning></metadata>"""
+
+
+def fill_build(build_id, channel, project="paper", version="1.21.8"):
+    return {
+        "id": build_id,
+        "channel": channel,
+        "downloads": {"server:default": {
+            "name": f"{project}-{version}-{build_id}.jar",
+            "url": f"https://fill-data.example/{project}-{version}-{build_id}.jar",
+            "checksums": {"sha256": f"{build_id:064x}"},
+        }},
+    }
+
+
+def canned_routes():
+    return {
+        "/v2/versions/game": [{"version": "1.21.9"}, {"version": "1.21.8"}],
+        "/v2/versions/loader": [
+            {"version": "0.17.0-beta.1", "stable": False},
+            {"version": "0.16.14", "stable": True},
+            {"version": "0.16.13", "stable": True},
+        ],
+        "/v2/versions/installer": [
+            {"version": "1.2.0-rc", "stable": False},
+            {"version": "1.1.0", "stable": True},
+        ],
+        "/net/minecraftforge/forge/maven-metadata.xml": FORGE_METADATA,
+        "/files/net/minecraftforge/forge/promotions_slim.json": FORGE_PROMOTIONS,
+        "/releases/net/neoforged/neoforge/maven-metadata.xml": NEOFORGE_METADATA,
+        "/v3/projects/paper/versions/1.21.8/builds": [
+            fill_build(41, "BETA"), fill_build(40, "STABLE"), fill_build(39, "STABLE"),
+        ],
+        "/v3/projects/velocity": {"versions": {"3.0.0": ["3.3.0-SNAPSHOT", "3.4.0-SNAPSHOT"]}},
+        "/v3/projects/velocity/versions/3.4.0-SNAPSHOT/builds": [
+            fill_build(522, "STABLE", "velocity", "3.4.0-SNAPSHOT"),
+        ],
+        "/v3/projects/velocity/versions/3.3.0-SNAPSHOT/builds": [
+            fill_build(436, "STABLE", "velocity", "3.3.0-SNAPSHOT"),
+        ],
+    }
+
+
+class StandIn:
+    """Serves canned loader metadata from http.server and counts the requests."""
+
+    def __init__(self):
+        self.routes = canned_routes()
+        self.requests = []
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stand_in.requests.append(self.path)
+                body = stand_in.routes.get(self.path)
+                if body is None:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                data = body.encode() if isinstance(body, str) else json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.routes["/mc/game/version_manifest_v2.json"] = {
+            "versions": [{"id": "1.21.8", "url": f"{self.url}/v1/packages/abc/1.21.8.json"}],
+        }
+        self.routes["/v1/packages/abc/1.21.8.json"] = {
+            "downloads": {"server": {"sha1": "a" * 40, "url": f"{self.url}/v1/objects/aaa/server.jar"}},
+        }
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.thread.is_alive():
+            self.server.shutdown()
+            self.server.server_close()
+            self.thread.join()
+
+
+@pytest.fixture
+def stand_in():
+    server = StandIn()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def make_metadata(stand_in, tmp_path):
+    """A fresh LoaderMetadata (empty memory) sharing one snapshot dir."""
+    def _make(ttl="86400"):
+        env = ContainerCraftEnv(cli_args={
+            "MC_CACHE_DIR": str(tmp_path / "cache"),
+            "MC_LOADER_META_TTL": ttl,
+            "MC_FABRIC_META_URL": stand_in.url,
+            "MC_FORGE_MAVEN_URL": stand_in.url,
+            "MC_FORGE_FILES_URL": f"{stand_in.url}/files",
+            "MC_NEOFORGE_MAVEN_URL": f"{stand_in.url}/releases",
+            "MC_PAPER_FILL_URL": stand_in.url,
+            "MC_MOJANG_META_URL": stand_in.url,
+        })
+        return LoaderMetadata(env, Cache(env))
+    return _make
+
+
+def test_fabric_latest_stable(make_metadata):
+    meta = make_metadata()
+    assert meta.fabric("1.21.8") == {"FABRIC_INSTALLER_VERSION": "1.1.0", "FABRIC_LOADER_VERSION": "0.16.14"}
+    assert meta.fabric("1.19.2") is None
+
+
+def forge_installer(url, version):
+    return f"{url}/net/minecraftforge/forge/{version}/forge-{version}-installer.jar"
+
+
+def test_forge_promoted_build(make_metadata, stand_in):
+    meta = make_metadata()
+    # recommended over latest, latest when nothing is recommended
+    assert meta.forge("1.21.8") == forge_installer(stand_in.url, "1.21.8-58.0.9")
+    assert meta.forge("1.21.7") == forge_installer(stand_in.url, "1.21.7-57.0.1")
+    # not promoted: the highest version on the maven
+    assert meta.forge("1.21.6") == forge_installer(stand_in.url, "1.21.6-56.0.10")
+    assert meta.forge("1.20.1") is None
+
+
+def test_neoforge_newest_build(make_metadata, stand_in):
+    # by version, not document order; betas only when there is nothing else
+    assert make_metadata().neoforge("1.21.8") == (
+        f"{stand_in.url}/releases/net/neoforged/neoforge/21.8.10/neoforge-21.8.10-installer.jar"
+    )
+
+
+def test_paper_latest_stable(make_metadata):
+    build = make_metadata().paper("1.21.8")
+    assert build["build"] == 40
+    assert build["file_name"] == "paper-1.21.8-40.jar"
+    assert build["sha256"] == f"{40:064x}"
+
+
+def test_paper_pinned_build(make_metadata):
+    meta = make_metadata()
+    assert meta.paper("1.21.8", "39")["file_name"] == "paper-1.21.8-39.jar"
+    assert meta.paper("1.21.8", "12") is None
+
+
+def test_velocity_highest_version(make_metadata):
+    meta = make_metadata()
+    assert meta.velocity()["file_name"] == "velocity-3.4.0-SNAPSHOT-522.jar"
+    assert meta.velocity("3.3.0-SNAPSHOT")["file_name"] == "velocity-3.3.0-SNAPSHOT-436.jar"
+
+
+def test_vanilla_server_jar(make_metadata, stand_in):
+    assert make_metadata().vanilla("1.21.8") == {
+        "url": f"{stand_in.url}/v1/objects/aaa/server.jar",
+        "sha1": "a" * 40,
+        "file_name": "minecraft-server-1.21.8.jar",
+    }
+    assert make_metadata().vanilla("1.7.10") is None
+
+
+def test_snapshot_used_within_ttl(make_metadata, stand_in):
+    make_metadata().fabric("1.21.8")
+    fetched = len(stand_in.requests)
+
+    stand_in.routes["/v2/versions/loader"] = [{"version": "0.16.15", "stable": True}]
+    assert make_metadata().fabric("1.21.8")["FABRIC_LOADER_VERSION"] == "0.16.14"
+    assert len(stand_in.requests) == fetched
+
+
+def test_refetched_after_ttl(make_metadata, stand_in):
+    make_metadata(ttl="0").fabric("1.21.8")
+
+    stand_in.routes["/v2/versions/loader"] = [{"version": "0.16.15", "stable": True}]
+    assert make_metadata(ttl="0").fabric("1.21.8")["FABRIC_LOADER_VERSION"] == "0.16.15"
+
+
+def test_stale_snapshot_when_offline(make_metadata, stand_in):
+    make_metadata(ttl="0").paper("1.21.8")
+    stand_in.stop()
+
+    meta = make_metadata(ttl="0")
+    assert meta.paper("1.21.8")["build"] == 40
+    # no snapshot to fall back to
+    assert meta.fabric("1.21.8") is None